@@ -0,0 +1,104 @@
+"""add_hot_query_indexes
+
+Revision ID: 63f7d1f9f15f
+Revises: f58744ec8412
+Create Date: 2026-10-19 10:02:17.540913
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "63f7d1f9f15f"
+down_revision: Union[str, Sequence[str], None] = "f58744ec8412"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY so the tables stay writable while the indexes build; it
+    # cannot run inside the migration transaction.
+    with op.get_context().autocommit_block():
+        # pending-scrape / claim-scrape for one user
+        op.create_index(
+            "ix_tracked_products_user_due",
+            "tracked_products",
+            ["user_id", "next_run_at"],
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # global claim order used by the monitor (NULLS FIRST = never scraped)
+        op.create_index(
+            "ix_tracked_products_due",
+            "tracked_products",
+            [sa.literal_column("next_run_at ASC NULLS FIRST")],
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # history windows, last price per product, dashboard aggregates
+        op.create_index(
+            "ix_price_snapshots_product_fetched",
+            "price_snapshots",
+            ["tracked_product_id", sa.literal_column("fetched_at DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # alerts/pending
+        op.create_index(
+            "ix_price_events_pending",
+            "price_events",
+            [sa.literal_column("triggered_at DESC")],
+            postgresql_where=sa.text("triggered AND NOT acknowledged"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Covered by the leading column of ix_price_snapshots_product_fetched.
+        op.drop_index(
+            "ix_price_snapshots_tracked_product_id",
+            table_name="price_snapshots",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_price_snapshots_tracked_product_id",
+            "price_snapshots",
+            ["tracked_product_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_price_events_pending",
+            table_name="price_events",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_price_snapshots_product_fetched",
+            table_name="price_snapshots",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_tracked_products_due",
+            table_name="tracked_products",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_tracked_products_user_due",
+            table_name="tracked_products",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
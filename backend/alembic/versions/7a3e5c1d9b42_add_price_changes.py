@@ -0,0 +1,55 @@
+"""add_price_changes
+
+Revision ID: 7a3e5c1d9b42
+Revises: d41a7c2e9b10
+Create Date: 2026-10-19 16:40:12.518903
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7a3e5c1d9b42"
+down_revision: Union[str, Sequence[str], None] = "d41a7c2e9b10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "price_changes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "tracked_product_id",
+            sa.Integer(),
+            sa.ForeignKey("tracked_products.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "observation_id",
+            sa.Integer(),
+            sa.ForeignKey("product_observations.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("old_price", sa.Numeric(12, 2), nullable=False),
+        sa.Column("new_price", sa.Numeric(12, 2), nullable=False),
+        sa.Column("currency", sa.String(length=8), nullable=False),
+        sa.Column("direction", sa.String(length=8), nullable=False),
+        sa.Column("changed_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index(
+        "ix_price_changes_product_changed",
+        "price_changes",
+        ["tracked_product_id", sa.text("changed_at DESC")],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_price_changes_product_changed", table_name="price_changes")
+    op.drop_table("price_changes")
@@ -0,0 +1,37 @@
+"""add_interval_mode
+
+Revision ID: 89cedd3bc2c8
+Revises: 63f7d1f9f15f
+Create Date: 2026-10-19 11:26:04.127730
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "89cedd3bc2c8"
+down_revision: Union[str, Sequence[str], None] = "63f7d1f9f15f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "tracked_products",
+        sa.Column(
+            "interval_mode",
+            sa.String(length=16),
+            server_default="manual",
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("tracked_products", "interval_mode")
@@ -0,0 +1,54 @@
+"""notify_price_event_changes
+
+Revision ID: a4f81c6e2b93
+Revises: e5c19a7b3d20
+Create Date: 2026-10-19 21:18:52.904117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a4f81c6e2b93"
+down_revision: Union[str, Sequence[str], None] = "e5c19a7b3d20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every alert write, from any process or from the frontend, tells the
+    # listening backends to drop the product from their alert index.
+    # Notifications are delivered on commit and deduplicated per transaction.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_price_event_change() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                PERFORM pg_notify('qb_alerts', OLD.product_id::text);
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                PERFORM pg_notify('qb_alerts', NEW.product_id::text);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER price_events_notify
+        AFTER INSERT OR UPDATE OR DELETE ON price_events
+        FOR EACH ROW EXECUTE FUNCTION notify_price_event_change();
+    """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS price_events_notify ON price_events")
+    op.execute("DROP FUNCTION IF EXISTS notify_price_event_change()")
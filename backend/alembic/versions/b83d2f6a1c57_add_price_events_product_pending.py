@@ -0,0 +1,44 @@
+"""add_price_events_product_pending
+
+Revision ID: b83d2f6a1c57
+Revises: 7a3e5c1d9b42
+Create Date: 2026-10-19 18:12:44.207316
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b83d2f6a1c57"
+down_revision: Union[str, Sequence[str], None] = "7a3e5c1d9b42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # alert index loads: a product's untriggered alerts
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_price_events_product_pending",
+            "price_events",
+            ["product_id"],
+            postgresql_where=sa.text("NOT triggered"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_price_events_product_pending",
+            table_name="price_events",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
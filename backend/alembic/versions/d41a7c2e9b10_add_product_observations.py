@@ -0,0 +1,127 @@
+"""add_product_observations
+
+Revision ID: d41a7c2e9b10
+Revises: 89cedd3bc2c8
+Create Date: 2026-10-19 14:02:51.386215
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d41a7c2e9b10"
+down_revision: Union[str, Sequence[str], None] = "89cedd3bc2c8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Mirrors app.services.observations.observation_key for existing rows: storefront
+# host (plus Noon's locale segment) and canonicalize_url's product id.
+OBSERVATION_KEY_SQL = """
+    lower(substring({url} from '^[a-zA-Z]+://([^/?#]+)'))
+    || coalesce('/' || substring({url} from '^[a-zA-Z]+://[^/]+/([a-z]{{2,}}-[a-z]{{2}})/'), '')
+    || ':'
+    || coalesce(
+        'AMZN-' || upper(substring({url} from '(?i)/(?:dp|gp/product)/([a-z0-9]{{10}})')),
+        'NOON-' || upper(substring({url} from '(?i)/([a-z0-9]+)/p/')),
+        lower(rtrim(split_part(split_part({url}, '#', 1), '?', 1), '/'))
+    )
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "product_observations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("fingerprint", sa.Text(), nullable=False),
+        sa.Column("marketplace", sa.String(length=32), nullable=False),
+        sa.Column("url", sa.Text(), nullable=False),
+        sa.Column("title", sa.Text(), nullable=True),
+        sa.Column("image_url", sa.Text(), nullable=True),
+        sa.Column("last_price", sa.Numeric(12, 2), nullable=True),
+        sa.Column("currency", sa.String(length=8), nullable=True),
+        sa.Column("last_availability", sa.String(length=32), nullable=True),
+        sa.Column("last_scraped_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("next_run_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("lease_owner", sa.String(length=128), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.UniqueConstraint("fingerprint"),
+    )
+    op.create_index(
+        "ix_product_observations_due",
+        "product_observations",
+        ["next_run_at"],
+        postgresql_where=sa.text("next_run_at IS NOT NULL"),
+    )
+
+    op.add_column(
+        "tracked_products",
+        sa.Column(
+            "observation_id",
+            sa.Integer(),
+            sa.ForeignKey("product_observations.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_tracked_products_observation_id",
+        "tracked_products",
+        ["observation_id"],
+    )
+
+    op.execute(
+        f"""
+        INSERT INTO product_observations (fingerprint, marketplace, url)
+        SELECT DISTINCT ON (key) key, marketplace, url
+        FROM (
+            SELECT {OBSERVATION_KEY_SQL.format(url="url")} AS key, marketplace, url, id
+            FROM tracked_products
+        ) t
+        ORDER BY key, id
+        """
+    )
+    op.execute(
+        f"""
+        UPDATE tracked_products
+        SET observation_id = o.id
+        FROM product_observations o
+        WHERE o.fingerprint = {OBSERVATION_KEY_SQL.format(url="tracked_products.url")}
+        """
+    )
+    op.execute(
+        """
+        UPDATE product_observations o
+        SET last_scraped_at = s.last_scraped_at,
+            next_run_at = s.next_run_at
+        FROM (
+            SELECT observation_id,
+                   max(last_scraped_at) AS last_scraped_at,
+                   min(CASE WHEN last_scraped_at IS NULL THEN now()
+                            ELSE next_run_at END)
+                       FILTER (WHERE is_active) AS next_run_at
+            FROM tracked_products
+            WHERE observation_id IS NOT NULL
+            GROUP BY observation_id
+        ) s
+        WHERE s.observation_id = o.id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tracked_products_observation_id", table_name="tracked_products")
+    op.drop_column("tracked_products", "observation_id")
+    op.drop_index("ix_product_observations_due", table_name="product_observations")
+    op.drop_table("product_observations")
@@ -0,0 +1,49 @@
+"""tracked_products_schedule_timestamptz
+
+Revision ID: e5c19a7b3d20
+Revises: b83d2f6a1c57
+Create Date: 2026-10-19 20:41:05.613208
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5c19a7b3d20"
+down_revision: Union[str, Sequence[str], None] = "b83d2f6a1c57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ("last_scraped_at", "next_run_at")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The stored values are already UTC (3bdd5209d0fb); asyncpg refuses to
+    # bind aware datetimes to plain timestamp columns.
+    for name in COLUMNS:
+        op.alter_column(
+            "tracked_products",
+            name,
+            type_=sa.DateTime(timezone=True),
+            existing_type=sa.DateTime(),
+            existing_nullable=True,
+            postgresql_using=f"{name} AT TIME ZONE 'UTC'",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in COLUMNS:
+        op.alter_column(
+            "tracked_products",
+            name,
+            type_=sa.DateTime(),
+            existing_type=sa.DateTime(timezone=True),
+            existing_nullable=True,
+            postgresql_using=f"{name} AT TIME ZONE 'UTC'",
+        )
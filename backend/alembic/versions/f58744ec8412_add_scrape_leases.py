@@ -0,0 +1,37 @@
+"""add_scrape_leases
+
+Revision ID: f58744ec8412
+Revises: 72bee63f5d1f
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f58744ec8412"
+down_revision: Union[str, Sequence[str], None] = "72bee63f5d1f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "tracked_products",
+        sa.Column("lease_owner", sa.String(length=128), nullable=True),
+    )
+    op.add_column(
+        "tracked_products",
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("tracked_products", "lease_expires_at")
+    op.drop_column("tracked_products", "lease_owner")
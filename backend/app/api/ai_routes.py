@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
-from app.db.base import get_db
+from app.db.session import get_db
 from app.db.models.ai_insight import AIInsight
 from app.db.models.tracked_product import TrackedProduct
 from app.api.schemas.ai import AIInsightOut
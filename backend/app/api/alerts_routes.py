@@ -2,11 +2,12 @@ from __future__ import annotations
 
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, select
 import logging
 
-from app.db.session import get_db
+from app.db.session import get_db, get_async_db
 from app.db.models.price_event import PriceEvent
 
 router = APIRouter(prefix="/api/v1/alerts", tags=["alerts"])
@@ -18,18 +19,25 @@ class AckRequest(BaseModel):
 
 
 @router.get("/pending")
-def pending_alerts(
-    source: str = "extension", limit: int = 50, db: Session = Depends(get_db)
+async def pending_alerts(
+    source: str = "extension",
+    limit: int = 50,
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
         alerts = (
-            db.query(PriceEvent)
-            .filter(
-                PriceEvent.triggered.is_(True),
-                PriceEvent.acknowledged.is_(False),
+            (
+                await db.execute(
+                    select(PriceEvent)
+                    .where(
+                        PriceEvent.triggered.is_(True),
+                        PriceEvent.acknowledged.is_(False),
+                    )
+                    .order_by(desc(PriceEvent.triggered_at))
+                    .limit(limit)
+                )
             )
-            .order_by(desc(PriceEvent.triggered_at))
-            .limit(limit)
+            .scalars()
             .all()
         )
 
@@ -1,65 +1,79 @@
 from fastapi import APIRouter, Depends, HTTPException, Body
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, desc, case
+from sqlalchemy import func, desc, case, select
 from datetime import datetime, timedelta, timezone
+from typing import Literal
 from pydantic import BaseModel
-from app.db.session import get_db
+from app.db.session import get_db, get_async_db
 from app.db.models import TrackedProduct, PriceSnapshot, AIInsight
 from app.api.v1.schemas import (
     DashboardProductOut,
     ProductDetailOut,
     PricePoint,
 )
-from app.core.auth import get_current_user, set_user_context
+from app.core.auth import get_current_user, set_user_context, set_user_context_async
+from app.services.events import queue_schedule_changed
+from app.services.observations import pull_schedule
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
 
 @router.get("/products", response_model=list[DashboardProductOut])
-def list_dashboard_products(
+async def list_dashboard_products(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: str = Depends(get_current_user),
 ):
     try:
-        set_user_context(db, user_id)
+        await set_user_context_async(db, user_id)
         now = datetime.now(timezone.utc)
         since_24h = now - timedelta(hours=24)
 
         products = (
-            db.query(TrackedProduct)
-            .options(joinedload(TrackedProduct.snapshots))
-            .filter(TrackedProduct.is_active == True, TrackedProduct.user_id == user_id)
-            .order_by(desc(TrackedProduct.updated_at))
-            .offset(skip)
-            .limit(limit)
+            (
+                await db.execute(
+                    select(TrackedProduct)
+                    .where(
+                        TrackedProduct.is_active == True,
+                        TrackedProduct.user_id == user_id,
+                    )
+                    .order_by(desc(TrackedProduct.updated_at))
+                    .offset(skip)
+                    .limit(limit)
+                )
+            )
+            .scalars()
             .all()
         )
 
         if not products:
             return []
 
+        product_ids = [p.id for p in products]
+
         snapshot_stats = (
-            db.query(
-                PriceSnapshot.tracked_product_id,
-                func.count(PriceSnapshot.id).label("snapshots"),
-                func.min(PriceSnapshot.price).label("min_price"),
-                func.max(PriceSnapshot.price).label("max_price"),
-                func.min(PriceSnapshot.fetched_at).label("first_seen"),
-                func.max(PriceSnapshot.fetched_at).label("last_seen"),
+            await db.execute(
+                select(
+                    PriceSnapshot.tracked_product_id,
+                    func.count(PriceSnapshot.id).label("snapshots"),
+                    func.min(PriceSnapshot.price).label("min_price"),
+                    func.max(PriceSnapshot.price).label("max_price"),
+                    func.min(PriceSnapshot.fetched_at).label("first_seen"),
+                    func.max(PriceSnapshot.fetched_at).label("last_seen"),
+                )
+                .where(PriceSnapshot.tracked_product_id.in_(product_ids))
+                .group_by(PriceSnapshot.tracked_product_id)
             )
-            .filter(PriceSnapshot.tracked_product_id.in_([p.id for p in products]))
-            .group_by(PriceSnapshot.tracked_product_id)
-            .all()
-        )
+        ).all()
 
         stats_dict = {stat.tracked_product_id: stat for stat in snapshot_stats}
 
         last_prices = {}
         if products:
             last_price_subquery = (
-                db.query(
+                select(
                     PriceSnapshot.tracked_product_id,
                     PriceSnapshot.price,
                     func.row_number()
@@ -69,28 +83,28 @@ def list_dashboard_products(
                     )
                     .label("rn"),
                 )
-                .filter(
-                    PriceSnapshot.tracked_product_id.in_([p.id for p in products]),
+                .where(
+                    PriceSnapshot.tracked_product_id.in_(product_ids),
                     PriceSnapshot.price.isnot(None),
                 )
                 .subquery()
             )
 
             last_price_results = (
-                db.query(
-                    last_price_subquery.c.tracked_product_id,
-                    last_price_subquery.c.price,
+                await db.execute(
+                    select(
+                        last_price_subquery.c.tracked_product_id,
+                        last_price_subquery.c.price,
+                    ).where(last_price_subquery.c.rn == 1)
                 )
-                .filter(last_price_subquery.c.rn == 1)
-                .all()
-            )
+            ).all()
 
             last_prices = {pid: float(price) for pid, price in last_price_results}
 
         cutoff_prices = {}
         if products:
             cutoff_subquery = (
-                db.query(
+                select(
                     PriceSnapshot.tracked_product_id,
                     PriceSnapshot.price,
                     PriceSnapshot.fetched_at,
@@ -107,18 +121,20 @@ def list_dashboard_products(
                     )
                     .label("rn"),
                 )
-                .filter(
-                    PriceSnapshot.tracked_product_id.in_([p.id for p in products]),
+                .where(
+                    PriceSnapshot.tracked_product_id.in_(product_ids),
                     PriceSnapshot.price.isnot(None),
                 )
                 .subquery()
             )
 
             cutoff_results = (
-                db.query(cutoff_subquery.c.tracked_product_id, cutoff_subquery.c.price)
-                .filter(cutoff_subquery.c.rn == 1)
-                .all()
-            )
+                await db.execute(
+                    select(
+                        cutoff_subquery.c.tracked_product_id, cutoff_subquery.c.price
+                    ).where(cutoff_subquery.c.rn == 1)
+                )
+            ).all()
 
             cutoff_prices = {pid: float(price) for pid, price in cutoff_results}
 
@@ -171,6 +187,7 @@ def list_dashboard_products(
                     last_updated=last_seen,
                     change_24h=change_24h,
                     update_interval=product.update_interval or 1,
+                    interval_mode=product.interval_mode,
                     next_run_at=product.next_run_at,
                     last_availability=product.last_availability,
                 )
@@ -296,6 +313,7 @@ def deactivate_product(
             )
 
         product.is_active = False
+        queue_schedule_changed(db, product)
         db.commit()
 
         return {"status": "success", "id": product_id}
@@ -312,7 +330,8 @@ def deactivate_product(
 @router.patch("/products/{product_id}/interval")
 def update_product_interval(
     product_id: int,
-    update_interval: int = Body(..., ge=1, le=24, embed=True),
+    update_interval: int | None = Body(None, ge=1, le=24),
+    mode: Literal["manual", "auto"] = Body("manual"),
     db: Session = Depends(get_db),
     user_id: str = Depends(get_current_user),
 ):
@@ -335,6 +354,28 @@ def update_product_interval(
                 return dt.replace(tzinfo=timezone.utc)
             return dt
 
+        if mode == "auto":
+            product.interval_mode = "auto"
+            queue_schedule_changed(db, product)
+            db.commit()
+            db.refresh(product)
+
+            return {
+                "status": "success",
+                "id": product_id,
+                "mode": "auto",
+                "old_interval": product.update_interval,
+                "new_interval": product.update_interval,
+                "next_run_at": (
+                    product.next_run_at.isoformat() if product.next_run_at else None
+                ),
+            }
+
+        if update_interval is None:
+            raise HTTPException(
+                status_code=400, detail="update_interval is required in manual mode"
+            )
+
         if product.last_scraped_at and product.next_run_at:
             now = datetime.now(timezone.utc)
             next_run = ensure_utc(product.next_run_at)
@@ -351,6 +392,7 @@ def update_product_interval(
 
         old_interval = product.update_interval
         product.update_interval = update_interval
+        product.interval_mode = "manual"
 
         if product.last_scraped_at:
             last_scraped = ensure_utc(product.last_scraped_at)
@@ -359,6 +401,8 @@ def update_product_interval(
             product.next_run_at = datetime.now(timezone.utc) + timedelta(
                 hours=update_interval
             )
+        pull_schedule(db, product.observation_id, product.next_run_at)
+        queue_schedule_changed(db, product)
 
         db.commit()
         db.refresh(product)
@@ -366,6 +410,7 @@ def update_product_interval(
         return {
             "status": "success",
             "id": product_id,
+            "mode": "manual",
             "old_interval": old_interval,
             "new_interval": product.update_interval,
             "next_run_at": (
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.auth import get_current_user, set_user_context_async
+from app.core.config import settings
+from app.db.session import get_async_db
+from app.services.events import broker, format_sse, make_event
+from app.services.scrape_queue import pending_scrape_query
+
+router = APIRouter(prefix="/api/v1/events", tags=["events"])
+
+
+@router.get("/stream")
+async def event_stream(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user),
+):
+    # Replaces the extension's pending-scrape, sync-alarms and alerts polling:
+    # products already due are replayed on connect, everything else is pushed.
+    await set_user_context_async(db, user_id)
+    now = datetime.now(timezone.utc)
+    due = (await db.execute(pending_scrape_query(now, user_id))).scalars().all()
+    backlog = [
+        make_event(
+            user_id,
+            "product.due",
+            {"product_id": p.id, "url": p.url, "marketplace": p.marketplace},
+        )
+        for p in due
+    ]
+    await db.close()
+
+    queue = broker.subscribe(user_id)
+
+    async def stream():
+        try:
+            yield f"retry: {settings.EVENTS_HEARTBEAT_SECONDS * 1000}\n\n"
+            for evt in backlog:
+                yield format_sse(evt)
+            while not await request.is_disconnected():
+                try:
+                    evt = await asyncio.wait_for(
+                        queue.get(), timeout=settings.EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield format_sse(evt)
+        finally:
+            broker.unsubscribe(user_id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
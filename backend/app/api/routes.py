@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
@@ -11,9 +13,19 @@ from app.db.models.price_snapshot import PriceSnapshot
 from app.db.models.ai_insight import AIInsight
 from app.services.ai_engine import AIEngine
 from app.services.alerts import evaluate_alerts
+from app.marketplaces.registry import default_currency
 from app.services.canonicalize import canonicalize_url
-from app.db.session import get_db
-from app.core.auth import get_current_user, set_user_context
+from app.services.events import queue_schedule_changed
+from app.services.observations import observe
+from app.services.scheduling import apply_auto_interval
+from app.services.scrape_queue import (
+    claim_due_products,
+    complete_scrape,
+    pending_scrape_query,
+)
+from app.core.config import settings
+from app.db.session import get_db, get_async_db
+from app.core.auth import get_current_user, set_user_context, set_user_context_async
 from datetime import datetime, timedelta, timezone
 
 router = APIRouter(tags=["browser"])
@@ -32,13 +44,13 @@ class TrackRequest(BaseModel):
 
 
 @router.post("/track/browser")
-def track_from_browser(
+async def track_from_browser(
     payload: TrackRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: str = Depends(get_current_user),
 ):
     try:
-        set_user_context(db, user_id)
+        await set_user_context_async(db, user_id)
         clean_url = payload.url.split("?")[0].split("#")[0].rstrip("/")
         fingerprint = canonicalize_url(clean_url)
 
@@ -48,17 +60,23 @@ def track_from_browser(
             )
 
         price = None
-        currency = "USD"
+        currency = default_currency(clean_url) or "USD"
         if payload.price_raw:
             price, currency = normalize_price(payload.price_raw)
 
         product = (
-            db.query(TrackedProduct)
-            .filter(
-                TrackedProduct.user_id == user_id,
-                (TrackedProduct.canonical_url == fingerprint)
-                | (TrackedProduct.url == clean_url),
+            (
+                await db.execute(
+                    select(TrackedProduct)
+                    .where(
+                        TrackedProduct.user_id == user_id,
+                        (TrackedProduct.canonical_url == fingerprint)
+                        | (TrackedProduct.url == clean_url),
+                    )
+                    .limit(1)
+                )
             )
+            .scalars()
             .first()
         )
 
@@ -80,7 +98,7 @@ def track_from_browser(
                 user_id=user_id,
             )
             db.add(product)
-            db.flush()
+            await db.flush()
         else:
             previous_availability = product.last_availability
 
@@ -105,12 +123,26 @@ def track_from_browser(
             fetched_at=datetime.now(timezone.utc),
         )
         db.add(snapshot)
-        db.flush()
+        await db.flush()
+
+        await db.run_sync(
+            lambda sync_db: observe(
+                sync_db,
+                product,
+                price=price,
+                currency=currency,
+                availability=payload.availability,
+                title=payload.title,
+                image_url=payload.image_url,
+            )
+        )
 
         ai_result = None
         if payload.availability == "in_stock":
             try:
-                ai_result = engine.compute_for_product(db, product_id=product.id)
+                ai_result = await db.run_sync(
+                    engine.compute_for_product, product_id=product.id
+                )
 
                 insight = AIInsight(
                     product_id=product.id,
@@ -133,18 +165,22 @@ def track_from_browser(
                     created_at=datetime.now(timezone.utc),
                 )
                 db.add(insight)
+                await db.run_sync(apply_auto_interval, product, ai_result)
             except Exception as e:
                 # print(f"[DEBUG] [TRACK] AI insight failed: {e}")
                 pass
 
         try:
-            evaluate_alerts(snapshot=snapshot, db=db)
+            await db.run_sync(
+                lambda sync_db: evaluate_alerts(snapshot=snapshot, db=sync_db)
+            )
         except Exception as e:
             # print(f"[DEBUG] [TRACK] Warning: Alert evaluation failed: {e}")
             pass
 
-        db.commit()
-        db.refresh(product)
+        queue_schedule_changed(db, product)
+        await db.commit()
+        await db.refresh(product)
 
         availability_changed = (
             previous_availability is not None
@@ -177,16 +213,22 @@ def track_from_browser(
     except HTTPException:
         raise
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
 
         try:
             product = (
-                db.query(TrackedProduct)
-                .filter(
-                    TrackedProduct.user_id == user_id,
-                    (TrackedProduct.canonical_url == fingerprint)
-                    | (TrackedProduct.url == clean_url),
+                (
+                    await db.execute(
+                        select(TrackedProduct)
+                        .where(
+                            TrackedProduct.user_id == user_id,
+                            (TrackedProduct.canonical_url == fingerprint)
+                            | (TrackedProduct.url == clean_url),
+                        )
+                        .limit(1)
+                    )
                 )
+                .scalars()
                 .first()
             )
 
@@ -204,14 +246,14 @@ def track_from_browser(
                     fetched_at=datetime.now(timezone.utc),
                 )
                 db.add(snapshot)
-                db.commit()
-                db.refresh(product)
+                await db.commit()
+                await db.refresh(product)
 
                 ai_result = None
                 if payload.availability == "in_stock":
                     try:
-                        ai_result = engine.compute_for_product(
-                            db, product_id=product.id
+                        ai_result = await db.run_sync(
+                            engine.compute_for_product, product_id=product.id
                         )
                     except Exception:
                         pass
@@ -252,34 +294,28 @@ def track_from_browser(
             )
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500, detail=f"Failed to track product: {str(e)}"
         )
 
 
 @router.get("/products/pending-scrape")
-def get_pending_scrape_products(
+async def get_pending_scrape_products(
     force: bool = False,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: str = Depends(get_current_user),
 ):
     try:
-        set_user_context(db, user_id)
+        await set_user_context_async(db, user_id)
         now = datetime.now(timezone.utc)
 
-        query = db.query(TrackedProduct).filter(
-            TrackedProduct.is_active == True, TrackedProduct.user_id == user_id
+        products = (
+            (await db.execute(pending_scrape_query(now, user_id, force=force)))
+            .scalars()
+            .all()
         )
 
-        if force:
-            products = query.all()
-        else:
-            products = query.filter(
-                (TrackedProduct.last_scraped_at.is_(None))
-                | (TrackedProduct.next_run_at <= now)
-            ).all()
-
         pending_products = [
             {
                 "id": product.id,
@@ -306,6 +342,61 @@ def get_pending_scrape_products(
         )
 
 
+class ClaimScrapeRequest(BaseModel):
+    limit: int = Field(5, ge=1, le=50)
+    lease_seconds: int = Field(settings.SCRAPE_LEASE_SECONDS, ge=30, le=3600)
+    claimer: str | None = Field(None, max_length=64)
+
+
+@router.post("/products/claim-scrape")
+async def claim_scrape_products(
+    payload: ClaimScrapeRequest,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: str = Depends(get_current_user),
+):
+    try:
+        await set_user_context_async(db, user_id)
+        owner = f"user:{user_id}:{payload.claimer or 'extension'}"
+
+        products = await db.run_sync(
+            lambda sync_db: claim_due_products(
+                sync_db,
+                owner=owner,
+                limit=payload.limit,
+                lease_seconds=payload.lease_seconds,
+                user_id=user_id,
+            )
+        )
+        await db.commit()
+
+        claimed = [
+            {
+                "id": product.id,
+                "url": product.url,
+                "marketplace": product.marketplace,
+                "interval_hours": product.update_interval or 24,
+                "last_scraped": (
+                    product.last_scraped_at.isoformat()
+                    if product.last_scraped_at
+                    else None
+                ),
+                "next_run_at": (
+                    product.next_run_at.isoformat() if product.next_run_at else None
+                ),
+                "lease_expires_at": product.lease_expires_at.isoformat(),
+            }
+            for product in products
+        ]
+
+        return {"count": len(claimed), "products": claimed}
+
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=500, detail=f"Failed to claim products: {str(e)}"
+        )
+
+
 class RecordScrapeRequest(BaseModel):
     price: float | None = None
     availability: str = "in_stock"
@@ -332,9 +423,7 @@ def record_scrape_completion(
 
         previous_availability = product.last_availability
 
-        product.last_scraped_at = datetime.now(timezone.utc)
-        target_hours = product.update_interval or 24
-        product.next_run_at = datetime.now(timezone.utc) + timedelta(hours=target_hours)
+        complete_scrape(product)
         product.last_availability = payload.availability
 
         new_snapshot = PriceSnapshot(
@@ -346,16 +435,25 @@ def record_scrape_completion(
             source="background_job",
         )
         db.add(new_snapshot)
+        observe(
+            db,
+            product,
+            price=payload.price,
+            currency=product.currency,
+            availability=payload.availability,
+        )
 
         ai_result = None
         if payload.availability == "in_stock":
             try:
                 ai_result = engine.compute_for_product(db, product_id=product.id)
+                apply_auto_interval(db, product, ai_result)
                 # TODO: Create AIInsight record
             except Exception as e:
                 # print(f"[DEBUG] [SCRAPE] Warning: AI insight failed: {e}")
                 pass
 
+        queue_schedule_changed(db, product)
         db.commit()
         db.refresh(product)
 
@@ -21,6 +21,7 @@ class DashboardProductOut(BaseModel):
     next_run_at: Optional[datetime] = None
     change_24h: Optional[float] = None
     update_interval: int | None = None
+    interval_mode: str = "manual"
     last_availability: str = "in_stock"
 
 
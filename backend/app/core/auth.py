@@ -1,10 +1,18 @@
 from fastapi import Depends, HTTPException, Header
 from supabase import Client
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+import json
 import os
+import time
 import jwt
 from typing import Optional
 
+from app.core.metrics import REGISTRY
+from app.core.token_cache import VerifiedTokenCache
+from app.db.session import RLS_APPLIED_KEY, RLS_USER_KEY
+
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
@@ -14,6 +22,32 @@ if not SUPABASE_URL:
 if not SUPABASE_SERVICE_KEY and not SUPABASE_ANON_KEY:
     raise ValueError("Neither SUPABASE_SERVICE_ROLE_KEY nor SUPABASE_ANON_KEY is set")
 
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+JWT_JWKS_FILE = os.getenv("JWT_JWKS_FILE")
+JWT_AUDIENCE = os.getenv("JWT_AUDIENCE", "authenticated") or None
+JWT_LEEWAY_SECONDS = int(os.getenv("JWT_LEEWAY_SECONDS", "10"))
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+
+if not SUPABASE_JWT_SECRET and not JWT_JWKS_FILE:
+    raise ValueError("Neither SUPABASE_JWT_SECRET nor JWT_JWKS_FILE is set")
+
+
+def _load_jwks(path: str) -> dict[str | None, jwt.PyJWK]:
+    with open(path) as f:
+        jwk_set = jwt.PyJWKSet.from_dict(json.load(f))
+    return {key.key_id: key for key in jwk_set.keys}
+
+
+_jwks = _load_jwks(JWT_JWKS_FILE) if JWT_JWKS_FILE else {}
+_token_cache = VerifiedTokenCache(maxsize=JWT_CACHE_SIZE)
+
+TOKEN_VERIFY_SECONDS = REGISTRY.histogram(
+    "auth_token_verify_seconds",
+    "Signature verification time for tokens not found in the cache, by outcome.",
+    ["outcome"],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+
 _supabase_client: Optional[Client] = None
 
 
@@ -40,20 +74,59 @@ def get_supabase_client() -> Client:
     return _supabase_client
 
 
-def verify_token(authorization: str = Header(None)) -> str:
+def _decode_verified(token: str) -> dict:
+    if _jwks:
+        kid = jwt.get_unverified_header(token).get("kid")
+        jwk = _jwks.get(kid) or (next(iter(_jwks.values())) if len(_jwks) == 1 else None)
+        if jwk is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key: {kid}")
+        key, algorithms = jwk.key, [jwk.algorithm_name]
+    else:
+        key, algorithms = SUPABASE_JWT_SECRET, ["HS256"]
+
+    return jwt.decode(
+        token,
+        key,
+        algorithms=algorithms,
+        audience=JWT_AUDIENCE,
+        leeway=JWT_LEEWAY_SECONDS,
+        options={"require": ["exp", "sub"]},
+    )
+
+
+async def verify_token(authorization: str = Header(None)) -> str:
     if not authorization:
         raise HTTPException(status_code=401, detail="Missing authorization header")
 
+    token = authorization.replace("Bearer ", "").strip()
+
+    # The extension reuses one access token for its whole session; only the
+    # first call pays for signature verification.
+    user_id = _token_cache.get(token)
+    if user_id is not None:
+        return user_id
+
     try:
-        token = authorization.replace("Bearer ", "").strip()
-        decoded = jwt.decode(token, options={"verify_signature": False})
+        start = time.perf_counter()
+        outcome = "rejected"
+        try:
+            decoded = _decode_verified(token)
+            outcome = "valid"
+        finally:
+            # Rejections are timed too: a flood of bad tokens costs as much.
+            TOKEN_VERIFY_SECONDS.observe(
+                time.perf_counter() - start, outcome=outcome
+            )
 
         user_id = decoded.get("sub")
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token: no user ID")
 
+        _token_cache.put(token, user_id, float(decoded["exp"]))
         return user_id
 
+    except HTTPException:
+        raise
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError as e:
@@ -62,16 +135,30 @@ def verify_token(authorization: str = Header(None)) -> str:
         raise HTTPException(status_code=401, detail=f"Authentication failed: {str(e)}")
 
 
-def get_current_user(user_id: str = Depends(verify_token)) -> str:
+async def get_current_user(user_id: str = Depends(verify_token)) -> str:
     return user_id
 
 
 def set_user_context(db: Session, user_id: str):
-    try:
-        from sqlalchemy import text
-
+    # Deferred: the after_begin hook in app.db.session applies it on the first
+    # real statement, so early exits never check out a connection. Only a
+    # transaction that already connected under another user is updated here.
+    user_id = str(user_id)
+    db.info[RLS_USER_KEY] = user_id
+    if db.info.get(RLS_APPLIED_KEY, user_id) != user_id:
         db.execute(
-            text("SET LOCAL app.current_user_id = :user_id"), {"user_id": user_id}
+            text("SELECT set_config('app.current_user_id', :user_id, true)"),
+            {"user_id": user_id},
         )
-    except Exception as e:
-        pass
+        db.info[RLS_APPLIED_KEY] = user_id
+
+
+async def set_user_context_async(db: AsyncSession, user_id: str):
+    user_id = str(user_id)
+    db.info[RLS_USER_KEY] = user_id
+    if db.info.get(RLS_APPLIED_KEY, user_id) != user_id:
+        await db.execute(
+            text("SELECT set_config('app.current_user_id', :user_id, true)"),
+            {"user_id": user_id},
+        )
+        db.info[RLS_APPLIED_KEY] = user_id
@@ -7,5 +7,174 @@ class Settings:
         "postgresql+psycopg2://quickbasket:secret@db:5432/quickbasket",
     )
 
+    DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+
+    # Connections one process may hold, split between the sync pool (jobs,
+    # the monitor and the remaining sync routes) and the async pool (hot API
+    # routes) by DB_ASYNC_POOL_SHARE. Each pool keeps a third of its part open
+    # (at least one) and opens the rest as overflow under load. Size
+    # DB_POOL_BUDGET so that it times the process count fits under the
+    # server's max_connections.
+    DB_POOL_BUDGET = int(os.getenv("DB_POOL_BUDGET", "30"))
+    DB_ASYNC_POOL_SHARE = float(os.getenv("DB_ASYNC_POOL_SHARE", "0.5"))
+    DB_ASYNC_POOL_SIZE = max(1, round(DB_POOL_BUDGET * DB_ASYNC_POOL_SHARE) // 3)
+    DB_ASYNC_MAX_OVERFLOW = max(
+        0, round(DB_POOL_BUDGET * DB_ASYNC_POOL_SHARE) - DB_ASYNC_POOL_SIZE
+    )
+    DB_POOL_SIZE = max(
+        1, (DB_POOL_BUDGET - DB_ASYNC_POOL_SIZE - DB_ASYNC_MAX_OVERFLOW) // 3
+    )
+    DB_MAX_OVERFLOW = max(
+        0,
+        DB_POOL_BUDGET - DB_ASYNC_POOL_SIZE - DB_ASYNC_MAX_OVERFLOW - DB_POOL_SIZE,
+    )
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "300"))
+    DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+
+    # Per-request query accounting: warn when a request runs more statements
+    # than the budget, or repeats one statement shape this many times (N+1).
+    DB_STATEMENT_BUDGET = int(os.getenv("DB_STATEMENT_BUDGET", "15"))
+    DB_REPEATED_STATEMENT_THRESHOLD = int(
+        os.getenv("DB_REPEATED_STATEMENT_THRESHOLD", "5")
+    )
+
+    # Scrape work queue: how long a claimed product stays reserved before it
+    # returns to the queue, and how many the monitor claims per round trip.
+    SCRAPE_LEASE_SECONDS = int(os.getenv("SCRAPE_LEASE_SECONDS", "600"))
+    MONITOR_CLAIM_BATCH = int(os.getenv("MONITOR_CLAIM_BATCH", "50"))
+
+    # "auto" interval mode: bounds, the share of scrapes that should observe a
+    # price change, how strongly AIEngine volatility shortens the interval, and
+    # the per-user ceiling on auto-scheduled scrapes per day.
+    AUTO_INTERVAL_MIN_HOURS = int(os.getenv("AUTO_INTERVAL_MIN_HOURS", "1"))
+    AUTO_INTERVAL_MAX_HOURS = int(os.getenv("AUTO_INTERVAL_MAX_HOURS", "48"))
+    AUTO_TARGET_CHANGE_RATE = float(os.getenv("AUTO_TARGET_CHANGE_RATE", "0.5"))
+    AUTO_VOLATILITY_WEIGHT = float(os.getenv("AUTO_VOLATILITY_WEIGHT", "4.0"))
+    AUTO_SCRAPE_BUDGET_PER_USER_DAY = int(
+        os.getenv("AUTO_SCRAPE_BUDGET_PER_USER_DAY", "200")
+    )
+
+    # A shared observation scraped this recently (e.g. by another user's
+    # extension) is fanned out to its subscribers without fetching again.
+    OBSERVATION_REUSE_SECONDS = int(os.getenv("OBSERVATION_REUSE_SECONDS", "900"))
+
+    # Server-sent events. With more than one API worker (or a separate monitor
+    # process) events must go through Postgres NOTIFY to reach every stream.
+    # The alert index (ALERT_INDEX_LISTEN below) LISTENs whatever this says;
+    # either way each API, monitor and worker process then holds one direct
+    # connection for LISTEN, which a transaction-mode pooler can't serve.
+    EVENTS_PG_NOTIFY = os.getenv("EVENTS_PG_NOTIFY", "false").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+    EVENTS_HEARTBEAT_SECONDS = int(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+
+    # Monitor scheduler daemon (app/services/scheduler.py). Run it either
+    # inside the API process or as `python -m app.jobs.monitor_prices`.
+    SCHEDULER_EMBEDDED = os.getenv("SCHEDULER_EMBEDDED", "false").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    SCHEDULER_CONCURRENCY = int(os.getenv("SCHEDULER_CONCURRENCY", "8"))
+    SCHEDULER_MARKETPLACE_QUOTAS = os.getenv(
+        "SCHEDULER_MARKETPLACE_QUOTAS", "amazon=4,noon=4"
+    )
+    SCHEDULER_HORIZON_SECONDS = int(os.getenv("SCHEDULER_HORIZON_SECONDS", "600"))
+    SCHEDULER_LOAD_BATCH = int(os.getenv("SCHEDULER_LOAD_BATCH", "500"))
+    SCHEDULER_SHUTDOWN_GRACE_SECONDS = int(
+        os.getenv("SCHEDULER_SHUTDOWN_GRACE_SECONDS", "30")
+    )
+
+
+    # Marketplace HTTP clients, one pool per adapter.
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+    HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+
+    # One-shot monitor cycle pipeline and per-marketplace request rates
+    # ("name=requests_per_second:burst"), shared with the scheduler.
+    MONITOR_FETCH_CONCURRENCY = int(os.getenv("MONITOR_FETCH_CONCURRENCY", "16"))
+    MONITOR_PARSE_WORKERS = int(os.getenv("MONITOR_PARSE_WORKERS", "2"))
+    MONITOR_QUEUE_SIZE = int(os.getenv("MONITOR_QUEUE_SIZE", "100"))
+    MONITOR_PERSIST_BATCH = int(os.getenv("MONITOR_PERSIST_BATCH", "100"))
+    MONITOR_STATS_INTERVAL_SECONDS = float(
+        os.getenv("MONITOR_STATS_INTERVAL_SECONDS", "10")
+    )
+    MARKETPLACE_RATE_LIMITS = os.getenv(
+        "MARKETPLACE_RATE_LIMITS", "amazon=2:5,noon=2:5"
+    )
+
+    # Sharded monitor workers (monitor_prices --sharded): observations are
+    # split into MONITOR_SHARDS partitions by id, owned through advisory locks
+    # and rebalanced every MONITOR_SHARD_REBALANCE_SECONDS.
+    MONITOR_SHARDS = int(os.getenv("MONITOR_SHARDS", "64"))
+    MONITOR_SHARD_REBALANCE_SECONDS = float(
+        os.getenv("MONITOR_SHARD_REBALANCE_SECONDS", "15")
+    )
+    MONITOR_WORKER_IDLE_SECONDS = float(
+        os.getenv("MONITOR_WORKER_IDLE_SECONDS", "30")
+    )
+
+
+    # Page extraction: "fast" (targeted regex scan) or "bs4" (full DOM), plus
+    # "json" (embedded page state) for noon, run in a process pool of
+    # PARSE_POOL_WORKERS (0 = a thread in this process).
+    AMAZON_PARSER = os.getenv("AMAZON_PARSER", "fast")
+    NOON_PARSER = os.getenv("NOON_PARSER", "json")
+    PARSE_POOL_WORKERS = int(os.getenv("PARSE_POOL_WORKERS", "2"))
+
+    # With the fast parser, read product pages as a stream and close the
+    # connection once title and price are found or FETCH_BYTE_BUDGET is spent.
+    STREAMING_FETCH = os.getenv("STREAMING_FETCH", "true").lower() == "true"
+    FETCH_BYTE_BUDGET = int(os.getenv("FETCH_BYTE_BUDGET", str(1536 * 1024)))
+
+    # Per-URL ETag/Last-Modified and extracted-field hashes, LRU-bounded and
+    # saved to PAGE_CACHE_PATH between monitor runs (empty = memory only).
+    PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", "50000"))
+    PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", ".cache/page_cache.json")
+
+    # Per-marketplace circuit breaker: opens when CIRCUIT_ERROR_RATE of at
+    # least CIRCUIT_MIN_REQUESTS fetches in the window failed (429/5xx,
+    # timeouts, captchas); the cool-down doubles per failed probe. Fetch
+    # concurrency adapts (AIMD) between 1 and CIRCUIT_MAX_CONCURRENCY.
+    CIRCUIT_WINDOW_SECONDS = int(os.getenv("CIRCUIT_WINDOW_SECONDS", "60"))
+    CIRCUIT_MIN_REQUESTS = int(os.getenv("CIRCUIT_MIN_REQUESTS", "10"))
+    CIRCUIT_ERROR_RATE = float(os.getenv("CIRCUIT_ERROR_RATE", "0.5"))
+    CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+    CIRCUIT_MAX_OPEN_SECONDS = float(os.getenv("CIRCUIT_MAX_OPEN_SECONDS", "600"))
+    CIRCUIT_HALF_OPEN_PROBES = int(os.getenv("CIRCUIT_HALF_OPEN_PROBES", "1"))
+    CIRCUIT_MAX_CONCURRENCY = int(os.getenv("CIRCUIT_MAX_CONCURRENCY", "16"))
+
+
+    # Outbound proxies for marketplace fetches, comma-separated (the older
+    # single OUTBOUND_PROXY still works). Each takes PROXY_MAX_CONCURRENCY
+    # requests at a time; PROXY_MAX_FAILURES failures in a row cool it down
+    # (doubling each time) and PROXY_EVICT_AFTER cool-downs in a row drop it
+    # (0 = never).
+    OUTBOUND_PROXIES = os.getenv("OUTBOUND_PROXIES") or os.getenv(
+        "OUTBOUND_PROXY", ""
+    )
+    PROXY_MAX_CONCURRENCY = int(os.getenv("PROXY_MAX_CONCURRENCY", "8"))
+    PROXY_MAX_FAILURES = int(os.getenv("PROXY_MAX_FAILURES", "3"))
+    PROXY_COOLDOWN_SECONDS = float(os.getenv("PROXY_COOLDOWN_SECONDS", "30"))
+    PROXY_EVICT_AFTER = int(os.getenv("PROXY_EVICT_AFTER", "5"))
+
+    # In-process index of untriggered alert targets, per tracked product. It
+    # is only used while this process LISTENs on the alerts channel, which a
+    # price_events trigger notifies on every write; the TTL is a backstop.
+    # Turn the listener off where DATABASE_URL can't LISTEN (every check then
+    # queries the targets).
+    ALERT_INDEX_LISTEN = os.getenv("ALERT_INDEX_LISTEN", "true").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    ALERT_INDEX_TTL_SECONDS = float(os.getenv("ALERT_INDEX_TTL_SECONDS", "300"))
+    ALERT_INDEX_MAX_PRODUCTS = int(os.getenv("ALERT_INDEX_MAX_PRODUCTS", "100000"))
 
 settings = Settings()
@@ -0,0 +1,56 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.metrics import REGISTRY
+
+TOKEN_CACHE_LOOKUPS = REGISTRY.counter(
+    "auth_token_cache_lookups_total", "Verified-token cache lookups.", ["result"]
+)
+TOKEN_CACHE_SIZE = REGISTRY.gauge(
+    "auth_token_cache_entries", "Entries held in the verified-token cache."
+)
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of already-verified JWTs, keyed by token hash, honoring exp."""
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        TOKEN_CACHE_SIZE.set_function(lambda: {(): len(self._entries)})
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        # Never keep raw bearer tokens in memory longer than the request.
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> str | None:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                user_id, exp = entry
+                if exp > time.time():
+                    self._entries.move_to_end(key)
+                    TOKEN_CACHE_LOOKUPS.inc(result="hit")
+                    return user_id
+                del self._entries[key]
+        TOKEN_CACHE_LOOKUPS.inc(result="miss")
+        return None
+
+    def put(self, token: str, user_id: str, exp: float):
+        if self.maxsize <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (user_id, exp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
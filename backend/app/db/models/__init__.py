@@ -1,16 +1,21 @@
-from app.db.base import Base, engine, SessionLocal, get_db
+from app.db.base import Base
+from app.db.session import engine, SessionLocal, get_db
 from app.db.models.user import User
 from app.db.models.tracked_product import TrackedProduct
 from app.db.models.price_snapshot import PriceSnapshot
+from app.db.models.price_change import PriceChange
 from app.db.models.price_event import PriceEvent
 from app.db.models.ai_insight import AIInsight
+from app.db.models.product_observation import ProductObservation
 
 __all__ = [
     "Base",
     "User",
     "TrackedProduct",
     "PriceSnapshot",
+    "PriceChange",
     "PriceEvent",
     "AIInsight",
+    "ProductObservation",
     "get_db",
 ]
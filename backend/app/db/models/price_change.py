@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Numeric, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class PriceChange(Base):
+    # Written by the monitor when a scrape moves a subscriber's price away from
+    # its previous snapshot; one row per subscriber per change.
+    __tablename__ = "price_changes"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    tracked_product_id: Mapped[int] = mapped_column(
+        ForeignKey("tracked_products.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    observation_id: Mapped[int | None] = mapped_column(
+        ForeignKey("product_observations.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+
+    old_price: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False)
+    new_price: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False)
+    currency: Mapped[str] = mapped_column(String(8), nullable=False)
+    direction: Mapped[str] = mapped_column(String(8), nullable=False)
+
+    changed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+
+
+Index(
+    "ix_price_changes_product_changed",
+    PriceChange.tracked_product_id,
+    PriceChange.changed_at.desc(),
+)
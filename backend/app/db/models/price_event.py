@@ -7,6 +7,8 @@ from sqlalchemy import (
     Numeric,
     ForeignKey,
     Text,
+    Index,
+    text,
 )
 from sqlalchemy.sql import func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -40,3 +42,16 @@ class PriceEvent(Base):
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
+
+
+Index(
+    "ix_price_events_pending",
+    PriceEvent.triggered_at.desc(),
+    postgresql_where=text("triggered AND NOT acknowledged"),
+)
+
+Index(
+    "ix_price_events_product_pending",
+    PriceEvent.product_id,
+    postgresql_where=text("NOT triggered"),
+)
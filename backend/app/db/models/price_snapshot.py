@@ -1,4 +1,4 @@
-from sqlalchemy import DateTime, func, ForeignKey, Numeric, String, Text
+from sqlalchemy import DateTime, func, ForeignKey, Index, Numeric, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.base import Base
 
@@ -11,7 +11,6 @@ class PriceSnapshot(Base):
     tracked_product_id: Mapped[int] = mapped_column(
         ForeignKey("tracked_products.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
 
     price: Mapped[float | None] = mapped_column(Numeric(12, 2), nullable=True)
@@ -28,3 +27,10 @@ class PriceSnapshot(Base):
     )
 
     product = relationship("TrackedProduct", back_populates="snapshots")
+
+
+Index(
+    "ix_price_snapshots_product_fetched",
+    PriceSnapshot.tracked_product_id,
+    PriceSnapshot.fetched_at.desc(),
+)
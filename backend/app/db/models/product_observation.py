@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Numeric, String, Text, func, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db.base import Base
+
+
+class ProductObservation(Base):
+    # One row per distinct marketplace product (see observation_key), shared by
+    # every user's TrackedProduct for it, so a scrape happens once per product
+    # rather than once per subscription.
+    __tablename__ = "product_observations"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(Text, nullable=False, unique=True)
+
+    marketplace: Mapped[str] = mapped_column(String(32), nullable=False)
+    url: Mapped[str] = mapped_column(Text, nullable=False)
+
+    title: Mapped[str | None] = mapped_column(Text, nullable=True)
+    image_url: Mapped[str | None] = mapped_column(Text, nullable=True)
+    last_price: Mapped[float | None] = mapped_column(Numeric(12, 2), nullable=True)
+    currency: Mapped[str | None] = mapped_column(String(8), nullable=True)
+    last_availability: Mapped[str | None] = mapped_column(String(32), nullable=True)
+
+    last_scraped_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # min(next_run_at) over active subscribers; NULL when nobody is subscribed.
+    next_run_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    lease_owner: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    subscribers = relationship("TrackedProduct", back_populates="observation")
+
+
+Index(
+    "ix_product_observations_due",
+    ProductObservation.next_run_at,
+    postgresql_where=text("next_run_at IS NOT NULL"),
+)
@@ -7,6 +7,8 @@ from sqlalchemy import (
     Text,
     Integer,
     Column,
+    Index,
+    text,
 )
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -51,8 +53,26 @@ class TrackedProduct(Base):
     )
 
     update_interval = Column(Integer, default=24)
-    last_scraped_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
-    next_run_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    observation_id: Mapped[int | None] = mapped_column(
+        ForeignKey("product_observations.id", ondelete="SET NULL"),
+        nullable=True,
+        index=True,
+    )
+
+    interval_mode: Mapped[str] = mapped_column(
+        String(16), nullable=False, default="manual", server_default="manual"
+    )
+    last_scraped_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    next_run_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    lease_owner: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
 
     snapshots = relationship(
         "PriceSnapshot", back_populates="product", cascade="all, delete-orphan"
@@ -60,9 +80,23 @@ class TrackedProduct(Base):
     events = relationship(
         "PriceEvent", back_populates="product", cascade="all, delete-orphan"
     )
+    observation = relationship("ProductObservation", back_populates="subscribers")
     ai_insights = relationship(
         "AIInsight",
         back_populates="product",
         cascade="all, delete-orphan",
         passive_deletes=True,
     )
+
+
+Index(
+    "ix_tracked_products_user_due",
+    TrackedProduct.user_id,
+    TrackedProduct.next_run_at,
+    postgresql_where=text("is_active"),
+)
+Index(
+    "ix_tracked_products_due",
+    TrackedProduct.next_run_at.asc().nulls_first(),
+    postgresql_where=text("is_active"),
+)
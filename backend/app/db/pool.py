@@ -0,0 +1,81 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.metrics import REGISTRY
+
+POOL_CHECKOUT_WAIT = REGISTRY.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection (includes connect on a miss).",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+POOL_CHECKOUT_TIMEOUTS = REGISTRY.counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after DB_POOL_TIMEOUT.",
+    ["pool"],
+)
+POOL_CONNECTS = REGISTRY.counter(
+    "db_pool_connects_total", "New DBAPI connections opened.", ["pool"]
+)
+POOL_STATE = REGISTRY.gauge(
+    "db_pool_connections",
+    "Pool connections by state (in_use, idle, overflow, size).",
+    ["pool", "state"],
+)
+
+
+class _TimedCheckoutMixin:
+    metrics_label = "default"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.inc(pool=self.metrics_label)
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(
+                time.perf_counter() - start, pool=self.metrics_label
+            )
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep it reporting under the same label.
+        new_pool = super().recreate()
+        new_pool.metrics_label = self.metrics_label
+        return new_pool
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_pool(engine, label: str):
+    """Attach checkout/connect metrics to ``engine`` (a sync Engine)."""
+    engine.pool.metrics_label = label
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        POOL_CONNECTS.inc(pool=label)
+
+    def _state():
+        # Read engine.pool at scrape time so a disposed/recreated pool is picked up.
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            return {}
+        return {
+            (label, "in_use"): pool.checkedout(),
+            (label, "idle"): pool.checkedin(),
+            (label, "overflow"): max(pool.overflow(), 0),
+            (label, "size"): pool.size(),
+        }
+
+    POOL_STATE.set_function(_state)
+    return engine
@@ -0,0 +1,85 @@
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from sqlalchemy import event
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_BIND_PARAM = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    # Collapse literals, bind params and IN-lists so the same query shape with
+    # different values (the N+1 signature) maps to one key.
+    s = _STRING_LITERAL.sub("?", statement)
+    s = _BIND_PARAM.sub("?", s)
+    s = _NUMBER_LITERAL.sub("?", s)
+    s = _PARAM_LIST.sub("(?...)", s)
+    return _WHITESPACE.sub(" ", s).strip()
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_fingerprint: str | None = None
+    by_fingerprint: dict[str, int] = field(default_factory=dict)
+
+    def record(self, statement: str, elapsed: float):
+        fp = fingerprint(statement)
+        self.count += 1
+        self.total_seconds += elapsed
+        self.by_fingerprint[fp] = self.by_fingerprint.get(fp, 0) + 1
+        if elapsed >= self.slowest_seconds:
+            self.slowest_seconds = elapsed
+            self.slowest_fingerprint = fp
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [(fp, n) for fp, n in self.by_fingerprint.items() if n >= threshold]
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def begin():
+    return _current.set(QueryStats())
+
+
+def end(token) -> QueryStats | None:
+    stats = _current.get()
+    _current.reset(token)
+    return stats
+
+
+def current() -> QueryStats | None:
+    return _current.get()
+
+
+def instrument_engine(engine):
+    """Record per-statement timing into the active QueryStats, if any."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+    return engine
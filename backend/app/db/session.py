@@ -1,32 +1,133 @@
-import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import QueuePool
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
+from app.core.metrics import REGISTRY, route_label
+from app.db.pool import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    instrument_pool,
+)
+from app.db.query_stats import instrument_engine
+
+
+def to_async_url(url: str) -> str:
+    # Same database, asyncpg driver: hot API endpoints await I/O instead of
+    # parking a threadpool worker on a blocking psycopg2 call.
+    scheme, sep, rest = url.partition("://")
+    return f"postgresql+asyncpg{sep}{rest}" if scheme.startswith("postgres") else url
+
+
+def build_engine(url: str | None = None, *, pool_label: str = "sync", **overrides):
+    options = dict(
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+        pool_recycle=settings.DB_POOL_RECYCLE,  # recycle before server-side idle timeouts
+        connect_args={
+            "connect_timeout": settings.DB_CONNECT_TIMEOUT,
+            "keepalives": 1,
+            "keepalives_idle": 30,
+        },
+    )
+    options.update(overrides)
+    engine = create_engine(url or settings.DATABASE_URL, **options)
+    instrument_pool(engine, pool_label)
+    return instrument_engine(engine)
+
 
-SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
-
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    poolclass=QueuePool,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,
-    pool_recycle=300,  # 5 mins enoguh to recycle connections to handle server-side timeouts
-    connect_args={
-        "connect_timeout": 10,
-        "keepalives": 1,
-        "keepalives_idle": 30,
-    },
+def build_async_engine(
+    url: str | None = None, *, pool_label: str = "async", **overrides
+):
+    options = dict(
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.DB_ASYNC_POOL_SIZE,
+        max_overflow=settings.DB_ASYNC_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        connect_args={"timeout": settings.DB_CONNECT_TIMEOUT},
+    )
+    options.update(overrides)
+    async_engine = create_async_engine(
+        to_async_url(url or settings.DATABASE_URL), **options
+    )
+    instrument_pool(async_engine.sync_engine, pool_label)
+    instrument_engine(async_engine.sync_engine)
+    return async_engine
+
+
+RLS_USER_KEY = "rls_user_id"
+# The user set_config'd on the current transaction's connection; absent until
+# the session connects, so the after_begin hook is the one that applies it.
+RLS_APPLIED_KEY = "rls_applied_user_id"
+
+# used="false" counts the requests that never checked out a connection now
+# that checkout and the RLS context are deferred to the first statement.
+DB_SESSIONS = REGISTRY.counter(
+    "db_request_sessions_total",
+    "Request-scoped sessions, by whether they ever touched the pool.",
+    ["route", "used"],
 )
 
+
+@event.listens_for(Session, "after_begin")
+def _apply_user_context(session, transaction, connection):
+    # Runs when the session checks out a connection for its first statement
+    # (and again after every commit/rollback), so SET LOCAL-scoped RLS context
+    # is never lost between transactions and never costs a trip on its own.
+    session.info["began"] = True
+    user_id = session.info.get(RLS_USER_KEY)
+    if user_id is not None:
+        connection.execute(
+            text("SELECT set_config('app.current_user_id', :user_id, true)"),
+            {"user_id": user_id},
+        )
+    session.info[RLS_APPLIED_KEY] = user_id
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_user_context(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(RLS_APPLIED_KEY, None)
+
+
+def _record_session_use(request: Request, session: Session):
+    route = route_label(request)
+    used = bool(session.info.get("began"))
+    DB_SESSIONS.inc(route=route, used=str(used).lower())
+
+
+engine = build_engine()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
 
 
-def get_db():
+def get_db(request: Request):
     db = SessionLocal()
     try:
         yield db
     finally:
+        _record_session_use(request, db)
         db.close()
+
+
+async_engine = build_async_engine()
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+async def get_async_db(request: Request):
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        finally:
+            _record_session_use(request, db.sync_session)
@@ -0,0 +1,205 @@
+"""EXPLAIN-based regression check for the hot queries.
+
+Seeds a realistic dataset inside one transaction, ANALYZEs it, EXPLAINs each
+hot query and fails if any of them falls back to a sequential scan on a large
+table. Everything is rolled back at the end, so it is safe against a dev or CI
+database that already has the latest migrations applied:
+
+    python -m app.jobs.check_query_plans --users 500 --products-per-user 40
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import desc, func, select, text
+
+from app.db.models import PriceEvent, PriceSnapshot
+from app.db.session import engine
+from app.services.alerts import alert_targets_query
+from app.services.observations import claim_observations_query
+from app.services.scrape_queue import claim_query, pending_scrape_query
+
+GUARDED_TABLES = {
+    "tracked_products",
+    "price_snapshots",
+    "price_events",
+    "product_observations",
+}
+
+SEED_SQL = [
+    """
+    INSERT INTO users (email)
+    SELECT 'plan-check-' || g || '@example.invalid'
+    FROM generate_series(1, :users) g
+    """,
+    """
+    INSERT INTO tracked_products (
+        user_id, marketplace, url, title, currency, is_active,
+        update_interval, last_scraped_at, next_run_at, last_availability
+    )
+    SELECT
+        u.id,
+        'amazon',
+        'https://www.amazon.com/dp/PC' || lpad(u.id::text, 7, '0') || lpad(g::text, 3, '0'),
+        'Plan check product',
+        'USD',
+        random() < 0.9,
+        24,
+        now() - interval '1 hour' * (random() * 24),
+        now() + interval '1 hour' * (random() * 26 - 2),
+        'in_stock'
+    FROM users u
+    CROSS JOIN generate_series(1, :products_per_user) g
+    WHERE u.email LIKE 'plan-check-%'
+    """,
+    """
+    INSERT INTO product_observations (fingerprint, marketplace, url, next_run_at)
+    SELECT 'plan-check:' || p.url, p.marketplace, p.url, p.next_run_at
+    FROM tracked_products p
+    WHERE p.title = 'Plan check product' AND p.is_active
+    """,
+    """
+    INSERT INTO price_snapshots (tracked_product_id, price, currency, source, fetched_at)
+    SELECT p.id, 100 + random() * 50, 'USD', 'plan_check',
+           now() - interval '6 hours' * g
+    FROM tracked_products p
+    CROSS JOIN generate_series(1, :snapshots_per_product) g
+    WHERE p.title = 'Plan check product'
+    """,
+    """
+    INSERT INTO price_events (
+        url, product_id, target_price, triggered, triggered_at, acknowledged, event_type
+    )
+    SELECT p.url, p.id, 110, random() < 0.05, now(), random() < 0.5, 'target_price'
+    FROM tracked_products p
+    WHERE p.title = 'Plan check product' AND random() < 0.2
+    """,
+    "ANALYZE users",
+    "ANALYZE tracked_products",
+    "ANALYZE price_snapshots",
+    "ANALYZE price_events",
+    "ANALYZE product_observations",
+]
+
+
+def hot_queries(user_id: int, product_ids: list[int]):
+    now = datetime.now(timezone.utc)
+    ai_window = now - timedelta(days=30)
+    last_price = (
+        select(
+            PriceSnapshot.tracked_product_id,
+            func.row_number()
+            .over(
+                partition_by=PriceSnapshot.tracked_product_id,
+                order_by=desc(PriceSnapshot.fetched_at),
+            )
+            .label("rn"),
+        )
+        .where(
+            PriceSnapshot.tracked_product_id.in_(product_ids),
+            PriceSnapshot.price.isnot(None),
+        )
+        .subquery()
+    )
+    return {
+        "pending_scrape": pending_scrape_query(now, user_id),
+        "claim_scrape_user": claim_query(now, 5, user_id),
+        "claim_scrape_monitor": claim_query(now, 50),
+        "claim_observations": claim_observations_query(now, 50),
+        "dashboard_stats": select(
+            PriceSnapshot.tracked_product_id,
+            func.count(PriceSnapshot.id),
+            func.min(PriceSnapshot.price),
+            func.max(PriceSnapshot.price),
+        )
+        .where(PriceSnapshot.tracked_product_id.in_(product_ids))
+        .group_by(PriceSnapshot.tracked_product_id),
+        "dashboard_last_price": select(last_price.c.tracked_product_id).where(
+            last_price.c.rn == 1
+        ),
+        "ai_engine_window": select(PriceSnapshot)
+        .where(PriceSnapshot.tracked_product_id == product_ids[0])
+        .where(PriceSnapshot.fetched_at >= ai_window)
+        .order_by(PriceSnapshot.fetched_at.asc()),
+        "alert_index_load": alert_targets_query(product_ids[0]),
+        "alerts_pending": select(PriceEvent)
+        .where(PriceEvent.triggered.is_(True), PriceEvent.acknowledged.is_(False))
+        .order_by(desc(PriceEvent.triggered_at))
+        .limit(50),
+    }
+
+
+def scan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from scan_nodes(child)
+
+
+def explain(conn, stmt) -> dict:
+    compiled = stmt.compile(
+        dialect=conn.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    result = conn.exec_driver_sql(
+        "EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params
+    )
+    payload = result.scalar()
+    if isinstance(payload, str):
+        payload = json.loads(payload)
+    return payload[0]["Plan"]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--products-per-user", type=int, default=40)
+    parser.add_argument("--snapshots-per-product", type=int, default=30)
+    args = parser.parse_args()
+
+    params = {
+        "users": args.users,
+        "products_per_user": args.products_per_user,
+        "snapshots_per_product": args.snapshots_per_product,
+    }
+
+    failures = 0
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            for sql in SEED_SQL:
+                conn.execute(text(sql), params)
+
+            user_id = conn.execute(
+                text("SELECT id FROM users WHERE email LIKE 'plan-check-%' LIMIT 1")
+            ).scalar()
+            product_ids = (
+                conn.execute(
+                    text("SELECT id FROM tracked_products WHERE user_id = :uid"),
+                    {"uid": user_id},
+                )
+                .scalars()
+                .all()
+            )
+
+            for name, stmt in hot_queries(user_id, product_ids).items():
+                nodes = list(scan_nodes(explain(conn, stmt)))
+                seq = [
+                    n["Relation Name"]
+                    for n in nodes
+                    if n["Node Type"] == "Seq Scan"
+                    and n.get("Relation Name") in GUARDED_TABLES
+                ]
+                indexes = sorted({n["Index Name"] for n in nodes if "Index Name" in n})
+                status = "FAIL" if seq else "ok"
+                failures += bool(seq)
+                detail = f"seq scan on {', '.join(seq)}" if seq else ", ".join(indexes)
+                print(f"{status:4} {name:22} {detail}")
+        finally:
+            trans.rollback()
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,87 @@
+"""Price monitor.
+
+By default runs the long-lived scheduler (app/services/scheduler.py) until
+SIGINT/SIGTERM, letting in-flight scrapes finish before exiting:
+
+    python -m app.jobs.monitor_prices
+    python -m app.jobs.monitor_prices --once   # one claim-and-drain cycle
+    python -m app.jobs.monitor_prices --sharded   # one of N pipeline workers
+
+--sharded runs back-to-back cycles over this process's share of the
+observations; start as many as needed, on any hosts sharing the database,
+and they split the work between themselves (app/services/sharding.py).
+
+Don't also set SCHEDULER_EMBEDDED in the API when running this; leases keep
+the two from scraping the same observation, but they'd compete for quota.
+"""
+
+import argparse
 import asyncio
-from app.db.session import SessionLocal
+import signal
+
+import structlog
+from app.db import query_stats
+from app.services.alerts import alert_index_listening
 from app.services.monitor import run_monitor_cycle
 
+logger = structlog.get_logger(__name__)
 
-def main():
-    db = SessionLocal()
+
+def run_once():
+    token = query_stats.begin()
     try:
-        asyncio.run(run_monitor_cycle(db))
+        asyncio.run(run_monitor_cycle())
     finally:
-        db.close()
+        stats = query_stats.end(token)
+        logger.info(
+            "monitor.cycle.db",
+            statements=stats.count,
+            db_ms=round(stats.total_seconds * 1000, 2),
+            slowest=stats.slowest_fingerprint,
+            repeated=dict(stats.repeated(2)),
+        )
+
+
+async def run_sharded():
+    from app.services.monitor import run_monitor_worker
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    async with alert_index_listening():
+        await run_monitor_worker(stop=stop)
+
+
+async def run_daemon():
+    from app.services.scheduler import Scheduler
+
+    scheduler = Scheduler()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, scheduler.request_stop)
+    async with alert_index_listening():
+        await scheduler.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--once", action="store_true", help="run a single cycle and exit"
+    )
+    parser.add_argument(
+        "--sharded",
+        action="store_true",
+        help="run pipeline cycles over this worker's share of the observations",
+    )
+    args = parser.parse_args()
+
+    if args.once:
+        run_once()
+    elif args.sharded:
+        asyncio.run(run_sharded())
+    else:
+        asyncio.run(run_daemon())
 
 
 if __name__ == "__main__":
@@ -1,15 +1,23 @@
-from fastapi import FastAPI, Depends, HTTPException
+import structlog
+from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import (
     GZipMiddleware,
 )
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 
 from app.api.ai_routes import router as ai_router
 from app.api.dashboard import router as dashboard_router
 from app.api.routes import router as base_router
 from app.api.alerts_routes import router as alerts_router
+from app.api.events_routes import router as events_router
+from app.core.config import settings
+from app.core.metrics import REGISTRY, route_label
+from app.db import query_stats
 from app.db.session import get_db
+from app.services.alerts import ALERTS_CHANNEL, alert_index
+from app.services.events import PgEventListener, broker
 
 app = FastAPI(
     title="QuickBasket AI API",
@@ -20,7 +28,71 @@ app = FastAPI(
 )
 
 
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+logger = structlog.get_logger(__name__)
+
+DB_STATEMENTS = REGISTRY.histogram(
+    "http_request_db_statements",
+    "SQL statements executed per request.",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+DB_TIME = REGISTRY.histogram(
+    "http_request_db_seconds", "Total DB time per request.", ["route"]
+)
+DB_BUDGET_EXCEEDED = REGISTRY.counter(
+    "http_request_db_budget_exceeded_total",
+    "Requests that ran more than DB_STATEMENT_BUDGET statements.",
+    ["route"],
+)
+
+
+@app.middleware("http")
+async def query_accounting(request: Request, call_next):
+    token = query_stats.begin()
+    try:
+        response = await call_next(request)
+    finally:
+        stats = query_stats.end(token)
+
+    route = route_label(request)
+    DB_STATEMENTS.observe(stats.count, route=route)
+    DB_TIME.observe(stats.total_seconds, route=route)
+
+    if stats.count > settings.DB_STATEMENT_BUDGET:
+        DB_BUDGET_EXCEEDED.inc(route=route)
+        logger.warning(
+            "db.statement_budget_exceeded",
+            route=route,
+            statements=stats.count,
+            budget=settings.DB_STATEMENT_BUDGET,
+            db_ms=round(stats.total_seconds * 1000, 2),
+        )
+    for fp, n in stats.repeated(settings.DB_REPEATED_STATEMENT_THRESHOLD):
+        logger.warning("db.repeated_statement", route=route, count=n, statement=fp)
+
+    if settings.DEBUG:
+        response.headers["X-DB-Statements"] = str(stats.count)
+        response.headers["X-DB-Time-Ms"] = f"{stats.total_seconds * 1000:.2f}"
+        if stats.slowest_fingerprint:
+            slowest = stats.slowest_fingerprint[:200]
+            response.headers["X-DB-Slowest"] = slowest.encode(
+                "ascii", "replace"
+            ).decode()
+            response.headers["X-DB-Slowest-Ms"] = f"{stats.slowest_seconds * 1000:.2f}"
+
+    return response
+
+
+class StreamingAwareGZipMiddleware(GZipMiddleware):
+    # Compressing an event stream buffers it, which defeats pushing.
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(events_router.prefix):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+app.add_middleware(StreamingAwareGZipMiddleware, minimum_size=1000)
 
 app.add_middleware(
     CORSMiddleware,
@@ -38,6 +110,16 @@ app.include_router(base_router, prefix="/api/v1")
 app.include_router(dashboard_router)
 app.include_router(ai_router)
 app.include_router(alerts_router)
+app.include_router(events_router)
+
+event_listener = (
+    PgEventListener(
+        settings.DATABASE_URL, broker if settings.EVENTS_PG_NOTIFY else None
+    )
+    if settings.EVENTS_PG_NOTIFY or settings.ALERT_INDEX_LISTEN
+    else None
+)
+scheduler = None
 
 
 @app.api_route("/health", methods=["GET", "HEAD"])
@@ -62,13 +144,40 @@ def health_check():
         }
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.on_event("startup")
 async def startup_event():
     # TODO: Redis connection, DB connection pool, etc.
-    pass
+    global scheduler
+
+    if event_listener is not None:
+        if settings.ALERT_INDEX_LISTEN:
+            event_listener.listen(
+                ALERTS_CHANNEL, alert_index.on_notify, alert_index.on_listening
+            )
+        event_listener.start()
+    if settings.SCHEDULER_EMBEDDED:
+        from app.services.scheduler import Scheduler
+
+        scheduler = Scheduler()
+        scheduler.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    # TODO: Close Redis, close DB connections, etc.
-    pass
+    # TODO: Close Redis, etc.
+    from app.db.session import async_engine, engine
+
+    if scheduler is not None:
+        await scheduler.stop()
+    if event_listener is not None:
+        await event_listener.stop()
+
+    await async_engine.dispose()
+    engine.dispose()
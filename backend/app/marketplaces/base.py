@@ -1,8 +1,260 @@
-import os
+import asyncio
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
 
+import httpx
+import structlog
 
-def get_proxy():
-    proxy = os.getenv("OUTBOUND_PROXY")
-    if not proxy:
-        return None
-    return {"http://": proxy, "https://": proxy}
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.marketplaces.extractors import FAST_PATTERNS, IncrementalScan, extract
+from app.marketplaces.page_cache import PageEntry, page_cache
+from app.marketplaces.parse_pool import run_extract
+from app.marketplaces.proxy_pool import proxy_pool
+from app.marketplaces.registry import default_currency, marketplace_name
+from app.services.circuit_breaker import MarketplaceBlocked, breaker_for
+
+logger = structlog.get_logger(__name__)
+
+FETCH_BYTES = REGISTRY.counter(
+    "marketplace_fetch_bytes_total",
+    "Response body bytes downloaded from marketplaces.",
+    ["marketplace", "mode"],
+)
+FETCH_EARLY_CLOSE = REGISTRY.counter(
+    "marketplace_fetch_early_close_total",
+    "Streaming fetches closed before the end of the body.",
+    ["marketplace", "reason"],
+)
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+
+def client_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+class PooledAdapter(ABC):
+    """Owns long-lived httpx clients, one per outbound proxy, per adapter.
+
+    Creating a client per fetch paid DNS, TCP and TLS setup every time and
+    never reused an HTTP/2 connection. Clients are created lazily on the
+    running loop (and recreated if a later asyncio.run() brings a new one);
+    whoever runs the monitor calls aclose() when done. Requests go through
+    the shared proxy pool unless the adapter is given a proxy ("" for a
+    direct connection).
+    """
+
+    MARKETPLACE: str
+    # Text that only appears on a captcha / robot check page served with a 200.
+    BLOCK_MARKERS: tuple[str, ...] = ()
+    BLOCK_SNIFF_CHARS = 65536
+    HEADERS: dict[str, str] = {"User-Agent": DEFAULT_USER_AGENT}
+    HTTP2 = True
+    TIMEOUT = 10.0
+
+    def __init__(
+        self,
+        *,
+        verify=True,
+        proxy: str | None = None,
+        limits=None,
+        parser: str | None = None,
+    ):
+        self.parser = parser or self.default_parser()
+        self.verify = verify
+        self.proxy = proxy
+        self.limits = limits
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _build_client(self, proxy: str) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            headers=self.HEADERS,
+            proxy=proxy or None,
+            http2=self.HTTP2,
+            limits=self.limits or client_limits(),
+            timeout=httpx.Timeout(self.TIMEOUT),
+            follow_redirects=True,
+            verify=self.verify,
+        )
+
+    def client_for(self, proxy: str | None) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._clients = {}
+            self._loop = loop
+        client = self._clients.get(proxy or "")
+        if client is None or client.is_closed:
+            client = self._clients[proxy or ""] = self._build_client(proxy or "")
+        return client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self.client_for(self.proxy)
+
+    @asynccontextmanager
+    async def route(self):
+        """Yield the client for one request, leasing a proxy from the pool."""
+        if self.proxy is not None or not proxy_pool:
+            yield self.client
+            return
+        async with proxy_pool.lease() as proxy:
+            yield self.client_for(proxy)
+
+    async def aclose(self):
+        for client in self._clients.values():
+            if not client.is_closed:
+                await client.aclose()
+        self._clients = {}
+        self._loop = None
+
+    def default_parser(self) -> str:
+        return "bs4"
+
+    @abstractmethod
+    async def get(self, url: str, headers: dict | None = None) -> httpx.Response:
+        """One GET of url through self.route(), with the adapter's headers."""
+
+    @property
+    def breaker(self):
+        return breaker_for(self.MARKETPLACE)
+
+    def check_blocked(self, text: str):
+        if any(marker in text for marker in self.BLOCK_MARKERS):
+            raise MarketplaceBlocked(f"{self.MARKETPLACE} served a robot check")
+
+    def check_response(
+        self, resp: httpx.Response, headers: dict | None = None
+    ) -> httpx.Response:
+        if not (headers and resp.status_code == 304):
+            resp.raise_for_status()
+            self.check_blocked(resp.text[: self.BLOCK_SNIFF_CHARS])
+        self.breaker.record_success()
+        return resp
+
+    async def retry_backoff(self, attempt: int, error: Exception, give_up: bool):
+        # Called from an except block: counts the failure against the
+        # marketplace and either re-raises or waits. The wait is cut short
+        # (CircuitOpen) once the marketplace's circuit opens.
+        self.breaker.record_failure(error)
+        if give_up:
+            raise error
+        await self.breaker.backoff(attempt)
+
+    def can_handle(self, url: str) -> bool:
+        return marketplace_name(url) == self.MARKETPLACE
+
+    def postprocess(self, url: str, fields: dict) -> dict:
+        result = {"marketplace": self.MARKETPLACE, "url": url, **fields}
+        if not result.get("currency"):
+            result["currency"] = default_currency(url)
+        return result
+
+    def parse(self, url: str, html: str) -> dict:
+        return self.postprocess(url, extract(self.MARKETPLACE, self.parser, html))
+
+    async def parse_async(self, url: str, html: str) -> dict:
+        fields = await run_extract(self.MARKETPLACE, self.parser, html)
+        return self.postprocess(url, fields)
+
+    @property
+    def streaming(self) -> bool:
+        # The incremental scan uses the fast extractor's patterns, so a
+        # marketplace pinned to bs4 keeps downloading and parsing full pages.
+        return (
+            settings.STREAMING_FETCH
+            and self.parser == "fast"
+            and self.MARKETPLACE in FAST_PATTERNS
+        )
+
+    async def fetch(self, url: str) -> dict:
+        resp, data = await self.download(url)
+        if data is None:
+            data = self.remember(url, resp, await self.parse_async(url, resp.text))
+        return data
+
+    async def download(self, url: str) -> tuple[httpx.Response, dict | None]:
+        # Returns the response and, when nothing is left to parse (streamed,
+        # or 304 against the page cache), the extracted fields.
+        entry = page_cache.get(url)
+        headers = entry.conditional_headers() if entry else None
+        if self.streaming:
+            return await self.fetch_streaming(url, headers, entry)
+
+        resp = await self.get(url, headers=headers)
+        if resp.status_code == 304 and entry is not None:
+            return resp, page_cache.not_modified(self.MARKETPLACE, entry)
+        FETCH_BYTES.inc(
+            resp.num_bytes_downloaded, marketplace=self.MARKETPLACE, mode="full"
+        )
+        return resp, None
+
+    def remember(self, url: str, resp: httpx.Response, data: dict) -> dict:
+        return page_cache.remember(url, self.MARKETPLACE, resp, data)
+
+    async def fetch_streaming(
+        self, url: str, headers: dict | None = None, entry: PageEntry | None = None
+    ) -> tuple[httpx.Response, dict]:
+        # Reads the body chunk by chunk and hangs up as soon as every field
+        # is found or the byte budget is spent; the rest of a 1-2 MB page is
+        # never downloaded (nor billed by a metered proxy).
+        for attempt in range(3):
+            try:
+                resp, fields = await self._stream_fields(url, headers)
+                break
+            except (httpx.HTTPError, MarketplaceBlocked) as e:
+                await self.retry_backoff(attempt, e, give_up=attempt == 2)
+
+        if resp.status_code == 304 and entry is not None:
+            return resp, page_cache.not_modified(self.MARKETPLACE, entry)
+        return resp, self.remember(url, resp, self.postprocess(url, fields))
+
+    async def _stream_fields(self, url: str, headers: dict | None):
+        scan = IncrementalScan(FAST_PATTERNS[self.MARKETPLACE])
+        budget = settings.FETCH_BYTE_BUDGET
+        reason = None
+        # A marker split across two chunks is still found in the previous
+        # chunk's tail plus the next one.
+        overlap = max(map(len, self.BLOCK_MARKERS), default=1) - 1
+        tail, sniffed = "", 0
+        async with self.route() as client:
+            async with client.stream("GET", url, headers=headers) as resp:
+                if headers and resp.status_code == 304:
+                    self.breaker.record_success()
+                    return resp, None
+                resp.raise_for_status()
+                async for chunk in resp.aiter_text():
+                    if sniffed < self.BLOCK_SNIFF_CHARS:
+                        window = tail + chunk
+                        self.check_blocked(window)
+                        tail = window[-overlap:] if overlap else ""
+                        sniffed += len(chunk)
+                    if scan.feed(chunk):
+                        reason = "complete"
+                        break
+                    if resp.num_bytes_downloaded >= budget:
+                        reason = "budget"
+                        break
+                downloaded = resp.num_bytes_downloaded
+
+        self.breaker.record_success()
+        FETCH_BYTES.inc(downloaded, marketplace=self.MARKETPLACE, mode="stream")
+        if reason is not None:
+            FETCH_EARLY_CLOSE.inc(marketplace=self.MARKETPLACE, reason=reason)
+        if reason == "budget":
+            logger.info(
+                "fetch.stream.budget_exceeded",
+                url=url,
+                downloaded=downloaded,
+                found=sorted(scan.found),
+            )
+        return resp, scan.result()
@@ -0,0 +1,244 @@
+import html as html_lib
+import json
+import re
+
+from bs4 import BeautifulSoup
+
+# "bs4" builds the full DOM; "fast" only scans for the few elements we read.
+# Both return the same fields so adapters can switch with a setting. "json"
+# reads the state blob a JS-rendered page ships for hydration and may also
+# return currency, availability and image_url.
+
+TAG = re.compile(r"<[^>]+>")
+SPACE = re.compile(r"\s+")
+
+AMAZON_TITLE = re.compile(
+    r"<span\b[^>]*\bid=[\"']productTitle[\"'][^>]*>(?P<value>.*?)</span>",
+    re.S | re.I,
+)
+AMAZON_PRICE = re.compile(
+    r"<span\b[^>]*\bclass=[\"'][^\"']*\ba-price\b[^\"']*[\"'][^>]*>\s*"
+    r"<span\b[^>]*\bclass=[\"'][^\"']*\ba-offscreen\b[^\"']*[\"'][^>]*>"
+    r"(?P<value>.*?)</span>",
+    re.S | re.I,
+)
+NOON_TITLE = re.compile(r"<h1\b[^>]*>(?P<value>.*?)</h1>", re.S | re.I)
+NOON_PRICE = re.compile(
+    r"<(?P<tag>\w+)\b[^>]*\bdata-qa=[\"']product-price[\"'][^>]*>"
+    r"(?P<value>.*?)</(?P=tag)>",
+    re.S | re.I,
+)
+NEXT_DATA = re.compile(
+    r"<script\b[^>]*\bid=[\"']__NEXT_DATA__[\"'][^>]*>(?P<value>.*?)</script>",
+    re.S | re.I,
+)
+LD_JSON = re.compile(
+    r"<script\b[^>]*\btype=[\"']application/ld\+json[\"'][^>]*>"
+    r"(?P<value>.*?)</script>",
+    re.S | re.I,
+)
+
+NOON_IMAGE_URL = "https://f.nooncdn.com/p/{key}.jpg"
+
+FAST_PATTERNS = {
+    "amazon": {"title": AMAZON_TITLE, "price_raw": AMAZON_PRICE},
+    "noon": {"title": NOON_TITLE, "price_raw": NOON_PRICE},
+}
+
+
+def clean_text(fragment: str | None) -> str | None:
+    if fragment is None:
+        return None
+    text = SPACE.sub(" ", html_lib.unescape(TAG.sub("", fragment))).strip()
+    return text or None
+
+
+def amazon_bs4(html: str) -> dict:
+    soup = BeautifulSoup(html, "html.parser")
+
+    title = soup.select_one("#productTitle")
+    price = soup.select_one("span.a-price > span.a-offscreen")
+
+    return {
+        "title": title.text.strip() if title else None,
+        "price_raw": price.text.strip() if price else None,
+    }
+
+
+def scan(patterns: dict[str, re.Pattern], html: str) -> dict:
+    fields = {}
+    for name, pattern in patterns.items():
+        match = pattern.search(html)
+        fields[name] = clean_text(match.group("value")) if match else None
+    return fields
+
+
+def amazon_fast(html: str) -> dict:
+    return scan(FAST_PATTERNS["amazon"], html)
+
+
+def noon_bs4(html: str) -> dict:
+    soup = BeautifulSoup(html, "html.parser")
+
+    title_el = soup.select_one("h1")
+    price_el = soup.select_one('[data-qa="product-price"]')
+
+    return {
+        "title": title_el.text.strip() if title_el else None,
+        "price_raw": price_el.text.strip() if price_el else None,
+    }
+
+
+def noon_fast(html: str) -> dict:
+    return scan(FAST_PATTERNS["noon"], html)
+
+
+def load_json(blob: str):
+    try:
+        return json.loads(blob)
+    except ValueError:
+        return None
+
+
+def find_node(root, match, max_nodes: int = 5000):
+    # Breadth-first, so the page's own product wins over the recommendation
+    # widgets nested further down the state tree.
+    queue = [root]
+    for node in queue:
+        if max_nodes <= 0:
+            return None
+        max_nodes -= 1
+        if isinstance(node, dict):
+            if match(node):
+                return node
+            queue.extend(v for v in node.values() if isinstance(v, (dict, list)))
+        elif isinstance(node, list):
+            queue.extend(v for v in node if isinstance(v, (dict, list)))
+    return None
+
+
+def format_price(value) -> str | None:
+    if value in (None, "", 0):
+        return None
+    return str(value)
+
+
+def noon_next_data(html: str) -> dict | None:
+    match = NEXT_DATA.search(html)
+    state = load_json(match.group("value")) if match else None
+    if not isinstance(state, dict):
+        return None
+    page = (state.get("props") or {}).get("pageProps") or {}
+    product = (page.get("catalog") or {}).get("product") or find_node(
+        state, lambda n: "product_title" in n and ("variants" in n or "sku" in n)
+    )
+    if product is None:
+        return None
+
+    offers = [
+        offer
+        for variant in product.get("variants") or []
+        for offer in variant.get("offers") or []
+    ]
+    offer = offers[0] if offers else {}
+    price = format_price(offer.get("sale_price")) or format_price(offer.get("price"))
+    image_keys = product.get("image_keys") or []
+    buyable = product.get("is_buyable", bool(offers))
+
+    return {
+        "title": clean_text(product.get("product_title")),
+        "price_raw": price,
+        "currency": offer.get("currency") or product.get("currency"),
+        "availability": "in_stock" if offers and buyable else "out_of_stock",
+        "image_url": NOON_IMAGE_URL.format(key=image_keys[0]) if image_keys else None,
+    }
+
+
+def ld_json_product(html: str) -> dict | None:
+    for match in LD_JSON.finditer(html):
+        data = load_json(match.group("value"))
+        if data is None:
+            continue
+        product = find_node(data, lambda n: n.get("@type") == "Product", 200)
+        if product is None:
+            continue
+
+        offers = product.get("offers") or {}
+        if isinstance(offers, list):
+            offers = offers[0] if offers else {}
+        image = product.get("image")
+        if isinstance(image, list):
+            image = image[0] if image else None
+        stock = str(offers.get("availability") or "")
+
+        return {
+            "title": clean_text(product.get("name")),
+            "price_raw": format_price(offers.get("price")),
+            "currency": offers.get("priceCurrency"),
+            "availability": (
+                "out_of_stock"
+                if stock.endswith(("OutOfStock", "SoldOut", "Discontinued"))
+                else "in_stock"
+            ),
+            "image_url": image if isinstance(image, str) else None,
+        }
+    return None
+
+
+def noon_json(html: str) -> dict:
+    # Pages without a state blob (older server-rendered ones) still have the
+    # price in the DOM, so fall back to the targeted scan.
+    fields = noon_next_data(html) or ld_json_product(html)
+    if fields is None:
+        return noon_fast(html)
+    if not fields["title"]:
+        fields["title"] = noon_fast(html)["title"]
+    return fields
+
+
+EXTRACTORS = {
+    ("amazon", "bs4"): amazon_bs4,
+    ("amazon", "fast"): amazon_fast,
+    ("noon", "bs4"): noon_bs4,
+    ("noon", "fast"): noon_fast,
+    ("noon", "json"): noon_json,
+}
+
+
+def extract(marketplace: str, engine: str, html: str) -> dict:
+    # Module-level so it pickles into the parse process pool.
+    return EXTRACTORS[(marketplace, engine)](html)
+
+
+class IncrementalScan:
+    """Feeds a page chunk by chunk and stops once every field is found.
+
+    Only the new text plus a tail long enough to hold one element split
+    across chunks is kept and scanned, so memory stays flat and scanning a
+    page stays linear in its size.
+    """
+
+    OVERLAP = 8192
+
+    def __init__(self, patterns: dict[str, re.Pattern]):
+        self.patterns = patterns
+        self.found: dict[str, str | None] = {}
+        self._tail = ""
+
+    @property
+    def done(self) -> bool:
+        return len(self.found) == len(self.patterns)
+
+    def feed(self, text: str) -> bool:
+        window = self._tail + text
+        for name, pattern in self.patterns.items():
+            if name in self.found:
+                continue
+            match = pattern.search(window)
+            if match:
+                self.found[name] = clean_text(match.group("value"))
+        self._tail = window[-self.OVERLAP :]
+        return self.done
+
+    def result(self) -> dict:
+        return {name: self.found.get(name) for name in self.patterns}
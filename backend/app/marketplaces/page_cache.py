@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+
+import httpx
+import structlog
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+
+logger = structlog.get_logger(__name__)
+
+PAGE_CACHE_RESULTS = REGISTRY.counter(
+    "marketplace_page_cache_total",
+    "Product page fetches by validator/content-hash result.",
+    ["marketplace", "result"],
+)
+
+# The fields a subscriber would see change; url/source/marketplace never do.
+DIGEST_FIELDS = ("title", "price_raw", "currency", "availability", "image_url")
+
+
+def fields_digest(data: dict) -> str:
+    relevant = {name: data.get(name) for name in DIGEST_FIELDS}
+    blob = json.dumps(relevant, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class PageEntry:
+    etag: str | None
+    last_modified: str | None
+    digest: str
+    data: dict
+    size: int = 0
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass
+class PageCacheStats:
+    fetches: int = 0
+    not_modified: int = 0
+    unchanged: int = 0
+    changed: int = 0
+    bytes_saved: int = 0
+
+    def as_log(self) -> dict:
+        return {
+            **asdict(self),
+            "parses_skipped": self.not_modified,
+            "snapshots_skipped": self.not_modified + self.unchanged,
+        }
+
+
+@dataclass
+class PageCache:
+    """Per-URL validators and extracted fields from the last full fetch.
+
+    A 304 reuses the cached fields without downloading or parsing the page;
+    a 200 whose extracted fields hash the same as last time is flagged
+    "unchanged" so the monitor only advances the schedule. Bounded LRU,
+    saved to PAGE_CACHE_PATH so the next monitor run starts warm.
+    """
+
+    max_entries: int
+    path: str | None = None
+    entries: OrderedDict = field(default_factory=OrderedDict)
+    stats: PageCacheStats = field(default_factory=PageCacheStats)
+    loaded: bool = False
+
+    def get(self, url: str) -> PageEntry | None:
+        self.load()
+        entry = self.entries.get(url)
+        if entry is not None:
+            self.entries.move_to_end(url)
+        return entry
+
+    def put(self, url: str, entry: PageEntry):
+        self.entries[url] = entry
+        self.entries.move_to_end(url)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def not_modified(self, marketplace: str, entry: PageEntry) -> dict:
+        self.stats.fetches += 1
+        self.stats.not_modified += 1
+        self.stats.bytes_saved += entry.size
+        PAGE_CACHE_RESULTS.inc(marketplace=marketplace, result="not_modified")
+        return {**entry.data, "unchanged": True}
+
+    def remember(
+        self, url: str, marketplace: str, resp: httpx.Response, data: dict
+    ) -> dict:
+        previous = self.get(url)
+        digest = fields_digest(data)
+        unchanged = previous is not None and previous.digest == digest
+        self.put(
+            url,
+            PageEntry(
+                etag=resp.headers.get("etag"),
+                last_modified=resp.headers.get("last-modified"),
+                digest=digest,
+                data=data,
+                size=resp.num_bytes_downloaded,
+            ),
+        )
+        result = "unchanged" if unchanged else "changed"
+        self.stats.fetches += 1
+        setattr(self.stats, result, getattr(self.stats, result) + 1)
+        PAGE_CACHE_RESULTS.inc(marketplace=marketplace, result=result)
+        return {**data, "unchanged": unchanged}
+
+    def take_stats(self) -> dict:
+        stats, self.stats = self.stats, PageCacheStats()
+        return {**stats.as_log(), "entries": len(self.entries)}
+
+    def load(self):
+        if self.loaded:
+            return
+        self.loaded = True
+        if self.max_entries <= 0 or not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                rows = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("page_cache.load_failed", path=self.path, error=str(e))
+            return
+        # Saved oldest first, so replaying keeps the LRU order.
+        for url, row in rows[-self.max_entries :]:
+            self.entries.setdefault(url, PageEntry(**row))
+
+    def rows(self) -> list | None:
+        # Taken on the event loop; write() can then run in a thread while
+        # fetches keep updating the cache.
+        if not self.path or not self.loaded:
+            return None
+        return [[url, asdict(entry)] for url, entry in self.entries.items()]
+
+    def write(self, rows: list | None):
+        if rows is None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(rows, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning("page_cache.save_failed", path=self.path, error=str(e))
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+
+page_cache = PageCache(
+    max_entries=settings.PAGE_CACHE_SIZE, path=settings.PAGE_CACHE_PATH or None
+)
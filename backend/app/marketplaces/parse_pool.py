@@ -0,0 +1,34 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core.config import settings
+from app.marketplaces.extractors import extract
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def get_pool() -> ProcessPoolExecutor | None:
+    global _pool
+    if settings.PARSE_POOL_WORKERS <= 0:
+        return None
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.PARSE_POOL_WORKERS)
+    return _pool
+
+
+async def run_extract(marketplace: str, engine: str, html: str) -> dict:
+    # A 1-2 MB product page takes tens to hundreds of ms to parse; doing that
+    # on the loop stalls every other fetch. PARSE_POOL_WORKERS=0 falls back to
+    # a thread, which keeps the loop turning but still competes for the GIL.
+    pool = get_pool()
+    if pool is None:
+        return await asyncio.to_thread(extract, marketplace, engine, html)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, extract, marketplace, engine, html)
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
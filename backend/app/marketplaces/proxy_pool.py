@@ -0,0 +1,242 @@
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import httpx
+import structlog
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.services.circuit_breaker import MarketplaceBlocked
+
+logger = structlog.get_logger(__name__)
+
+READY, COOLING, EVICTED = "ready", "cooling", "evicted"
+STATE_VALUES = {READY: 0, COOLING: 1, EVICTED: 2}
+# Latency floor for scoring, so a proxy next door doesn't drown out the rest.
+MIN_LATENCY = 0.05
+# Weight of the newest outcome in the success-rate and latency averages.
+DECAY = 0.2
+
+PROXY_REQUESTS = REGISTRY.counter(
+    "outbound_proxy_requests_total",
+    "Marketplace requests per outbound proxy.",
+    ["proxy", "outcome"],
+)
+PROXY_STATE = REGISTRY.gauge(
+    "outbound_proxy_state",
+    "Outbound proxy state (0 ready, 1 cooling down, 2 evicted).",
+    ["proxy"],
+)
+PROXY_SCORE = REGISTRY.gauge(
+    "outbound_proxy_score",
+    "Selection weight: success rate squared over average latency.",
+    ["proxy"],
+)
+PROXY_IN_FLIGHT = REGISTRY.gauge(
+    "outbound_proxy_in_flight", "Requests currently using a proxy.", ["proxy"]
+)
+
+
+def proxy_label(url: str) -> str:
+    # host:port only; proxy URLs usually carry credentials.
+    parts = urlsplit(url)
+    return parts.hostname + (f":{parts.port}" if parts.port else "")
+
+
+def is_proxy_failure(error: BaseException) -> bool:
+    # What a dead, slow or banned exit looks like. A 404 or a marketplace 5xx
+    # would have happened through any proxy and says nothing about this one.
+    if isinstance(error, MarketplaceBlocked):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in (403, 407, 429)
+    return isinstance(error, httpx.TransportError)
+
+
+class Proxy:
+    def __init__(self, url: str):
+        self.url = url
+        self.label = proxy_label(url)
+        self.success_rate = 1.0
+        self.latency: float | None = None
+        self.in_flight = 0
+        self.failures = 0
+        self.strikes = 0
+        self.cooling_until = 0.0
+        self.evicted = False
+
+    @property
+    def score(self) -> float:
+        latency = max(self.latency or 1.0, MIN_LATENCY)
+        return max(self.success_rate**2 / latency, 0.01)
+
+    def state(self, now: float) -> str:
+        if self.evicted:
+            return EVICTED
+        return COOLING if now < self.cooling_until else READY
+
+
+class ProxyPool:
+    """Outbound proxies for marketplace fetches, picked by health score.
+
+    Each request leases one proxy, chosen at random weighted by its score
+    (success rate squared over average latency), among those that are not
+    cooling down and are below max_concurrency. max_failures consecutive
+    proxy failures (connection errors, 403/407/429, captcha pages) put a
+    proxy in cool-down, twice as long each time in a row; after evict_after
+    cool-downs in a row it is dropped for the life of the process, unless
+    it is the last one left.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        *,
+        max_concurrency: int | None = None,
+        max_failures: int | None = None,
+        cooldown_seconds: float | None = None,
+        evict_after: int | None = None,
+        clock=time.monotonic,
+    ):
+        self.proxies = [Proxy(url) for url in dict.fromkeys(urls)]
+        self.max_concurrency = max_concurrency or settings.PROXY_MAX_CONCURRENCY
+        self.max_failures = max_failures or settings.PROXY_MAX_FAILURES
+        self.cooldown_seconds = cooldown_seconds or settings.PROXY_COOLDOWN_SECONDS
+        self.evict_after = (
+            evict_after if evict_after is not None else settings.PROXY_EVICT_AFTER
+        )
+        self.clock = clock
+        self._waiters: deque[asyncio.Future] = deque()
+        PROXY_IN_FLIGHT.set_function(
+            lambda: {(p.label,): p.in_flight for p in self.proxies}, key="proxy_pool"
+        )
+        for proxy in self.proxies:
+            self._publish(proxy)
+
+    @classmethod
+    def from_settings(cls) -> "ProxyPool":
+        urls = [u.strip() for u in settings.OUTBOUND_PROXIES.split(",")]
+        return cls([u for u in urls if u])
+
+    def __len__(self) -> int:
+        return len(self.proxies)
+
+    def _publish(self, proxy: Proxy):
+        PROXY_STATE.set(STATE_VALUES[proxy.state(self.clock())], proxy=proxy.label)
+        PROXY_SCORE.set(round(proxy.score, 3), proxy=proxy.label)
+
+    def _pick(self) -> Proxy | None:
+        now = self.clock()
+        live = [p for p in self.proxies if not p.evicted]
+        free = [p for p in live if p.in_flight < self.max_concurrency]
+        ready = [p for p in free if p.cooling_until <= now]
+        if ready:
+            return random.choices(ready, weights=[p.score for p in ready])[0]
+        if free and all(p.cooling_until > now for p in live):
+            # Everything is cooling down: the one back soonest, rather than
+            # stalling every fetch.
+            return min(free, key=lambda p: p.cooling_until)
+        return None
+
+    async def _acquire(self) -> Proxy:
+        while True:
+            proxy = self._pick()
+            if proxy is not None:
+                return proxy
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                # Woken when a lease ends; the timeout catches cool-downs
+                # running out.
+                await asyncio.wait_for(waiter, timeout=1.0)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    def _wake(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    @asynccontextmanager
+    async def lease(self):
+        """Yield the URL of a proxy to send one request through."""
+        proxy = await self._acquire()
+        proxy.in_flight += 1
+        started = self.clock()
+        try:
+            yield proxy.url
+        except Exception as e:
+            self.record(proxy, self.clock() - started, e)
+            raise
+        else:
+            self.record(proxy, self.clock() - started)
+        finally:
+            proxy.in_flight -= 1
+            self._wake()
+
+    def record(self, proxy: Proxy, elapsed: float, error: Exception | None = None):
+        if error is not None and not is_proxy_failure(error):
+            PROXY_REQUESTS.inc(proxy=proxy.label, outcome="other_error")
+            return
+        if error is None:
+            PROXY_REQUESTS.inc(proxy=proxy.label, outcome="ok")
+            proxy.success_rate += DECAY * (1 - proxy.success_rate)
+            proxy.latency = (
+                elapsed
+                if proxy.latency is None
+                else proxy.latency + DECAY * (elapsed - proxy.latency)
+            )
+            proxy.failures = proxy.strikes = 0
+        else:
+            PROXY_REQUESTS.inc(proxy=proxy.label, outcome="failure")
+            proxy.success_rate -= DECAY * proxy.success_rate
+            proxy.failures += 1
+            if proxy.failures >= self.max_failures:
+                self._cool_down(proxy, error)
+        self._publish(proxy)
+
+    def _cool_down(self, proxy: Proxy, error: Exception):
+        proxy.failures = 0
+        proxy.strikes += 1
+        live = sum(not p.evicted for p in self.proxies)
+        if self.evict_after and proxy.strikes >= self.evict_after and live > 1:
+            proxy.evicted = True
+            logger.warning("proxy.evicted", proxy=proxy.label, error=str(error))
+            return
+        seconds = self.cooldown_seconds * 2 ** (proxy.strikes - 1)
+        proxy.cooling_until = self.clock() + seconds
+        logger.info(
+            "proxy.cooling_down",
+            proxy=proxy.label,
+            seconds=seconds,
+            strikes=proxy.strikes,
+            error=str(error),
+        )
+
+    def snapshot(self) -> list[dict]:
+        now = self.clock()
+        return [
+            {
+                "proxy": p.label,
+                "state": p.state(now),
+                "score": round(p.score, 3),
+                "success_rate": round(p.success_rate, 3),
+                "latency_ms": round((p.latency or 0) * 1000, 1),
+                "in_flight": p.in_flight,
+            }
+            for p in self.proxies
+        ]
+
+
+# Shared per process like the breakers: every adapter's requests feed the same
+# health scores.
+proxy_pool = ProxyPool.from_settings()
@@ -0,0 +1,136 @@
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+# Noon serves every region from noon.com; the currency follows the locale in
+# the first path segment, e.g. /uae-en/...
+NOON_LOCALE_CURRENCIES = {"uae": "AED", "saudi": "SAR", "egypt": "EGP"}
+
+
+@dataclass(frozen=True)
+class Marketplace:
+    """What the backend knows about one storefront domain."""
+
+    name: str
+    domain: str
+    currency: str | None
+    product_pattern: re.Pattern
+    id_prefix: str
+    locale_currencies: dict[str, str] = field(default_factory=dict)
+
+    def currency_for(self, url: str) -> str | None:
+        if self.currency or not self.locale_currencies:
+            return self.currency
+        locale = urlsplit(url).path.lstrip("/").split("/", 1)[0]
+        return self.locale_currencies.get(locale.split("-", 1)[0])
+
+    def product_id(self, url: str) -> str | None:
+        match = self.product_pattern.search(url)
+        return f"{self.id_prefix}-{match.group(1).upper()}" if match else None
+
+    @property
+    def selectors(self) -> dict[str, re.Pattern] | None:
+        # The fast extractor's patterns; imported late so the API's ingest
+        # path doesn't pull in the extractors (and bs4) just to canonicalize.
+        from app.marketplaces.extractors import FAST_PATTERNS
+
+        return FAST_PATTERNS.get(self.name)
+
+
+AMAZON_ASIN_PATTERN = re.compile(r"/(?:dp|gp/product)/([A-Z0-9]{10})", re.IGNORECASE)
+NOON_SKU_PATTERN = re.compile(r"/([A-Z0-9]+)/p/", re.IGNORECASE)
+
+AMAZON_DOMAINS = {
+    "amazon.com": "USD",
+    "amazon.ae": "AED",
+    "amazon.eg": "EGP",
+    "amazon.sa": "SAR",
+    "amazon.co.uk": "GBP",
+    "amazon.de": "EUR",
+    "amazon.fr": "EUR",
+    "amazon.it": "EUR",
+    "amazon.es": "EUR",
+    "amazon.ca": "CAD",
+    "amazon.in": "INR",
+    "amazon.co.jp": "JPY",
+    "amazon.com.au": "AUD",
+    "amazon.com.be": "EUR",
+    "amazon.com.br": "BRL",
+    "amazon.com.mx": "MXN",
+    "amazon.com.tr": "TRY",
+    "amazon.nl": "EUR",
+    "amazon.pl": "PLN",
+    "amazon.se": "SEK",
+    "amazon.sg": "SGD",
+}
+# Second-level labels Amazon storefronts sit under, as in amazon.co.uk.
+AMAZON_SECOND_LEVEL = {"co", "com"}
+
+MARKETPLACES: dict[str, Marketplace] = {
+    **{
+        domain: Marketplace("amazon", domain, currency, AMAZON_ASIN_PATTERN, "AMZN")
+        for domain, currency in AMAZON_DOMAINS.items()
+    },
+    "noon.com": Marketplace(
+        "noon",
+        "noon.com",
+        None,
+        NOON_SKU_PATTERN,
+        "NOON",
+        locale_currencies=NOON_LOCALE_CURRENCIES,
+    ),
+}
+
+
+def host_of(url: str) -> str:
+    # Just the authority's host, without urlsplit's full parse; URLs with or
+    # without a scheme ("www.amazon.ae/dp/...") both work.
+    start = url.find("//")
+    start = 0 if start < 0 else start + 2
+    end = len(url)
+    for sep in "/?#":
+        i = url.find(sep, start, end)
+        if i >= 0:
+            end = i
+    return url[start:end].rpartition("@")[2].partition(":")[0]
+
+
+def amazon_domain(labels: list[str]) -> str | None:
+    # Any registrable domain starting "amazon.", as the old substring match
+    # accepted, without matching amazon.com.example.net.
+    if len(labels) >= 2 and labels[-2] == "amazon":
+        return ".".join(labels[-2:])
+    if len(labels) >= 3 and labels[-3] == "amazon":
+        if labels[-2] in AMAZON_SECOND_LEVEL:
+            return ".".join(labels[-3:])
+    return None
+
+
+@lru_cache(maxsize=1024)
+def lookup_host(host: str) -> Marketplace | None:
+    # Registrable domains here are two or three labels (amazon.com,
+    # amazon.co.uk), so at most two dict probes whatever the registry's
+    # size; "amazon.com.example.net" matches nothing. Amazon storefronts not
+    # listed above still resolve, just without a default currency.
+    labels = host.lower().rstrip(".").rsplit(".", 3)
+    marketplace = MARKETPLACES.get(".".join(labels[-3:])) or MARKETPLACES.get(
+        ".".join(labels[-2:])
+    )
+    if marketplace is None and (domain := amazon_domain(labels)):
+        marketplace = Marketplace("amazon", domain, None, AMAZON_ASIN_PATTERN, "AMZN")
+    return marketplace
+
+
+def lookup(url: str) -> Marketplace | None:
+    return lookup_host(host_of(url))
+
+
+def marketplace_name(url: str) -> str | None:
+    marketplace = lookup(url)
+    return marketplace.name if marketplace else None
+
+
+def default_currency(url: str) -> str | None:
+    marketplace = lookup(url)
+    return marketplace.currency_for(url) if marketplace else None
@@ -32,6 +32,8 @@ class AIResult:
     pct_change_7d: Optional[float]
     pct_change_30d: Optional[float]
 
+    change_count: int = 0
+
 
 def _safe_float(x) -> Optional[float]:
     try:
@@ -76,6 +78,10 @@ def _linear_slope(prices: List[float]) -> Optional[float]:
     return num / den
 
 
+def _count_changes(prices: List[float]) -> int:
+    return sum(1 for a, b in zip(prices, prices[1:]) if a != b)
+
+
 def _pct_change(old: Optional[float], new: Optional[float]) -> Optional[float]:
     if old is None or new is None:
         return None
@@ -272,4 +278,5 @@ class AIEngine:
             slope=slope,
             pct_change_7d=pct_change_7d,
             pct_change_30d=pct_change_30d,
+            change_count=_count_changes(prices),
         )
@@ -1,37 +1,282 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from decimal import Decimal
+
 import structlog
-from datetime import datetime, timezone
+from sqlalchemy import (
+    Integer,
+    Numeric,
+    Text,
+    column,
+    event,
+    func,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.orm import Session, object_session
 
+from app.core.config import settings
+from app.core.metrics import REGISTRY
 from app.db.models.price_event import PriceEvent
+from app.db.models.tracked_product import TrackedProduct
+from app.services.events import PgEventListener, queue_event
 
 logger = structlog.get_logger(__name__)
 
+CHANGED_PRODUCTS_KEY = "alert_index_changed"
+# pg_notify'd with the product id by a trigger on every price_events write.
+ALERTS_CHANNEL = "qb_alerts"
 
-def evaluate_alerts(snapshot, db):
-    alerts = (
-        db.query(PriceEvent)
-        .filter(
-            PriceEvent.url == snapshot.product.url,
-            PriceEvent.triggered.is_(False),
-            PriceEvent.target_price >= snapshot.price,
-        )
-        .all()
+ALERT_INDEX_LOOKUPS = REGISTRY.counter(
+    "alert_index_lookups_total",
+    "Alert checks against the in-memory index, by whether it had the product.",
+    ["result"],
+)
+
+
+def alert_targets_query(product_id: int):
+    return select(PriceEvent.target_price, PriceEvent.id).where(
+        PriceEvent.product_id == product_id,
+        PriceEvent.triggered.is_(False),
+        PriceEvent.target_price.isnot(None),
     )
 
-    for alert in alerts:
-        alert.triggered = True
-        alert.triggered_at = datetime.now(timezone.utc)
-        alert.message = (
-            alert.message
-            or f"BUY NOW — price reached target: {float(snapshot.price)} {snapshot.currency}"
+
+class AlertIndex:
+    """Untriggered target prices per tracked product, sorted for bisection.
+
+    A product's targets are loaded on its first check, through the caller's
+    session (so under its RLS context), and then answer every later check
+    without a query: the alerts a price crosses are the targets at or above
+    it, one bisect away. Products without alerts are cached too.
+
+    Entries are only trusted while this process LISTENs on ALERTS_CHANNEL
+    (the API's events listener, alert_index_listening elsewhere), which drops
+    a product whenever any process writes one of its alerts. Without a live listener every check loads the
+    targets afresh. ALERT_INDEX_TTL_SECONDS is a backstop on top of that.
+    """
+
+    def __init__(self, max_products: int | None = None, ttl: float | None = None):
+        self.max_products = max_products or settings.ALERT_INDEX_MAX_PRODUCTS
+        self.ttl = ttl or settings.ALERT_INDEX_TTL_SECONDS
+        # product_id -> (loaded_at, sorted targets, alert ids in the same order)
+        self._entries: OrderedDict[int, tuple[float, list, list]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._listening = False
+        # Bumped by every invalidation, so a load that raced one isn't kept.
+        self._generation = 0
+
+    def on_listening(self, listening: bool):
+        # Whatever was cached may have missed notifications either way.
+        with self._lock:
+            self._listening = listening
+        self.clear()
+
+    def on_notify(self, payload: str):
+        try:
+            self.invalidate(int(payload))
+        except ValueError:
+            self.clear()
+
+    def _get(self, product_id: int):
+        with self._lock:
+            if not self._listening:
+                return None
+            entry = self._entries.get(product_id)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                return None
+            self._entries.move_to_end(product_id)
+            return entry
+
+    def _load(self, db: Session, product_id: int):
+        generation = self._generation
+        rows = sorted(db.execute(alert_targets_query(product_id)).all())
+        entry = (
+            time.monotonic(),
+            [Decimal(target) for target, _ in rows],
+            [alert_id for _, alert_id in rows],
+        )
+        with self._lock:
+            if not self._listening or generation != self._generation:
+                return entry
+            self._entries[product_id] = entry
+            while len(self._entries) > self.max_products:
+                self._entries.popitem(last=False)
+        return entry
+
+    def crossed(self, db: Session, product_id: int, price) -> list[int]:
+        """Ids of the product's untriggered alerts with target >= price."""
+        entry = self._get(product_id)
+        ALERT_INDEX_LOOKUPS.inc(result="miss" if entry is None else "hit")
+        if entry is None:
+            entry = self._load(db, product_id)
+        _, targets, alert_ids = entry
+        return alert_ids[bisect_left(targets, Decimal(str(price))) :]
+
+    def clears(self, product_id: int, price) -> bool:
+        """True if the cached targets show that price crosses nothing."""
+        entry = self._get(product_id)
+        return entry is not None and (
+            not entry[1] or Decimal(str(price)) > entry[1][-1]
+        )
+
+    def invalidate(self, *product_ids: int):
+        with self._lock:
+            self._generation += 1
+            for product_id in product_ids:
+                self._entries.pop(product_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+alert_index = AlertIndex()
+
+
+@asynccontextmanager
+async def alert_index_listening():
+    # For processes without the API's events listener (the monitor daemon and
+    # sharded workers), so their fan-outs can skip products with no alerts.
+    if not settings.ALERT_INDEX_LISTEN:
+        yield
+        return
+    listener = PgEventListener(settings.DATABASE_URL)
+    listener.listen(ALERTS_CHANNEL, alert_index.on_notify, alert_index.on_listening)
+    listener.start()
+    try:
+        yield
+    finally:
+        await listener.stop()
+
+
+@event.listens_for(PriceEvent, "after_insert")
+@event.listens_for(PriceEvent, "after_update")
+@event.listens_for(PriceEvent, "after_delete")
+def _alert_changed(mapper, connection, alert):
+    # Dropped right away for this process and again after the commit, so a
+    # reload racing the open transaction doesn't keep the old targets.
+    alert_index.invalidate(alert.product_id)
+    session = object_session(alert)
+    if session is not None:
+        session.info.setdefault(CHANGED_PRODUCTS_KEY, set()).add(alert.product_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    alert_index.invalidate(*session.info.pop(CHANGED_PRODUCTS_KEY, ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _invalidate_rolled_back(session):
+    alert_index.invalidate(*session.info.pop(CHANGED_PRODUCTS_KEY, ()))
+
+
+def alert_message(price, currency) -> str:
+    return f"BUY NOW — price reached target: {float(price)} {currency}"
+
+
+def evaluate_alerts_batch(db: Session, prices) -> list:
+    """Trigger every alert crossed by a batch of (product_id, price, currency).
+
+    One UPDATE ... FROM (VALUES ...) RETURNING for the whole batch, skipping
+    products the alert index already shows as clear; returns the triggered
+    rows and queues an alert.triggered event for each. Nothing is committed.
+    """
+    lowest = {}
+    for product_id, price, currency in prices:
+        if price is None or alert_index.clears(product_id, price):
+            continue
+        if product_id not in lowest or price < lowest[product_id][0]:
+            lowest[product_id] = (price, currency)
+    if not lowest:
+        return []
+
+    batch = values(
+        column("product_id", Integer),
+        column("price", Numeric),
+        column("message", Text),
+        name="batch",
+    ).data(
+        [
+            (product_id, price, alert_message(price, currency))
+            for product_id, (price, currency) in lowest.items()
+        ]
+    )
+    triggered = db.execute(
+        update(PriceEvent)
+        .where(
+            PriceEvent.product_id == batch.c.product_id,
+            PriceEvent.triggered.is_(False),
+            PriceEvent.target_price >= batch.c.price,
+            TrackedProduct.id == PriceEvent.product_id,
+        )
+        .values(
+            triggered=True,
+            triggered_at=func.now(),
+            message=func.coalesce(PriceEvent.message, batch.c.message),
         )
+        .returning(
+            PriceEvent.id,
+            PriceEvent.product_id,
+            PriceEvent.url,
+            PriceEvent.title,
+            PriceEvent.target_price,
+            PriceEvent.message,
+            TrackedProduct.user_id,
+            batch.c.price,
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    # A bulk UPDATE skips the mapper events, so invalidate here.
+    changed = {row.product_id for row in triggered}
+    alert_index.invalidate(*changed)
+    session_changed = db.info.setdefault(CHANGED_PRODUCTS_KEY, set())
+    session_changed.update(changed)
 
+    for row in triggered:
+        target = float(row.target_price) if row.target_price is not None else None
         logger.info(
             "alert.triggered",
-            url=snapshot.product.url,
-            price=float(snapshot.price),
-            target=(
-                float(alert.target_price) if alert.target_price is not None else None
-            ),
+            url=row.url,
+            price=float(row.price),
+            target=target,
         )
+        queue_event(
+            db,
+            row.user_id,
+            "alert.triggered",
+            alert_id=row.id,
+            product_id=row.product_id,
+            url=row.url,
+            title=row.title,
+            price=float(row.price),
+            target_price=target,
+            message=row.message,
+        )
+    return triggered
+
+
+def evaluate_alerts(snapshot, db) -> list:
+    """Trigger the alerts a snapshot's price crosses, in the caller's transaction.
 
-    db.commit()
+    Nothing is committed; the caller's commit also publishes the
+    alert.triggered events.
+    """
+    if snapshot.price is None:
+        return []
+    crossed = alert_index.crossed(db, snapshot.tracked_product_id, snapshot.price)
+    if not crossed:
+        return []
+
+    # A savepoint, so a failure here leaves the caller's ingest committable.
+    with db.begin_nested():
+        return evaluate_alerts_batch(
+            db, [(snapshot.tracked_product_id, snapshot.price, snapshot.currency)]
+        )
@@ -1,8 +1,17 @@
-import re
 from functools import lru_cache
 
-AMAZON_ASIN_PATTERN = re.compile(r"/(?:dp|gp/product)/([A-Z0-9]{10})", re.IGNORECASE)
-NOON_SKU_PATTERN = re.compile(r"/([A-Z0-9]+)/p/", re.IGNORECASE)
+import structlog
+
+from app.marketplaces.registry import (
+    AMAZON_ASIN_PATTERN,
+    NOON_SKU_PATTERN,
+    lookup,
+    marketplace_name,
+)
+
+logger = structlog.get_logger(__name__)
+
+FALLBACK_PATTERNS = (("AMZN", AMAZON_ASIN_PATTERN), ("NOON", NOON_SKU_PATTERN))
 
 
 @lru_cache(maxsize=1024)
@@ -10,20 +19,21 @@ def canonicalize_url(url: str) -> str:
 
     base_url = url.split("?")[0].split("#")[0]
 
-    asin_match = AMAZON_ASIN_PATTERN.search(base_url)
-    if asin_match:
-        asin = asin_match.group(1).upper()
-        print(f"[DEBUG] Canonicalized Amazon: {url} → AMZN-{asin}")
-        return f"AMZN-{asin}"
-
-    noon_match = NOON_SKU_PATTERN.search(base_url)
-    if noon_match:
-        sku = noon_match.group(1).upper()
-        print(f"[DEBUG] Canonicalized Noon: {url} → NOON-{sku}")
-        return f"NOON-{sku}"
+    marketplace = lookup(base_url)
+    if marketplace is not None:
+        product_id = marketplace.product_id(base_url)
+        if product_id:
+            return product_id
+    else:
+        # Unknown host: same id patterns as the observation key backfill SQL,
+        # so existing fingerprints still line up.
+        for prefix, pattern in FALLBACK_PATTERNS:
+            match = pattern.search(base_url)
+            if match:
+                return f"{prefix}-{match.group(1).upper()}"
 
     fallback = base_url.lower().rstrip("/")
-    print(f"[WARN] Using fallback canonicalization: {url} → {fallback}")
+    logger.debug("canonicalize.fallback", url=url, canonical=fallback)
     return fallback
 
 
@@ -36,8 +46,8 @@ def extract_product_id(canonical_url: str) -> str | None:
 
 
 def is_amazon_url(url: str) -> bool:
-    return "amazon." in url.lower()
+    return marketplace_name(url) == "amazon"
 
 
 def is_noon_url(url: str) -> bool:
-    return "noon." in url.lower()
+    return marketplace_name(url) == "noon"
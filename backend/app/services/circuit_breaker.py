@@ -0,0 +1,249 @@
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+import httpx
+import structlog
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+
+logger = structlog.get_logger(__name__)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = REGISTRY.gauge(
+    "marketplace_circuit_state",
+    "Circuit breaker state per marketplace (0 closed, 1 half-open, 2 open).",
+    ["marketplace"],
+)
+CIRCUIT_LIMIT = REGISTRY.gauge(
+    "marketplace_concurrency_limit",
+    "Adaptive (AIMD) fetch concurrency limit per marketplace.",
+    ["marketplace"],
+)
+CIRCUIT_REJECTED = REGISTRY.counter(
+    "marketplace_circuit_rejected_total",
+    "Fetches refused without touching the network because a circuit was open.",
+    ["marketplace"],
+)
+
+
+class CircuitOpen(Exception):
+    def __init__(self, marketplace: str, retry_in: float):
+        super().__init__(f"{marketplace} circuit open, retry in {retry_in:.0f}s")
+        self.marketplace = marketplace
+        self.retry_in = retry_in
+
+
+class MarketplaceBlocked(Exception):
+    """A 200 that is really a captcha / robot check page."""
+
+
+def is_domain_failure(error: BaseException) -> bool:
+    # Only what says "the marketplace is pushing back" (bot blocks, throttling,
+    # outages) counts against it; a 404 or an unparsable page is about one
+    # product.
+    if isinstance(error, MarketplaceBlocked):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status in (403, 429) or status >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """Rolling error-rate circuit breaker with AIMD concurrency for one domain.
+
+    Outcomes land in one-second buckets over CIRCUIT_WINDOW_SECONDS. Once
+    the window holds CIRCUIT_MIN_REQUESTS with an error rate at or above
+    CIRCUIT_ERROR_RATE the circuit opens and every fetch is refused
+    immediately. After the cool-down a few probes go through (half-open):
+    a success closes it, a failure reopens it for twice as long. While
+    closed, the concurrency limit grows by one per limit's worth of
+    successes and halves on a failure.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        window_seconds: int | None = None,
+        min_requests: int | None = None,
+        error_rate: float | None = None,
+        open_seconds: float | None = None,
+        max_open_seconds: float | None = None,
+        probes: int | None = None,
+        max_concurrency: int | None = None,
+        clock=time.monotonic,
+    ):
+        self.name = name
+        self.window_seconds = window_seconds or settings.CIRCUIT_WINDOW_SECONDS
+        self.min_requests = min_requests or settings.CIRCUIT_MIN_REQUESTS
+        self.error_rate = error_rate or settings.CIRCUIT_ERROR_RATE
+        self.base_open_seconds = open_seconds or settings.CIRCUIT_OPEN_SECONDS
+        self.max_open_seconds = max_open_seconds or settings.CIRCUIT_MAX_OPEN_SECONDS
+        self.probes = probes or settings.CIRCUIT_HALF_OPEN_PROBES
+        self.max_concurrency = max_concurrency or settings.CIRCUIT_MAX_CONCURRENCY
+        self.clock = clock
+
+        self.state = CLOSED
+        self.open_seconds = self.base_open_seconds
+        self.opened_until = 0.0
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self._buckets: deque[list] = deque()  # [second, successes, failures]
+        self._last_decrease = 0.0
+        self._waiters: deque[asyncio.Future] = deque()
+
+        CIRCUIT_STATE.set(STATE_VALUES[CLOSED], marketplace=name)
+        CIRCUIT_LIMIT.set(self.limit, marketplace=name)
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logger.info(
+                "circuit.state",
+                marketplace=self.name,
+                state=state,
+                previous=self.state,
+                open_seconds=self.open_seconds,
+            )
+        self.state = state
+        CIRCUIT_STATE.set(STATE_VALUES[state], marketplace=self.name)
+
+    def _refresh(self):
+        if self.state == OPEN and self.clock() >= self.opened_until:
+            self._set_state(HALF_OPEN)
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_until - self.clock())
+
+    def allows_request(self) -> bool:
+        self._refresh()
+        if self.state == OPEN:
+            return False
+        if self.state == HALF_OPEN:
+            return self.in_flight < self.probes
+        return True
+
+    def _trip(self):
+        self.opened_until = self.clock() + self.open_seconds
+        self._set_state(OPEN)
+        self.open_seconds = min(self.open_seconds * 2, self.max_open_seconds)
+        self._buckets.clear()
+        # Waiters would only find the circuit open; let them fail fast now.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _bucket(self) -> list:
+        now = int(self.clock())
+        if not self._buckets or self._buckets[-1][0] != now:
+            self._buckets.append([now, 0, 0])
+        while self._buckets and self._buckets[0][0] <= now - self.window_seconds:
+            self._buckets.popleft()
+        return self._buckets[-1]
+
+    def error_stats(self) -> tuple[int, float]:
+        self._bucket()
+        ok = sum(b[1] for b in self._buckets)
+        failed = sum(b[2] for b in self._buckets)
+        total = ok + failed
+        return total, failed / total if total else 0.0
+
+    def record_success(self):
+        self._bucket()[1] += 1
+        if self.state == HALF_OPEN:
+            self.open_seconds = self.base_open_seconds
+            self._set_state(CLOSED)
+        # Additive increase: +1 after a full limit's worth of successes.
+        self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+        CIRCUIT_LIMIT.set(round(self.limit, 2), marketplace=self.name)
+        self._wake()
+
+    def record_failure(self, error: BaseException | None = None) -> bool:
+        """Count a failed attempt; returns False if it wasn't the domain's fault."""
+        if error is not None and not is_domain_failure(error):
+            return False
+        self._bucket()[2] += 1
+        now = self.clock()
+        # Multiplicative decrease, at most once a second so one burst of
+        # concurrent failures doesn't collapse the limit to 1.
+        if now - self._last_decrease >= 1.0:
+            self._last_decrease = now
+            self.limit = max(1.0, self.limit / 2)
+            CIRCUIT_LIMIT.set(round(self.limit, 2), marketplace=self.name)
+
+        if self.state == HALF_OPEN:
+            self._trip()
+        elif self.state == CLOSED:
+            total, rate = self.error_stats()
+            if total >= self.min_requests and rate >= self.error_rate:
+                self._trip()
+        return True
+
+    def reject(self):
+        CIRCUIT_REJECTED.inc(marketplace=self.name)
+        raise CircuitOpen(self.name, self.retry_in())
+
+    async def backoff(self, attempt: int):
+        # Retry sleep that gives up as soon as the domain is known to be down,
+        # instead of every product paying the full schedule.
+        if not self.allows_request():
+            self.reject()
+        await asyncio.sleep((2**attempt) * random.uniform(0.5, 1.5))
+        if not self.allows_request():
+            self.reject()
+
+    def _capacity(self) -> int:
+        if self.state == HALF_OPEN:
+            return self.probes
+        return max(1, int(self.limit))
+
+    def _wake(self):
+        while self._waiters and self.in_flight < self._capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the domain's adaptive concurrency slots for a fetch."""
+        while True:
+            if not self.allows_request():
+                self.reject()
+            if self.in_flight < self._capacity():
+                break
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                raise
+
+        self.in_flight += 1
+        self._wake()
+        try:
+            yield self
+        finally:
+            self.in_flight -= 1
+            self._wake()
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def breaker_for(marketplace: str) -> CircuitBreaker:
+    # Shared per process like the rate-limit buckets: every fetch of a
+    # marketplace, from the pipeline or the scheduler, feeds the same window.
+    breaker = _breakers.get(marketplace)
+    if breaker is None:
+        breaker = _breakers[marketplace] = CircuitBreaker(marketplace)
+    return breaker
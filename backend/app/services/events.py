@@ -0,0 +1,208 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import structlog
+from sqlalchemy import event, make_url, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+
+logger = structlog.get_logger(__name__)
+
+PENDING_EVENTS_KEY = "pending_events"
+CHANNEL = "qb_events"
+
+EVENT_TYPES = ("product.due", "alert.triggered", "schedule.changed")
+
+EVENTS_PUBLISHED = REGISTRY.counter(
+    "events_published_total", "Events handed to local subscribers.", ["type"]
+)
+EVENTS_DROPPED = REGISTRY.counter(
+    "events_dropped_total", "Events dropped because a subscriber fell behind."
+)
+EVENT_SUBSCRIBERS = REGISTRY.gauge(
+    "events_subscribers", "Open event streams in this process."
+)
+
+
+def make_event(user_id, event_type: str, data: dict) -> dict:
+    return {
+        "type": event_type,
+        "user_id": str(user_id),
+        "data": data,
+        "at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+class EventBroker:
+    """Per-user fan-out to the event streams open in this process."""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        EVENT_SUBSCRIBERS.set_function(
+            lambda: {(): sum(len(q) for q in self._subscribers.values())}
+        )
+
+    def subscribe(self, user_id) -> asyncio.Queue:
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[str(user_id)].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id, queue: asyncio.Queue):
+        with self._lock:
+            queues = self._subscribers.get(str(user_id))
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[str(user_id)]
+
+    def publish(self, evt: dict):
+        # Callable from any thread (sync routes run in the threadpool); the
+        # queues are only touched on the loop that owns them.
+        with self._lock:
+            queues = list(self._subscribers.get(evt["user_id"], ()))
+        if not queues or self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._deliver, queues, evt)
+
+    def _deliver(self, queues: list[asyncio.Queue], evt: dict):
+        EVENTS_PUBLISHED.inc(type=evt["type"])
+        for queue in queues:
+            if queue.full():
+                # A stalled client loses its oldest events, never blocks ingest.
+                queue.get_nowait()
+                EVENTS_DROPPED.inc()
+            queue.put_nowait(evt)
+
+
+broker = EventBroker(queue_size=settings.EVENTS_QUEUE_SIZE)
+
+
+def queue_event(db, user_id, event_type: str, **data):
+    """Attach an event to the session; it is delivered only if the commit succeeds."""
+    db.info.setdefault(PENDING_EVENTS_KEY, []).append(
+        make_event(user_id, event_type, data)
+    )
+
+
+def queue_schedule_changed(db, product):
+    queue_event(
+        db,
+        product.user_id,
+        "schedule.changed",
+        product_id=product.id,
+        active=product.is_active,
+        interval_hours=product.update_interval,
+        next_run_at=product.next_run_at.isoformat() if product.next_run_at else None,
+    )
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_pending_events(session):
+    # NOTIFY is transactional, so with a multi-worker deployment the events
+    # reach every worker's listener exactly when the data becomes visible.
+    if not settings.EVENTS_PG_NOTIFY:
+        return
+    for evt in session.info.pop(PENDING_EVENTS_KEY, []):
+        session.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": CHANNEL, "payload": json.dumps(evt, default=str)},
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_events(session):
+    for evt in session.info.pop(PENDING_EVENTS_KEY, []):
+        broker.publish(evt)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_events(session):
+    session.info.pop(PENDING_EVENTS_KEY, None)
+
+
+class PgEventListener:
+    """LISTENs on the events channel and feeds the local broker.
+
+    Without a broker it only serves the channels added through listen().
+    """
+
+    def __init__(self, database_url: str, broker: EventBroker | None = None):
+        self.dsn = make_url(database_url).set(drivername="postgresql")
+        self.broker = broker
+        self._task: asyncio.Task | None = None
+        self._handlers = {} if broker is None else {CHANNEL: self._on_notify}
+        self._on_state = []
+
+    def listen(self, channel: str, handler, on_state=None):
+        """Also LISTEN on channel, calling handler(payload) per notification.
+
+        on_state(listening) is called when the connection comes up or goes
+        down; notifications sent while it was down are lost.
+        """
+        self._handlers[channel] = lambda conn, pid, chan, payload: handler(payload)
+        if on_state is not None:
+            self._on_state.append(on_state)
+
+    def _set_state(self, listening: bool):
+        for on_state in self._on_state:
+            on_state(listening)
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            self.broker.publish(json.loads(payload))
+        except (ValueError, KeyError):
+            logger.warning("events.bad_payload", payload=payload[:200])
+
+    async def _run(self):
+        import asyncpg
+
+        backoff = 1
+        while True:
+            try:
+                conn = await asyncpg.connect(
+                    self.dsn.render_as_string(hide_password=False),
+                    timeout=settings.DB_CONNECT_TIMEOUT,
+                )
+                try:
+                    for channel, handler in self._handlers.items():
+                        await conn.add_listener(channel, handler)
+                    logger.info("events.listening", channels=list(self._handlers))
+                    self._set_state(True)
+                    backoff = 1
+                    while True:
+                        await asyncio.sleep(settings.EVENTS_HEARTBEAT_SECONDS)
+                        await conn.execute("SELECT 1")
+                finally:
+                    self._set_state(False)
+                    await conn.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("events.listener_failed", error=str(e), retry_in=backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+
+
+def format_sse(evt: dict) -> str:
+    return f"event: {evt['type']}\ndata: {json.dumps(evt, default=str)}\n\n"
@@ -1,82 +1,174 @@
 import asyncio
+import os
+from datetime import datetime, timezone
+
+import structlog
 from sqlalchemy.orm import Session
-from app.db.models import TrackedProduct, PriceSnapshot, PriceEvent
+from app.core.config import settings
+from app.db.models import ProductObservation
+from app.db.session import SessionLocal
+from app.services.observations import (
+    Scrape,
+    fan_out_many,
+    is_fresh,
+    request_browser_scrape,
+)
+from app.marketplaces.page_cache import page_cache
+from app.marketplaces.registry import marketplace_name
+from app.marketplaces.parse_pool import shutdown_pool
 from app.services.pricing import parse_price_to_decimal
+from app.services.scrape_queue import worker_id
 from app.marketplaces.amazon import AmazonAdapter
 from app.marketplaces.noon import NoonAdapter
 
+logger = structlog.get_logger(__name__)
+
 adapters = [AmazonAdapter(), NoonAdapter()]
+adapters_by_marketplace = {a.MARKETPLACE: a for a in adapters}
 
 
 def pick_adapter(url: str):
-    for a in adapters:
-        if a.can_handle(url):
-            return a
-    return None
+    return adapters_by_marketplace.get(marketplace_name(url))
 
 
-async def monitor_one(db: Session, product: TrackedProduct):
-    adapter = pick_adapter(product.url)
-    if not adapter:
-        return
+async def close_adapters():
+    for a in adapters:
+        await a.aclose()
+    shutdown_pool()
+    await asyncio.to_thread(page_cache.write, page_cache.rows())
+
+
+def shared_scrape(observation: ProductObservation) -> Scrape:
+    # Someone scraped this product moments ago; hand that result to the
+    # subscribers that are due instead of hitting the marketplace again.
+    return Scrape(
+        observation,
+        price=observation.last_price,
+        currency=observation.currency,
+        availability=observation.last_availability,
+        source="shared",
+        scraped_at=observation.last_scraped_at,
+    )
 
-    data = await adapter.fetch(product.url)
-    price_raw = data.get("price_raw")
-    title = data.get("title") or product.title
-    currency = data.get("currency") or product.currency or "EGP"
 
+def fetched_scrape(observation: ProductObservation, data: dict) -> Scrape:
+    price_raw = data.get("price_raw")
     price_dec = parse_price_to_decimal(price_raw)
-    price_value = float(price_dec) if price_dec is not None else None
-
-
-    last = (
-        db.query(PriceSnapshot)
-        .filter(PriceSnapshot.tracked_product_id == product.id)
-        .order_by(PriceSnapshot.fetched_at.desc())
-        .first()
-    )
-
-    snap = PriceSnapshot(
-        tracked_product_id=product.id,
-        price=price_value,
-        currency=currency,
-        raw_price_text=price_raw,
+    return Scrape(
+        observation,
+        price=float(price_dec) if price_dec is not None else None,
+        currency=data.get("currency") or observation.currency or "EGP",
         availability=data.get("availability"),
         source="monitor",
+        raw_price_text=price_raw,
+        title=data.get("title"),
+        image_url=data.get("image_url"),
+        snapshot=not data.get("unchanged"),
     )
-    db.add(snap)
-
-
-    product.title = title
-    if data.get("image_url"):
-        product.image_url = data["image_url"]
-    db.add(product)
-
-
-    if last and last.price is not None and price_value is not None:
-        old = float(last.price)
-        new = price_value
-        if new != old:
-            ev_type = "drop" if new < old else "increase"
-            db.add(
-                PriceEvent(
-                    tracked_product_id=product.id,
-                    event_type=ev_type,
-                    old_price=old,
-                    new_price=new,
-                    currency=currency,
-                )
+
+
+def log_price_changes(scrapes: list[Scrape], previous: list[float | None]):
+    for scrape, old in zip(scrapes, previous):
+        if scrape.source != "monitor" or old is None or scrape.price is None:
+            continue
+        if scrape.price != old:
+            logger.info(
+                "monitor.price_changed",
+                observation_id=scrape.observation.id,
+                direction="drop" if scrape.price < old else "increase",
+                old_price=old,
+                new_price=scrape.price,
+                currency=scrape.currency,
             )
 
+
+def share_fresh(db: Session, observation: ProductObservation) -> bool:
+    if not is_fresh(observation, datetime.now(timezone.utc)):
+        return False
+    fan_out_many(db, [shared_scrape(observation)])
     db.commit()
+    return True
 
 
-async def run_monitor_cycle(db: Session):
-    products = db.query(TrackedProduct).filter(TrackedProduct.is_active.is_(True)).all()
+def record_fetch(db: Session, observation: ProductObservation, data: dict):
+    scrape = fetched_scrape(observation, data)
+    log_price_changes([scrape], fan_out_many(db, [scrape]))
+    db.commit()
 
-    for p in products:
-        try:
-            await monitor_one(db, p)
-        except Exception as e:
 
-            print(f"[monitor] failed for {p.id}: {e}")
+async def monitor_one(db: Session, observation: ProductObservation):
+    if share_fresh(db, observation):
+        return
+
+    adapter = pick_adapter(observation.url)
+    if not adapter:
+        request_browser_scrape(db, observation)
+        db.commit()
+        return
+
+    data = await adapter.fetch(observation.url)
+    record_fetch(db, observation, data)
+
+
+async def run_monitor_cycle(session_factory=SessionLocal):
+    # Claims shared observations rather than per-user products, so a product
+    # tracked by many users is fetched once and fanned out to all of them.
+    # Leases keep a concurrent job from taking the same observation; one whose
+    # scrape fails keeps its lease until it expires and is then picked up again.
+    from app.services.pipeline import MonitorPipeline
+
+    try:
+        return await MonitorPipeline(session_factory, worker_id("monitor")).run()
+    finally:
+        logger.info("monitor.page_cache", **page_cache.take_stats())
+        await close_adapters()
+
+
+def worker_cache_path(member: int | None) -> str | None:
+    # Workers on one host would overwrite each other's PAGE_CACHE_PATH; one
+    # file per member slot, so a restarted worker usually starts warm.
+    if member is None or not settings.PAGE_CACHE_PATH:
+        return None
+    root, ext = os.path.splitext(settings.PAGE_CACHE_PATH)
+    return f"{root}.worker-{member}{ext}"
+
+
+async def run_monitor_worker(
+    session_factory=SessionLocal, stop: asyncio.Event | None = None
+):
+    # One of any number of processes splitting the observations between them
+    # by advisory-locked shards (app.services.sharding); runs cycles over its
+    # own shards until stop is set, idling when nothing of its share is due.
+    from app.services.pipeline import MonitorPipeline
+    from app.services.sharding import ShardOwnership
+
+    stop = stop or asyncio.Event()
+    owner = worker_id("monitor")
+    shards = ShardOwnership()
+    await asyncio.to_thread(shards.rebalance)
+    page_cache.path = worker_cache_path(shards.member)
+    balancer = asyncio.create_task(shards.run())
+    try:
+        while not stop.is_set():
+            stats = await MonitorPipeline(
+                session_factory, owner, shards=shards, stop=stop
+            ).run()
+            if stats.claimed:
+                # Per-cycle page cache report and checkpoint, like
+                # run_monitor_cycle's.
+                logger.info("monitor.page_cache", **page_cache.take_stats())
+                page_cache.path = worker_cache_path(shards.member)
+                await asyncio.to_thread(page_cache.write, page_cache.rows())
+                continue
+            try:
+                await asyncio.wait_for(
+                    stop.wait(), settings.MONITOR_WORKER_IDLE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        balancer.cancel()
+        await asyncio.gather(balancer, return_exceptions=True)
+        await asyncio.to_thread(shards.release)
+        logger.info("monitor.page_cache", **page_cache.take_stats())
+        await close_adapters()
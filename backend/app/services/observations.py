@@ -0,0 +1,564 @@
+import re
+from collections.abc import Collection
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from urllib.parse import urlsplit
+
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    Numeric,
+    String,
+    Text,
+    and_,
+    case,
+    cast,
+    column,
+    func,
+    insert,
+    or_,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.price_change import PriceChange
+from app.db.models.price_snapshot import PriceSnapshot
+from app.db.models.product_observation import ProductObservation
+from app.db.models.tracked_product import TrackedProduct
+from app.services.alerts import evaluate_alerts_batch
+from app.services.canonicalize import canonicalize_url
+from app.services.events import queue_event
+from app.services.scheduling import auto_intervals
+from app.services.scrape_queue import is_due, is_unleased
+
+# Noon serves every region from noon.com and puts the storefront in the path.
+STOREFRONT_PATTERN = re.compile(r"^/([a-z]{2,}-[a-z]{2})/")
+
+
+def observation_key(url: str) -> str:
+    # The ASIN alone is not enough: amazon.com and amazon.ae sell the same ASIN
+    # at different prices and currencies, so the storefront is part of the key.
+    parts = urlsplit(url)
+    storefront = STOREFRONT_PATTERN.match(parts.path)
+    host = parts.netloc.lower()
+    if storefront:
+        host = f"{host}/{storefront.group(1)}"
+    return f"{host}:{canonicalize_url(url)}"
+
+
+def get_or_create_observation(
+    db: Session, url: str, marketplace: str
+) -> ProductObservation:
+    fingerprint = observation_key(url)
+    observation_id = db.execute(
+        pg_insert(ProductObservation)
+        .values(fingerprint=fingerprint, url=url, marketplace=marketplace)
+        .on_conflict_do_update(
+            index_elements=[ProductObservation.fingerprint],
+            set_={"fingerprint": fingerprint},
+        )
+        .returning(ProductObservation.id)
+    ).scalar_one()
+    return db.get(ProductObservation, observation_id)
+
+
+def link_observation(db: Session, product: TrackedProduct) -> ProductObservation:
+    if product.observation_id is None:
+        observation = get_or_create_observation(db, product.url, product.marketplace)
+        product.observation_id = observation.id
+        db.flush()
+    return db.get(ProductObservation, product.observation_id)
+
+
+def pull_schedule(db: Session, observation_id: int | None, next_run_at: datetime):
+    # Request handlers run under the caller's RLS context and can't see other
+    # subscribers, so they may only move the shared scrape earlier. Pushing it
+    # later (deactivation, longer interval) is left to refresh_schedule after
+    # the next shared scrape.
+    if observation_id is None:
+        return
+    db.execute(
+        update(ProductObservation)
+        .where(ProductObservation.id == observation_id)
+        .values(
+            next_run_at=func.least(
+                func.coalesce(ProductObservation.next_run_at, next_run_at),
+                next_run_at,
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def refresh_schedule(db: Session, observation_ids: list[int]):
+    # The shared scrape runs as soon as the most eager subscriber is due.
+    # Needs visibility of every subscriber, i.e. the monitor's connection.
+    if not observation_ids:
+        return
+    earliest = (
+        select(
+            func.min(
+                case(
+                    (TrackedProduct.last_scraped_at.is_(None), func.now()),
+                    else_=TrackedProduct.next_run_at,
+                )
+            )
+        )
+        .where(
+            TrackedProduct.observation_id == ProductObservation.id,
+            TrackedProduct.is_active.is_(True),
+        )
+        .scalar_subquery()
+    )
+    db.execute(
+        update(ProductObservation)
+        .where(ProductObservation.id.in_(observation_ids))
+        .values(next_run_at=earliest)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def claim_observations_query(
+    now: datetime, limit: int, partition: tuple[int, Collection[int]] | None = None
+):
+    query = (
+        select(ProductObservation)
+        .where(
+            ProductObservation.next_run_at <= now,
+            or_(
+                ProductObservation.lease_expires_at.is_(None),
+                ProductObservation.lease_expires_at <= now,
+            ),
+            # An extension holding a /products/claim-scrape lease on one of the
+            # subscribers is already scraping it.
+            ~select(TrackedProduct.id)
+            .where(
+                TrackedProduct.observation_id == ProductObservation.id,
+                TrackedProduct.is_active.is_(True),
+                TrackedProduct.lease_expires_at > now,
+            )
+            .exists(),
+        )
+        .order_by(ProductObservation.next_run_at.asc())
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    if partition is not None:
+        # Only the hash partitions (id % shards) this worker owns, see
+        # app.services.sharding.
+        shards, owned = partition
+        query = query.where((ProductObservation.id % shards).in_(sorted(owned)))
+    return query
+
+
+def claim_due_observations(
+    db: Session,
+    *,
+    owner: str,
+    limit: int,
+    lease_seconds: int | None = None,
+    partition: tuple[int, Collection[int]] | None = None,
+) -> list[ProductObservation]:
+    now = datetime.now(timezone.utc)
+    if partition is not None and not partition[1]:
+        return []
+    observations = list(
+        db.execute(claim_observations_query(now, limit, partition)).scalars().all()
+    )
+    expires_at = now + timedelta(
+        seconds=lease_seconds or settings.SCRAPE_LEASE_SECONDS
+    )
+    for observation in observations:
+        observation.lease_owner = owner
+        observation.lease_expires_at = expires_at
+    db.flush()
+    return observations
+
+
+def claim_observation(
+    db: Session,
+    observation_id: int,
+    *,
+    owner: str,
+    lease_seconds: int | None = None,
+) -> ProductObservation | None:
+    # Same lease as claim_due_observations, for callers (the scheduler) that
+    # already know which observation is due.
+    now = datetime.now(timezone.utc)
+    observation = db.execute(
+        claim_observations_query(now, 1).where(ProductObservation.id == observation_id)
+    ).scalar_one_or_none()
+    if observation is None:
+        return None
+    observation.lease_owner = owner
+    observation.lease_expires_at = now + timedelta(
+        seconds=lease_seconds or settings.SCRAPE_LEASE_SECONDS
+    )
+    db.flush()
+    return observation
+
+
+def upcoming_observations(db: Session, until: datetime, limit: int):
+    return db.execute(
+        select(
+            ProductObservation.id,
+            ProductObservation.marketplace,
+            ProductObservation.next_run_at,
+        )
+        .where(
+            ProductObservation.next_run_at.isnot(None),
+            ProductObservation.next_run_at <= until,
+        )
+        .order_by(ProductObservation.next_run_at.asc())
+        .limit(limit)
+    ).all()
+
+
+def record_observation(
+    observation: ProductObservation,
+    *,
+    price: float | None,
+    currency: str | None,
+    availability: str | None,
+    title: str | None = None,
+    image_url: str | None = None,
+    scraped_at: datetime | None = None,
+):
+    observation.last_scraped_at = scraped_at or datetime.now(timezone.utc)
+    if price is not None:
+        observation.last_price = price
+    if currency:
+        observation.currency = currency
+    if availability:
+        observation.last_availability = availability
+    if title:
+        observation.title = title
+    if image_url:
+        observation.image_url = image_url
+
+
+def observe(
+    db: Session,
+    product: TrackedProduct,
+    *,
+    price: float | None,
+    currency: str | None,
+    availability: str | None,
+    title: str | None = None,
+    image_url: str | None = None,
+) -> ProductObservation:
+    """Share a scrape the caller made for one product with the observation."""
+    observation = link_observation(db, product)
+    record_observation(
+        observation,
+        price=price,
+        currency=currency,
+        availability=availability,
+        title=title,
+        image_url=image_url,
+        scraped_at=product.last_scraped_at,
+    )
+    db.flush()
+    if product.next_run_at is not None:
+        pull_schedule(db, observation.id, product.next_run_at)
+    return observation
+
+
+def is_fresh(observation: ProductObservation, now: datetime) -> bool:
+    return (
+        observation.last_scraped_at is not None
+        and settings.OBSERVATION_REUSE_SECONDS > 0
+        and now - observation.last_scraped_at
+        < timedelta(seconds=settings.OBSERVATION_REUSE_SECONDS)
+    )
+
+
+@dataclass
+class Scrape:
+    """One scraped result for an observation, to be fanned out to subscribers."""
+
+    observation: ProductObservation
+    price: float | None
+    currency: str | None
+    availability: str | None
+    source: str
+    raw_price_text: str | None = None
+    title: str | None = None
+    image_url: str | None = None
+    scraped_at: datetime | None = None
+    # False when the page didn't change since this process last fetched it:
+    # subscribers whose last price already matches just have their schedule
+    # advanced.
+    snapshot: bool = True
+
+
+def latest_prices(db: Session, product_ids: list[int]) -> dict[int, Decimal]:
+    # One DISTINCT ON over ix_price_snapshots_product_fetched instead of a
+    # "last snapshot" query per product.
+    if not product_ids:
+        return {}
+    rows = db.execute(
+        select(PriceSnapshot.tracked_product_id, PriceSnapshot.price)
+        .where(
+            PriceSnapshot.tracked_product_id.in_(product_ids),
+            PriceSnapshot.price.isnot(None),
+        )
+        .distinct(PriceSnapshot.tracked_product_id)
+        .order_by(PriceSnapshot.tracked_product_id, PriceSnapshot.fetched_at.desc())
+    )
+    return dict(rows.all())
+
+
+def fan_out(
+    db: Session,
+    observation: ProductObservation,
+    *,
+    price: float | None,
+    currency: str | None,
+    availability: str | None,
+    source: str,
+    raw_price_text: str | None = None,
+    title: str | None = None,
+    image_url: str | None = None,
+    scraped_at: datetime | None = None,
+    snapshot: bool = True,
+) -> float | None:
+    """Record one scrape for every active subscriber; returns the previous price."""
+    scrape = Scrape(
+        observation,
+        price=price,
+        currency=currency,
+        availability=availability,
+        source=source,
+        raw_price_text=raw_price_text,
+        title=title,
+        image_url=image_url,
+        scraped_at=scraped_at,
+        snapshot=snapshot,
+    )
+    return fan_out_many(db, [scrape])[0]
+
+
+def fan_out_many(db: Session, scrapes: list[Scrape]) -> list[float | None]:
+    """Record a batch of scrapes for their subscribers; returns previous prices.
+
+    The statement count doesn't depend on the batch size: the scrapes travel
+    as one VALUES list, the subscribers' last prices come from one DISTINCT ON
+    query, price changes are detected here, snapshots and changes go out as
+    multi-row INSERTs, the crossed alerts are triggered by one UPDATE
+    (evaluate_alerts_batch) and auto-mode intervals come from two grouped
+    queries (auto_intervals). Nothing is committed, and the loaded observations
+    only show the new values once the caller commits.
+    """
+    if not scrapes:
+        return []
+    now = datetime.now(timezone.utc)
+    for scrape in scrapes:
+        scrape.scraped_at = scrape.scraped_at or now
+    by_observation = {scrape.observation.id: scrape for scrape in scrapes}
+    previous = [
+        None if s.observation.last_price is None else float(s.observation.last_price)
+        for s in scrapes
+    ]
+    db.flush()
+
+    batch = values(
+        column("observation_id", Integer),
+        column("scraped_at", DateTime(timezone=True)),
+        column("price", Numeric),
+        column("currency", String),
+        column("availability", String),
+        column("title", Text),
+        column("image_url", Text),
+        name="batch",
+    ).data(
+        [
+            (
+                s.observation.id,
+                s.scraped_at,
+                s.price,
+                s.currency or None,
+                s.availability or None,
+                s.title or None,
+                s.image_url or None,
+            )
+            for s in by_observation.values()
+        ]
+    )
+
+    # Subscribers that already hold this scrape (the user whose extension made
+    # it) are skipped.
+    subscribers = and_(
+        TrackedProduct.observation_id == batch.c.observation_id,
+        TrackedProduct.is_active.is_(True),
+        or_(
+            TrackedProduct.last_scraped_at.is_(None),
+            TrackedProduct.last_scraped_at < batch.c.scraped_at,
+        ),
+    )
+    due = db.execute(
+        select(
+            TrackedProduct.id,
+            TrackedProduct.observation_id,
+            TrackedProduct.currency,
+            TrackedProduct.last_scraped_at.is_(None),
+            TrackedProduct.user_id,
+            TrackedProduct.update_interval,
+            TrackedProduct.interval_mode,
+        ).where(subscribers)
+    ).all()
+    last_prices = latest_prices(db, [product_id for product_id, *_ in due])
+
+    snapshots, changes, prices = [], [], []
+    for product_id, observation_id, product_currency, first, *_ in due:
+        scrape = by_observation[observation_id]
+        old = last_prices.get(product_id)
+        new = (
+            None
+            if scrape.price is None
+            else Decimal(str(scrape.price)).quantize(Decimal("0.01"))
+        )
+        currency = scrape.currency or product_currency or "USD"
+        # Alerts are checked against unchanged prices too: one created since
+        # the price settled may already be met.
+        prices.append((product_id, scrape.price, currency))
+        # "Unchanged" is relative to this process's last fetch of the page;
+        # someone else may have recorded another price since.
+        if not (scrape.snapshot or first) and new is not None and new == old:
+            continue
+        snapshots.append(
+            {
+                "tracked_product_id": product_id,
+                "price": scrape.price,
+                "currency": currency,
+                "raw_price_text": scrape.raw_price_text,
+                "availability": scrape.availability,
+                "source": scrape.source,
+                "fetched_at": scrape.scraped_at,
+            }
+        )
+        if old is not None and new is not None and new != old:
+            changes.append(
+                {
+                    "tracked_product_id": product_id,
+                    "observation_id": observation_id,
+                    "old_price": old,
+                    "new_price": new,
+                    "currency": currency,
+                    "direction": "drop" if new < old else "increase",
+                    "changed_at": scrape.scraped_at,
+                }
+            )
+    # Executemany; SQLAlchemy sends these as multi-row INSERT ... VALUES.
+    if snapshots:
+        db.execute(insert(PriceSnapshot), snapshots)
+    if changes:
+        db.execute(insert(PriceChange), changes)
+    evaluate_alerts_batch(db, prices)
+
+    # Auto-mode subscribers get their interval re-derived from the window
+    # that now includes this scrape, as apply_auto_interval does on ingest.
+    auto_hours = auto_intervals(
+        db,
+        [
+            (product_id, user_id, interval_hours)
+            for product_id, _, _, _, user_id, interval_hours, mode in due
+            if mode == "auto"
+        ],
+    )
+    interval = TrackedProduct.update_interval
+    if auto_hours:
+        interval = case(auto_hours, value=TrackedProduct.id, else_=interval)
+
+    updated = db.execute(
+        update(TrackedProduct)
+        .where(subscribers)
+        .values(
+            last_scraped_at=batch.c.scraped_at,
+            update_interval=interval,
+            next_run_at=batch.c.scraped_at
+            + func.make_interval(0, 0, 0, 0, func.coalesce(interval, 24)),
+            # Live claim-scrape leases belong to an extension; leave them be.
+            lease_owner=case(
+                (TrackedProduct.lease_expires_at > now, TrackedProduct.lease_owner)
+            ),
+            lease_expires_at=case(
+                (TrackedProduct.lease_expires_at > now, TrackedProduct.lease_expires_at)
+            ),
+            last_availability=func.coalesce(
+                batch.c.availability, TrackedProduct.last_availability
+            ),
+            title=func.coalesce(batch.c.title, TrackedProduct.title),
+            image_url=func.coalesce(batch.c.image_url, TrackedProduct.image_url),
+        )
+        .returning(
+            TrackedProduct.id,
+            TrackedProduct.user_id,
+            TrackedProduct.update_interval,
+            TrackedProduct.next_run_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    for product_id, user_id, interval_hours, next_run_at in updated:
+        queue_event(
+            db,
+            user_id,
+            "schedule.changed",
+            product_id=product_id,
+            active=True,
+            interval_hours=interval_hours,
+            next_run_at=next_run_at.isoformat(),
+        )
+
+    # Same rules as record_observation, for the whole batch at once.
+    db.execute(
+        update(ProductObservation)
+        .where(ProductObservation.id == batch.c.observation_id)
+        .values(
+            last_scraped_at=batch.c.scraped_at,
+            last_price=func.coalesce(
+                cast(batch.c.price, ProductObservation.last_price.type),
+                ProductObservation.last_price,
+            ),
+            currency=func.coalesce(batch.c.currency, ProductObservation.currency),
+            last_availability=func.coalesce(
+                batch.c.availability, ProductObservation.last_availability
+            ),
+            title=func.coalesce(batch.c.title, ProductObservation.title),
+            image_url=func.coalesce(batch.c.image_url, ProductObservation.image_url),
+            lease_owner=None,
+            lease_expires_at=None,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    refresh_schedule(db, list(by_observation))
+    return previous
+
+
+def request_browser_scrape(db: Session, observation: ProductObservation):
+    # The backend could not fetch this product (no adapter, blocked, error);
+    # ask the extensions of the subscribers that are due (and not already
+    # claimed by one), which scrape through a real browser.
+    now = datetime.now(timezone.utc)
+    due = db.execute(
+        select(TrackedProduct.id, TrackedProduct.user_id, TrackedProduct.url).where(
+            TrackedProduct.observation_id == observation.id,
+            is_due(now),
+            is_unleased(now),
+        )
+    )
+    for product_id, user_id, url in due:
+        queue_event(
+            db,
+            user_id,
+            "product.due",
+            product_id=product_id,
+            url=url,
+            marketplace=observation.marketplace,
+        )
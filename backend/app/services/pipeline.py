@@ -0,0 +1,359 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import httpx
+import structlog
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.db.models import ProductObservation
+from app.services.observations import (
+    claim_due_observations,
+    fan_out_many,
+    is_fresh,
+    request_browser_scrape,
+)
+from app.services.circuit_breaker import CircuitOpen, breaker_for
+from app.services.rate_limit import bucket_for
+from app.services.sharding import ShardOwnership
+
+logger = structlog.get_logger(__name__)
+
+STAGES = ("fetch", "parse", "persist")
+
+PIPELINE_ITEMS = REGISTRY.counter(
+    "monitor_pipeline_items_total",
+    "Items leaving a monitor pipeline stage.",
+    ["stage", "outcome"],
+)
+PIPELINE_STAGE_SECONDS = REGISTRY.histogram(
+    "monitor_pipeline_stage_seconds",
+    "Time an item spends inside a monitor pipeline stage.",
+    ["stage"],
+)
+PIPELINE_IN_FLIGHT = REGISTRY.gauge(
+    "monitor_pipeline_in_flight",
+    "Items currently inside a pipeline stage.",
+    ["stage"],
+)
+
+
+@dataclass
+class WorkItem:
+    observation_id: int
+    url: str
+    marketplace: str
+    shared: bool = False
+    html: str | None = None
+    response: httpx.Response | None = None
+    data: dict | None = None
+    error: str | None = None
+    rejected: bool = False
+
+
+@dataclass
+class PipelineStats:
+    started: float = field(default_factory=time.monotonic)
+    claimed: int = 0
+    fetched: int = 0
+    parsed: int = 0
+    persisted: int = 0
+    shared: int = 0
+    failed: int = 0
+    rejected: int = 0
+    in_flight: dict[str, int] = field(
+        default_factory=lambda: dict.fromkeys(STAGES, 0)
+    )
+    timings: dict[str, list[float]] = field(
+        default_factory=lambda: {stage: [] for stage in STAGES}
+    )
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def throughput(self) -> float:
+        return self.persisted / self.elapsed if self.elapsed else 0.0
+
+    def stage_ms(self, stage: str, pct: float) -> float:
+        ordered = sorted(self.timings[stage])
+        if not ordered:
+            return 0.0
+        idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return round(ordered[idx] * 1000, 2)
+
+    def as_log(self) -> dict:
+        return {
+            "claimed": self.claimed,
+            "fetched": self.fetched,
+            "parsed": self.parsed,
+            "persisted": self.persisted,
+            "shared": self.shared,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "in_flight": dict(self.in_flight),
+            "p50_ms": {s: self.stage_ms(s, 50) for s in STAGES},
+            "p99_ms": {s: self.stage_ms(s, 99) for s in STAGES},
+            "per_sec": round(self.throughput, 2),
+            "elapsed_s": round(self.elapsed, 1),
+        }
+
+
+class MonitorPipeline:
+    """Claim -> fetch -> parse -> persist, connected by bounded queues.
+
+    Fetches run concurrently under a global semaphore and per-marketplace
+    token buckets; parsing happens off the event loop; persistence is one
+    worker with its own session that writes whatever has queued up (up to
+    MONITOR_PERSIST_BATCH items) in one transaction. A failure only affects
+    its own item, which is handed to the browser extensions (product.due)
+    instead.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        owner: str,
+        *,
+        concurrency: int | None = None,
+        queue_size: int | None = None,
+        parse_workers: int | None = None,
+        persist_batch: int | None = None,
+        shards: ShardOwnership | None = None,
+        stop: asyncio.Event | None = None,
+    ):
+        from app.services.monitor import pick_adapter
+
+        self.session_factory = session_factory
+        self.owner = owner
+        self.pick_adapter = pick_adapter
+        self.concurrency = concurrency or settings.MONITOR_FETCH_CONCURRENCY
+        self.parse_workers = parse_workers or settings.MONITOR_PARSE_WORKERS
+        self.persist_batch = persist_batch or settings.MONITOR_PERSIST_BATCH
+        self.shards = shards
+        self.stop = stop
+        size = queue_size or settings.MONITOR_QUEUE_SIZE
+        self.fetch_q: asyncio.Queue[WorkItem] = asyncio.Queue(size)
+        self.parse_q: asyncio.Queue[WorkItem] = asyncio.Queue(size)
+        self.persist_q: asyncio.Queue[WorkItem] = asyncio.Queue(size)
+        self.fetch_slots = asyncio.Semaphore(self.concurrency)
+        self.stats = PipelineStats()
+
+    def _in_flight(self) -> dict[tuple, float]:
+        return {(stage,): n for stage, n in self.stats.in_flight.items()}
+
+    async def run(self) -> PipelineStats:
+        # One callback per process, dropped when the run ends, so finished
+        # pipelines aren't kept alive by the gauge.
+        PIPELINE_IN_FLIGHT.set_function(self._in_flight, key="pipeline")
+        claim_db = self.session_factory()
+        persist_db = self.session_factory()
+        workers = [
+            asyncio.create_task(self._fetch_worker())
+            for _ in range(self.concurrency)
+        ]
+        workers += [
+            asyncio.create_task(self._parse_worker())
+            for _ in range(self.parse_workers)
+        ]
+        workers.append(asyncio.create_task(self._persist_worker(persist_db)))
+        reporter = asyncio.create_task(self._report())
+        try:
+            await self._feed(claim_db)
+            # Each queue is drained before the next one can be considered done.
+            await self.fetch_q.join()
+            await self.parse_q.join()
+            await self.persist_q.join()
+        finally:
+            for task in [*workers, reporter]:
+                task.cancel()
+            await asyncio.gather(*workers, reporter, return_exceptions=True)
+            await asyncio.to_thread(claim_db.close)
+            await asyncio.to_thread(persist_db.close)
+            PIPELINE_IN_FLIGHT.remove_function("pipeline", self._in_flight)
+
+        logger.info("monitor.pipeline.done", **self.stats.as_log())
+        return self.stats
+
+    def _claim_batch(self, db) -> list[WorkItem]:
+        observations = claim_due_observations(
+            db,
+            owner=self.owner,
+            limit=settings.MONITOR_CLAIM_BATCH,
+            partition=self.shards.partition() if self.shards else None,
+        )
+        now = datetime.now(timezone.utc)
+        items = [
+            WorkItem(o.id, o.url, o.marketplace, shared=is_fresh(o, now))
+            for o in observations
+        ]
+        db.commit()
+        return items
+
+    async def _feed(self, db):
+        while not (self.stop and self.stop.is_set()):
+            items = await asyncio.to_thread(self._claim_batch, db)
+            if not items:
+                return
+            self.stats.claimed += len(items)
+            for item in items:
+                # Results somebody else fetched moments ago skip straight to
+                # persistence; put() blocks while downstream is saturated.
+                await (self.persist_q if item.shared else self.fetch_q).put(item)
+
+    def _enter(self, stage: str, items: int = 1) -> float:
+        self.stats.in_flight[stage] += items
+        return time.perf_counter()
+
+    def _leave(self, stage: str, outcome: str, started: float):
+        elapsed = time.perf_counter() - started
+        self.stats.in_flight[stage] -= 1
+        self.stats.timings[stage].append(elapsed)
+        PIPELINE_ITEMS.inc(stage=stage, outcome=outcome)
+        PIPELINE_STAGE_SECONDS.observe(elapsed, stage=stage)
+
+    async def _fetch_worker(self):
+        while True:
+            item = await self.fetch_q.get()
+            started = self._enter("fetch")
+            outcome = "ok"
+            try:
+                adapter = self.pick_adapter(item.url)
+                if adapter is None:
+                    item.error = "no_adapter"
+                else:
+                    # Refused at once while the marketplace's circuit is open;
+                    # otherwise waits for one of its adaptive slots before
+                    # taking a global one.
+                    async with breaker_for(item.marketplace).slot():
+                        async with self.fetch_slots:
+                            await bucket_for(item.marketplace).acquire()
+                            resp, item.data = await adapter.download(item.url)
+                    if item.data is None:
+                        item.response = resp
+                        item.html = resp.text
+                    self.stats.fetched += 1
+            except CircuitOpen as e:
+                item.error = f"fetch: {e}"
+                item.rejected = True
+                self.stats.rejected += 1
+            except Exception as e:
+                item.error = f"fetch: {e}"
+            finally:
+                if item.error:
+                    outcome = "error"
+                self._leave("fetch", outcome, started)
+                # Streamed and not-modified pages need no parsing.
+                done = item.error or item.data is not None
+                await (self.persist_q if done else self.parse_q).put(item)
+                self.fetch_q.task_done()
+
+    async def _parse_worker(self):
+        while True:
+            item = await self.parse_q.get()
+            started = self._enter("parse")
+            outcome = "ok"
+            try:
+                adapter = self.pick_adapter(item.url)
+                data = await adapter.parse_async(item.url, item.html)
+                item.data = adapter.remember(item.url, item.response, data)
+                item.html = item.response = None
+                self.stats.parsed += 1
+            except Exception as e:
+                item.error = f"parse: {e}"
+                outcome = "error"
+            finally:
+                self._leave("parse", outcome, started)
+                await self.persist_q.put(item)
+                self.parse_q.task_done()
+
+    def _persist_batch(self, db, items: list[WorkItem]):
+        from app.services.monitor import (
+            fetched_scrape,
+            log_price_changes,
+            shared_scrape,
+        )
+
+        now = datetime.now(timezone.utc)
+        scrapes = []
+        try:
+            observations = {
+                o.id: o
+                for o in db.execute(
+                    select(ProductObservation).where(
+                        ProductObservation.id.in_([i.observation_id for i in items])
+                    )
+                ).scalars()
+            }
+            for item in items:
+                observation = observations[item.observation_id]
+                if item.error:
+                    request_browser_scrape(db, observation)
+                elif not item.shared:
+                    scrapes.append(fetched_scrape(observation, item.data))
+                elif is_fresh(observation, now):
+                    scrapes.append(shared_scrape(observation))
+            log_price_changes(scrapes, fan_out_many(db, scrapes))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    async def _persist_worker(self, db):
+        while True:
+            # Take whatever else is already waiting, so the batch grows with
+            # the backlog and a quiet cycle still persists item by item.
+            items = [await self.persist_q.get()]
+            while len(items) < self.persist_batch and not self.persist_q.empty():
+                items.append(self.persist_q.get_nowait())
+            started = self._enter("persist", len(items))
+            errors = {}
+            try:
+                await asyncio.to_thread(self._persist_batch, db, items)
+            except Exception as e:
+                logger.warning(
+                    "monitor.pipeline.batch_failed", items=len(items), error=str(e)
+                )
+                # Redo the batch one item at a time so only the bad one fails.
+                for item in items:
+                    try:
+                        await asyncio.to_thread(self._persist_batch, db, [item])
+                    except Exception as item_error:
+                        errors[item.observation_id] = str(item_error)
+            finally:
+                for item in items:
+                    self._account(item, errors.get(item.observation_id), started)
+                    self.persist_q.task_done()
+
+    def _account(self, item: WorkItem, persist_error: str | None, started: float):
+        outcome = "ok"
+        if persist_error:
+            outcome = "error"
+            self.stats.failed += 1
+            logger.warning(
+                "monitor.pipeline.persist_failed",
+                observation_id=item.observation_id,
+                error=persist_error,
+            )
+        elif item.error:
+            outcome = "error"
+            self.stats.failed += 1
+            if not item.rejected:
+                logger.warning(
+                    "monitor.pipeline.item_failed",
+                    observation_id=item.observation_id,
+                    error=item.error,
+                )
+        else:
+            self.stats.persisted += 1
+            self.stats.shared += item.shared
+        self._leave("persist", outcome, started)
+
+    async def _report(self):
+        while True:
+            await asyncio.sleep(settings.MONITOR_STATS_INTERVAL_SECONDS)
+            logger.info("monitor.pipeline.progress", **self.stats.as_log())
@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+from app.core.config import settings
+
+
+def parse_rates(spec: str) -> dict[str, tuple[float, float]]:
+    # "amazon=2:5,noon=1" -> {"amazon": (2.0, 5.0), "noon": (1.0, 1.0)}
+    rates = {}
+    for part in spec.split(","):
+        name, _, value = part.partition("=")
+        if not name.strip() or not value.strip():
+            continue
+        rate, _, burst = value.partition(":")
+        rates[name.strip()] = (float(rate), float(burst or rate))
+    return rates
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests/second with bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _loop_lock(self) -> asyncio.Lock:
+        # The bucket outlives event loops (repeated asyncio.run() callers), an
+        # asyncio.Lock doesn't; the tokens carry over, the lock is per loop.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        # Waiters queue on the lock, so they are served in arrival order.
+        async with self._loop_lock():
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class Unlimited:
+    async def acquire(self):
+        return None
+
+
+_buckets: dict[str, TokenBucket | Unlimited] = {}
+
+
+def bucket_for(marketplace: str):
+    # Shared per process, so the scheduler and a one-shot cycle running in the
+    # same process never exceed a marketplace's rate together.
+    bucket = _buckets.get(marketplace)
+    if bucket is None:
+        rate = parse_rates(settings.MARKETPLACE_RATE_LIMITS).get(marketplace)
+        bucket = TokenBucket(*rate) if rate and rate[0] > 0 else Unlimited()
+        _buckets[marketplace] = bucket
+    return bucket
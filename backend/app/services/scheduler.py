@@ -0,0 +1,332 @@
+import asyncio
+import heapq
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+
+import structlog
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.db.models import ProductObservation
+from app.db.session import SessionLocal
+from app.marketplaces.page_cache import page_cache
+from app.services.monitor import (
+    close_adapters,
+    pick_adapter,
+    record_fetch,
+    share_fresh,
+)
+from app.services.observations import (
+    claim_observation,
+    request_browser_scrape,
+    upcoming_observations,
+)
+from app.services.circuit_breaker import CircuitOpen, breaker_for
+from app.services.rate_limit import bucket_for
+from app.services.scrape_queue import worker_id
+
+logger = structlog.get_logger(__name__)
+
+SCHEDULER_RUNS = REGISTRY.counter(
+    "scheduler_runs_total",
+    "Observations processed by the scheduler.",
+    ["marketplace", "outcome"],
+)
+SCHEDULER_STATE = REGISTRY.gauge(
+    "scheduler_items", "Scheduler heap, ready and in-flight sizes.", ["state"]
+)
+
+
+def parse_quotas(spec: str) -> dict[str, int]:
+    # "amazon=4,noon=2" -> {"amazon": 4, "noon": 2}
+    quotas = {}
+    for part in spec.split(","):
+        name, _, value = part.partition("=")
+        if name.strip() and value.strip():
+            quotas[name.strip()] = int(value)
+    return quotas
+
+
+class Scheduler:
+    """Long-lived monitor: a heap of observations keyed by next_run_at.
+
+    The heap only holds what is due within the load horizon and is topped up
+    incrementally, so the loop sleeps until the earliest entry (or the next
+    top-up) instead of polling. Due entries wait in per-marketplace ready
+    queues and are started while both the global cap and that marketplace's
+    quota have room.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        *,
+        concurrency: int | None = None,
+        quotas: dict[str, int] | None = None,
+        horizon_seconds: int | None = None,
+        load_batch: int | None = None,
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency or settings.SCHEDULER_CONCURRENCY
+        self.quotas = (
+            quotas
+            if quotas is not None
+            else parse_quotas(settings.SCHEDULER_MARKETPLACE_QUOTAS)
+        )
+        self.horizon = horizon_seconds or settings.SCHEDULER_HORIZON_SECONDS
+        self.load_batch = load_batch or settings.SCHEDULER_LOAD_BATCH
+        self.owner = worker_id("scheduler")
+
+        self._heap: list[tuple[float, int, str]] = []
+        self._scheduled: dict[int, float] = {}
+        self._ready: dict[str, deque[int]] = defaultdict(deque)
+        self._running: set[int] = set()
+        self._in_flight: dict[str, int] = defaultdict(int)
+        self._tasks: set[asyncio.Task] = set()
+        self._next_load = 0.0
+        self._next_checkpoint = 0.0
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task: asyncio.Task | None = None
+
+        # Keyed, so a newer scheduler replaces this one's callback.
+        SCHEDULER_STATE.set_function(self._state, key="scheduler")
+
+    def _state(self) -> dict[tuple, float]:
+        return {
+            ("scheduled",): len(self._scheduled),
+            ("ready",): sum(len(q) for q in self._ready.values()),
+            ("in_flight",): len(self._running),
+        }
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    def request_stop(self):
+        self._stopping = True
+        self._wake.set()
+
+    async def stop(self):
+        self.request_stop()
+        if self._task is not None:
+            await self._task
+
+    def schedule(self, observation_id: int, marketplace: str, when: datetime):
+        """Add or move an entry; stale heap entries are skipped when popped."""
+        ts = when.timestamp()
+        if observation_id in self._running:
+            return
+        if self._scheduled.get(observation_id) == ts:
+            return
+        self._scheduled[observation_id] = ts
+        heapq.heappush(self._heap, (ts, observation_id, marketplace))
+        self._wake.set()
+
+    async def run(self):
+        logger.info(
+            "scheduler.started",
+            owner=self.owner,
+            concurrency=self.concurrency,
+            quotas=self.quotas,
+        )
+        self._next_checkpoint = time.time() + self.horizon / 2
+        while not self._stopping:
+            self._wake.clear()
+            now = time.time()
+            if now >= self._next_load:
+                try:
+                    await self._load(now)
+                except Exception as e:
+                    logger.warning("scheduler.load_failed", error=str(e))
+                    self._next_load = now + 5
+            if now >= self._next_checkpoint:
+                await self._checkpoint(now)
+            self._promote(time.time())
+            self._dispatch()
+
+            wake_at = self._next_load
+            if self._heap:
+                wake_at = min(wake_at, self._heap[0][0])
+            try:
+                await asyncio.wait_for(
+                    self._wake.wait(), timeout=max(0.0, wake_at - time.time())
+                )
+            except asyncio.TimeoutError:
+                pass
+
+        await self._drain()
+        logger.info("scheduler.page_cache", **page_cache.take_stats())
+        await close_adapters()
+        SCHEDULER_STATE.remove_function("scheduler", self._state)
+        logger.info("scheduler.stopped", owner=self.owner)
+
+    async def _checkpoint(self, now: float):
+        # The daemon has no cycles; report page cache savings and persist the
+        # cache every half horizon instead.
+        self._next_checkpoint = now + self.horizon / 2
+        logger.info("scheduler.page_cache", **page_cache.take_stats())
+        await asyncio.to_thread(page_cache.write, page_cache.rows())
+
+    async def _load(self, now: float):
+        until = datetime.fromtimestamp(now + self.horizon, timezone.utc)
+        rows = await asyncio.to_thread(self._fetch_upcoming, until)
+        for observation_id, marketplace, next_run_at in rows:
+            self.schedule(observation_id, marketplace, next_run_at)
+
+        # A full batch only covers the horizon up to its last row; top up from
+        # there once we get close. Schedule changes made elsewhere (a user
+        # shortening an interval) are picked up on the next top-up.
+        self._next_load = now + self.horizon / 2
+        if len(rows) == self.load_batch:
+            self._next_load = max(
+                min(self._next_load, rows[-1][2].timestamp()), now + 1
+            )
+
+    def _fetch_upcoming(self, until: datetime):
+        with self.session_factory() as db:
+            return upcoming_observations(db, until, self.load_batch)
+
+    def _promote(self, now: float):
+        while self._heap and self._heap[0][0] <= now:
+            ts, observation_id, marketplace = heapq.heappop(self._heap)
+            if self._scheduled.get(observation_id) != ts:
+                continue
+            del self._scheduled[observation_id]
+            self._running.add(observation_id)
+            self._ready[marketplace].append(observation_id)
+
+    def _has_room(self, marketplace: str) -> bool:
+        total = sum(self._in_flight.values())
+        quota = self.quotas.get(marketplace, self.concurrency)
+        return total < self.concurrency and self._in_flight[marketplace] < quota
+
+    def _dispatch(self):
+        if self._stopping:
+            return
+        # Round-robin across marketplaces so one busy store can't starve others.
+        progressed = True
+        while progressed:
+            progressed = False
+            for marketplace, ready in list(self._ready.items()):
+                if ready and self._has_room(marketplace):
+                    observation_id = ready.popleft()
+                    self._in_flight[marketplace] += 1
+                    task = asyncio.create_task(
+                        self._process(observation_id, marketplace)
+                    )
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                    progressed = True
+
+    async def _process(self, observation_id: int, marketplace: str):
+        next_run_at = None
+        try:
+            next_run_at = await self._scrape(observation_id, marketplace)
+        finally:
+            self._in_flight[marketplace] -= 1
+            self._running.discard(observation_id)
+            if next_run_at is not None and not self._stopping:
+                self.schedule(observation_id, marketplace, next_run_at)
+            self._wake.set()
+
+    async def _scrape(self, observation_id: int, marketplace: str):
+        # DB work runs in worker threads so an embedded scheduler never blocks
+        # the API's event loop; a session is only ever used by one thread at
+        # a time.
+        breaker = breaker_for(marketplace)
+        if not breaker.allows_request():
+            # Don't even claim it; come back when the circuit half-opens.
+            SCHEDULER_RUNS.inc(marketplace=marketplace, outcome="circuit_open")
+            return datetime.now(timezone.utc) + timedelta(
+                seconds=max(breaker.retry_in(), 1.0)
+            )
+
+        db = self.session_factory()
+        outcome = "ok"
+        try:
+            claimed = await asyncio.to_thread(self._claim, db, observation_id)
+            if claimed is None:
+                outcome = "skipped"
+                return await asyncio.to_thread(
+                    self._next_run_at, db, observation_id
+                )
+
+            observation, url = claimed
+            if await asyncio.to_thread(share_fresh, db, observation):
+                outcome = "shared"
+            else:
+                adapter = pick_adapter(url)
+                if adapter is None:
+                    outcome = "no_adapter"
+                    await asyncio.to_thread(self._request_browser, db, observation)
+                else:
+                    async with breaker.slot():
+                        await bucket_for(marketplace).acquire()
+                        data = await adapter.fetch(url)
+                    await asyncio.to_thread(record_fetch, db, observation, data)
+
+            return await asyncio.to_thread(self._next_run_at, db, observation_id)
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except CircuitOpen as e:
+            # Opened mid-scrape; the lease keeps others off it until it expires.
+            outcome = "circuit_open"
+            await asyncio.to_thread(db.rollback)
+            return datetime.now(timezone.utc) + timedelta(
+                seconds=max(e.retry_in, settings.SCRAPE_LEASE_SECONDS)
+            )
+        except Exception as e:
+            # The lease stays in place and expires; the next top-up requeues it.
+            outcome = "error"
+            logger.warning(
+                "scheduler.scrape_failed", observation_id=observation_id, error=str(e)
+            )
+            await asyncio.to_thread(db.rollback)
+            return None
+        finally:
+            SCHEDULER_RUNS.inc(marketplace=marketplace, outcome=outcome)
+            await asyncio.to_thread(db.close)
+
+    def _claim(self, db, observation_id: int):
+        observation = claim_observation(db, observation_id, owner=self.owner)
+        if observation is None:
+            db.rollback()
+            return None
+        url = observation.url
+        db.commit()
+        return observation, url
+
+    def _request_browser(self, db, observation: ProductObservation):
+        request_browser_scrape(db, observation)
+        db.commit()
+
+    def _next_run_at(self, db, observation_id: int) -> datetime | None:
+        row = db.execute(
+            select(
+                ProductObservation.next_run_at, ProductObservation.lease_expires_at
+            ).where(ProductObservation.id == observation_id)
+        ).first()
+        if row is None or row.next_run_at is None:
+            return None
+        # Leased by another worker: look again once that lease runs out.
+        now = datetime.now(timezone.utc)
+        if row.lease_expires_at is not None and row.lease_expires_at > now:
+            return max(row.next_run_at, row.lease_expires_at)
+        if row.next_run_at <= now:
+            return now + timedelta(seconds=1)
+        return row.next_run_at
+
+    async def _drain(self):
+        if not self._tasks:
+            return
+        logger.info("scheduler.draining", in_flight=len(self._tasks))
+        done, pending = await asyncio.wait(
+            set(self._tasks), timeout=settings.SCHEDULER_SHUTDOWN_GRACE_SECONDS
+        )
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.price_snapshot import PriceSnapshot
+from app.db.models.tracked_product import TrackedProduct
+from app.services.ai_engine import AIEngine, AIResult
+
+INTERVAL_MODES = ("manual", "auto")
+
+
+def auto_interval_hours(
+    current_hours: int,
+    snapshot_count: int,
+    change_count: int,
+    volatility: float | None,
+    auto_products: int,
+) -> int:
+    lo = settings.AUTO_INTERVAL_MIN_HOURS
+    hi = settings.AUTO_INTERVAL_MAX_HOURS
+
+    # Multiplicative control on "changes caught per scrape": if most scrapes
+    # see a new price we are sampling too slowly, if none do we are wasting
+    # scrapes. Step size is capped so one noisy window can't swing it far.
+    hours = float(current_hours or 24)
+    if snapshot_count >= 2:
+        rate = change_count / (snapshot_count - 1)
+        if rate == 0:
+            hours *= 2
+        else:
+            hours *= min(2.0, max(0.5, settings.AUTO_TARGET_CHANGE_RATE / rate))
+
+    if volatility:
+        hours /= 1 + volatility * settings.AUTO_VOLATILITY_WEIGHT
+
+    # Fair share of the user's daily budget across their auto-mode products.
+    budget = settings.AUTO_SCRAPE_BUDGET_PER_USER_DAY
+    if budget > 0 and auto_products > 0:
+        hours = max(hours, 24 * auto_products / budget)
+
+    return int(min(hi, max(lo, round(hours))))
+
+
+def count_auto_products(db: Session, user_id) -> int:
+    return db.execute(
+        select(func.count())
+        .select_from(TrackedProduct)
+        .where(
+            TrackedProduct.user_id == user_id,
+            TrackedProduct.is_active.is_(True),
+            TrackedProduct.interval_mode == "auto",
+        )
+    ).scalar_one()
+
+
+def apply_auto_interval(
+    db: Session, product: TrackedProduct, ai_result: AIResult | None
+) -> bool:
+    """Re-derive update_interval/next_run_at for an auto-mode product."""
+    if product.interval_mode != "auto" or ai_result is None:
+        return False
+
+    hours = auto_interval_hours(
+        product.update_interval,
+        ai_result.snapshot_count,
+        ai_result.change_count,
+        ai_result.volatility,
+        count_auto_products(db, product.user_id),
+    )
+    product.update_interval = hours
+    if product.last_scraped_at:
+        product.next_run_at = product.last_scraped_at + timedelta(hours=hours)
+    return True
+
+
+def auto_intervals(db: Session, products) -> dict[int, int]:
+    """auto_interval_hours for a batch of (product_id, user_id, current_hours).
+
+    The same window and statistics as AIEngine.compute_for_product, for the
+    whole batch in two queries.
+    """
+    products = list(products)
+    if not products:
+        return {}
+    since = datetime.now(timezone.utc) - timedelta(days=AIEngine().window_days)
+    window = (
+        select(
+            PriceSnapshot.tracked_product_id,
+            PriceSnapshot.price,
+            func.lag(PriceSnapshot.price)
+            .over(
+                partition_by=PriceSnapshot.tracked_product_id,
+                order_by=PriceSnapshot.fetched_at,
+            )
+            .label("previous"),
+        )
+        .where(
+            PriceSnapshot.tracked_product_id.in_([p[0] for p in products]),
+            PriceSnapshot.fetched_at >= since,
+            PriceSnapshot.price.isnot(None),
+        )
+        .subquery()
+    )
+    stats = {
+        product_id: (count, changes, std, avg)
+        for product_id, count, changes, std, avg in db.execute(
+            select(
+                window.c.tracked_product_id,
+                func.count(),
+                func.count(case((window.c.previous != window.c.price, 1))),
+                func.stddev_samp(window.c.price),
+                func.avg(window.c.price),
+            ).group_by(window.c.tracked_product_id)
+        )
+    }
+    auto_products = dict(
+        db.execute(
+            select(TrackedProduct.user_id, func.count())
+            .where(
+                TrackedProduct.user_id.in_(list({p[1] for p in products})),
+                TrackedProduct.is_active.is_(True),
+                TrackedProduct.interval_mode == "auto",
+            )
+            .group_by(TrackedProduct.user_id)
+        ).all()
+    )
+
+    hours = {}
+    for product_id, user_id, current_hours in products:
+        count, changes, std, avg = stats.get(product_id, (0, 0, None, None))
+        # _std is 0.0 below two prices, where stddev_samp is NULL.
+        volatility = float(std or 0) / float(avg) if avg and avg > 0 else None
+        hours[product_id] = auto_interval_hours(
+            current_hours, count, changes, volatility, auto_products.get(user_id, 0)
+        )
+    return hours
@@ -0,0 +1,102 @@
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.product_observation import ProductObservation
+from app.db.models.tracked_product import TrackedProduct
+
+
+def worker_id(role: str) -> str:
+    return f"{role}:{socket.gethostname()}:{os.getpid()}"
+
+
+def is_due(now: datetime):
+    return and_(
+        TrackedProduct.is_active.is_(True),
+        or_(
+            TrackedProduct.last_scraped_at.is_(None),
+            TrackedProduct.next_run_at <= now,
+        ),
+    )
+
+
+def is_unleased(now: datetime):
+    return or_(
+        TrackedProduct.lease_expires_at.is_(None),
+        TrackedProduct.lease_expires_at <= now,
+    )
+
+
+def pending_scrape_query(now: datetime, user_id: str, force: bool = False):
+    query = select(TrackedProduct).where(
+        TrackedProduct.is_active.is_(True), TrackedProduct.user_id == user_id
+    )
+    if not force:
+        query = query.where(is_due(now), is_unleased(now))
+    return query
+
+
+def claim_query(now: datetime, limit: int, user_id: str | None = None):
+    # Products whose shared observation the monitor has leased are being
+    # fetched already.
+    monitor_leased = (
+        select(ProductObservation.id)
+        .where(
+            ProductObservation.id == TrackedProduct.observation_id,
+            ProductObservation.lease_expires_at > now,
+        )
+        .exists()
+    )
+    query = (
+        select(TrackedProduct)
+        .where(is_due(now), is_unleased(now), ~monitor_leased)
+        .order_by(TrackedProduct.next_run_at.asc().nulls_first())
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    if user_id is not None:
+        query = query.where(TrackedProduct.user_id == user_id)
+    return query
+
+
+def claim_due_products(
+    db: Session,
+    *,
+    owner: str,
+    limit: int,
+    lease_seconds: int | None = None,
+    user_id: str | None = None,
+) -> list[TrackedProduct]:
+    # FOR UPDATE SKIP LOCKED lets concurrent claimers (browsers, monitor jobs)
+    # each take a disjoint batch without waiting on one another. The lease is
+    # what keeps the rows reserved once this transaction commits; the caller
+    # must commit promptly so other claimers see it.
+    now = datetime.now(timezone.utc)
+    products = list(db.execute(claim_query(now, limit, user_id)).scalars().all())
+
+    expires_at = now + timedelta(
+        seconds=lease_seconds or settings.SCRAPE_LEASE_SECONDS
+    )
+    for product in products:
+        product.lease_owner = owner
+        product.lease_expires_at = expires_at
+    db.flush()
+
+    return products
+
+
+def release_lease(product: TrackedProduct):
+    product.lease_owner = None
+    product.lease_expires_at = None
+
+
+def complete_scrape(product: TrackedProduct, scraped_at: datetime | None = None):
+    product.last_scraped_at = scraped_at or datetime.now(timezone.utc)
+    product.next_run_at = product.last_scraped_at + timedelta(
+        hours=product.update_interval or 24
+    )
+    release_lease(product)
@@ -0,0 +1,142 @@
+import asyncio
+import math
+import threading
+
+import structlog
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.db.session import engine
+
+logger = structlog.get_logger(__name__)
+
+# First key of the two-int advisory locks; the second is the slot or shard.
+MEMBER_LOCK_SPACE = 0x5142
+SHARD_LOCK_SPACE = 0x5143
+
+TRY_LOCK_SQL = text("SELECT pg_try_advisory_lock(:space, :key)")
+UNLOCK_SQL = text("SELECT pg_advisory_unlock(:space, :key)")
+MEMBERS_SQL = text(
+    """
+    SELECT count(*) FROM pg_locks
+    WHERE locktype = 'advisory' AND granted AND objsubid = 2
+      AND classid = CAST(:space AS oid)
+      AND database = (SELECT oid FROM pg_database WHERE datname = current_database())
+    """
+)
+
+SHARDS_OWNED = REGISTRY.gauge(
+    "monitor_shards_owned", "Observation shards this monitor worker owns."
+)
+
+
+class ShardOwnership:
+    """This process's share of product_observations, split by id % shards.
+
+    Ownership is a session-level advisory lock per shard on a dedicated
+    connection, so a worker that dies (or loses its connection) releases its
+    shards with it. Each worker also holds a member slot lock; rebalance()
+    counts the slots taken to work out a fair share, hands back shards above
+    it and picks up free ones below it. Workers beyond the shard count get no
+    slot and wait as standbys. Leases still guard each observation, so a
+    shard changing hands mid-batch can't cause a double scrape.
+    """
+
+    def __init__(self, shards: int | None = None, bind=engine):
+        self.shards = shards or settings.MONITOR_SHARDS
+        self.bind = bind
+        self.owned: frozenset[int] = frozenset()
+        self.member: int | None = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _execute(self, sql, **params):
+        if self._conn is None:
+            self._conn = self.bind.connect().execution_options(
+                isolation_level="AUTOCOMMIT"
+            )
+        return self._conn.execute(sql, params).scalar()
+
+    def _join(self):
+        for slot in range(self.shards):
+            if self._execute(TRY_LOCK_SQL, space=MEMBER_LOCK_SPACE, key=slot):
+                self.member = slot
+                logger.info("monitor.shards.joined", member=slot, shards=self.shards)
+                return
+
+    def rebalance(self) -> frozenset[int]:
+        with self._lock:
+            try:
+                return self._rebalance()
+            except Exception as e:
+                # The locks went with the connection; start over next round.
+                logger.warning(
+                    "monitor.shards.lost", error=str(e), owned=len(self.owned)
+                )
+                self._drop()
+                return self.owned
+
+    def _rebalance(self) -> frozenset[int]:
+        if self.member is None:
+            self._join()
+            if self.member is None:
+                return self.owned
+        members = max(1, self._execute(MEMBERS_SQL, space=MEMBER_LOCK_SPACE))
+        target = math.ceil(self.shards / members)
+
+        owned = set(self.owned)
+        # Hand back the surplus first so a newcomer can take it.
+        for shard in sorted(owned, reverse=True)[: max(0, len(owned) - target)]:
+            self._execute(UNLOCK_SQL, space=SHARD_LOCK_SPACE, key=shard)
+            owned.discard(shard)
+        # Start looking at this member's own stretch of the ring, so workers
+        # joining together mostly try different shards.
+        start = self.member * self.shards // members % self.shards
+        for i in range(self.shards):
+            if len(owned) >= target:
+                break
+            shard = (start + i) % self.shards
+            if shard in owned:
+                continue
+            if self._execute(TRY_LOCK_SQL, space=SHARD_LOCK_SPACE, key=shard):
+                owned.add(shard)
+
+        if owned != self.owned:
+            logger.info(
+                "monitor.shards.rebalanced",
+                member=self.member,
+                members=members,
+                owned=len(owned),
+                target=target,
+            )
+        self.owned = frozenset(owned)
+        SHARDS_OWNED.set(len(self.owned))
+        return self.owned
+
+    def _drop(self):
+        self.owned = frozenset()
+        self.member = None
+        SHARDS_OWNED.set(0)
+        if self._conn is not None:
+            try:
+                self._conn.invalidate()
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def release(self):
+        # Invalidating closes the connection instead of pooling it, which
+        # drops every lock at once.
+        with self._lock:
+            self._drop()
+        logger.info("monitor.shards.released")
+
+    def partition(self) -> tuple[int, frozenset[int]]:
+        return self.shards, self.owned
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(settings.MONITOR_SHARD_REBALANCE_SECONDS)
+            await asyncio.to_thread(self.rebalance)
@@ -0,0 +1,199 @@
+"""Alert evaluation for a burst of snapshots against many untriggered alerts.
+
+Seeds --alerts untriggered target-price alerts spread over --products bench
+products, then evaluates --snapshots (product, price) pairs, --hit-rate of
+them priced under every target, three ways:
+
+  per-snapshot  the old loop: one SELECT per snapshot, ORM updates, a flush
+  indexed       evaluate_alerts per snapshot, cold then warm alert index
+  batch         one evaluate_alerts_batch call (UPDATE ... FROM VALUES)
+
+Every run is rolled back, so each sees the same untriggered alerts:
+
+    python -m benchmarks.alert_eval --snapshots 10000 --alerts 100000
+
+Needs a scratch database at the latest migration; it deletes what it seeded
+afterwards unless --keep.
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy import select, text
+
+from app.db import query_stats
+from app.db.models import PriceEvent
+from app.db.session import SessionLocal, engine
+from app.services.alerts import (
+    alert_index,
+    alert_message,
+    evaluate_alerts,
+    evaluate_alerts_batch,
+)
+
+PREFIX = "alert-bench"
+
+SEED_SQL = [
+    f"""
+    INSERT INTO users (email)
+    SELECT '{PREFIX}-' || g || '@example.invalid'
+    FROM generate_series(1, :users) g
+    """,
+    f"""
+    INSERT INTO tracked_products (
+        user_id, marketplace, url, title, currency, is_active, update_interval,
+        next_run_at
+    )
+    SELECT u.id, 'amazon',
+           'http://www.amazon.ae/{PREFIX}-' || g || '/dp/AB' || lpad(g::text, 8, '0'),
+           'Alert bench product', 'AED', true, 24, now() + interval '30 days'
+    FROM generate_series(1, :products) g
+    JOIN users u ON u.email = '{PREFIX}-' || (1 + g % :users) || '@example.invalid'
+    """,
+    f"""
+    INSERT INTO price_events (
+        url, product_id, target_price, triggered, acknowledged, event_type
+    )
+    SELECT p.url || '#' || g, p.id, 50 + floor(random() * 100), false, false,
+           'target_price'
+    FROM generate_series(1, :alerts) g
+    JOIN (
+        SELECT id, url, row_number() OVER (ORDER BY id) AS n
+        FROM tracked_products
+        WHERE url LIKE 'http://www.amazon.ae/{PREFIX}-%'
+    ) p ON p.n = 1 + g % :products
+    """,
+    "ANALYZE tracked_products",
+    "ANALYZE price_events",
+]
+
+CLEANUP_SQL = [
+    f"""
+    DELETE FROM price_events WHERE product_id IN (
+        SELECT p.id FROM tracked_products p
+        JOIN users u ON u.id = p.user_id
+        WHERE u.email LIKE '{PREFIX}-%'
+    )
+    """,
+    f"DELETE FROM users WHERE email LIKE '{PREFIX}-%'",
+]
+
+PRODUCTS_SQL = f"""
+    SELECT p.id FROM tracked_products p
+    JOIN users u ON u.id = p.user_id
+    WHERE u.email LIKE '{PREFIX}-%'
+"""
+
+
+def run_sql(statements: list[str], params: dict | None = None):
+    with engine.begin() as conn:
+        for sql in statements:
+            conn.execute(text(sql), params or {})
+
+
+def sample_snapshots(product_ids, n: int, hit_rate: float, seed: int = 0):
+    # Hits are priced under every target (50..149), misses over all of them.
+    rng = random.Random(seed)
+    return [
+        (product_id, 10.0 if rng.random() < hit_rate else 1000.0, "AED")
+        for product_id in rng.choices(product_ids, k=n)
+    ]
+
+
+def per_snapshot(db, snapshots) -> int:
+    triggered = 0
+    for product_id, price, currency in snapshots:
+        alerts = db.execute(
+            select(PriceEvent).where(
+                PriceEvent.product_id == product_id,
+                PriceEvent.triggered.is_(False),
+                PriceEvent.target_price >= price,
+            )
+        ).scalars()
+        for alert in alerts:
+            alert.triggered = True
+            alert.triggered_at = datetime.now(timezone.utc)
+            alert.message = alert.message or alert_message(price, currency)
+            triggered += 1
+        db.flush()
+    return triggered
+
+
+def indexed(db, snapshots) -> int:
+    return sum(
+        len(
+            evaluate_alerts(
+                SimpleNamespace(
+                    tracked_product_id=product_id, price=price, currency=currency
+                ),
+                db,
+            )
+        )
+        for product_id, price, currency in snapshots
+    )
+
+
+def batch(db, snapshots) -> int:
+    return len(evaluate_alerts_batch(db, snapshots))
+
+
+def timed(evaluate, snapshots) -> tuple[int, float, query_stats.QueryStats]:
+    db = SessionLocal()
+    token = query_stats.begin()
+    start = time.perf_counter()
+    try:
+        triggered = evaluate(db, snapshots)
+        elapsed = time.perf_counter() - start
+    finally:
+        stats = query_stats.end(token)
+        db.rollback()
+        db.close()
+    return triggered, elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--snapshots", type=int, default=10000)
+    parser.add_argument("--alerts", type=int, default=100000)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--hit-rate", type=float, default=0.02)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    params = {"users": args.users, "products": args.products, "alerts": args.alerts}
+    run_sql(SEED_SQL, params)
+    try:
+        with engine.connect() as conn:
+            product_ids = conn.execute(text(PRODUCTS_SQL)).scalars().all()
+        snapshots = sample_snapshots(product_ids, args.snapshots, args.hit_rate)
+
+        runs = [
+            ("per-snapshot", per_snapshot),
+            ("indexed cold", indexed),
+            ("indexed warm", indexed),
+            ("batch", batch),
+        ]
+        # As if the events listener were connected; rollbacks invalidate
+        # through the in-process hooks, so the index stays accurate here.
+        alert_index.on_listening(True)
+        print(f"{'mode':13} {'triggered':>9} {'ms':>9} {'statements':>10}")
+        for name, evaluate in runs:
+            # Batch runs cold too, so the UPDATE does all of the matching.
+            if name != "indexed warm":
+                alert_index.clear()
+            triggered, elapsed, stats = timed(evaluate, snapshots)
+            print(
+                f"{name:13} {triggered:9d} {elapsed * 1000:9.1f} {stats.count:10d}"
+            )
+    finally:
+        alert_index.on_listening(False)
+        if not args.keep:
+            run_sql(CLEANUP_SQL)
+
+
+if __name__ == "__main__":
+    main()
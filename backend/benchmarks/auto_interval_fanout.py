@@ -0,0 +1,196 @@
+"""Auto-mode intervals on the monitor path (fan_out_many) against the route rule.
+
+Seeds --observations observations, each tracked by all of --users bench users
+(a fifth of the products in manual mode), with a month of snapshot history of
+varying volatility. One monitor batch then fans a scrape of every observation
+out to its subscribers, and each product's new update_interval/next_run_at is
+checked against what the extension routes would have set: AIEngine over the
+same window fed to auto_interval_hours, as apply_auto_interval does.
+
+    python -m benchmarks.auto_interval_fanout --observations 50 --users 40
+
+Manual-mode products must keep their interval. Reports mismatches, the
+interval spread and the fan-out's statements and time; the batch is rolled
+back. Needs a scratch database at the latest migration; it deletes what it
+seeded afterwards unless --keep.
+"""
+
+import argparse
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+
+from sqlalchemy import select, text
+
+from app.db import query_stats
+from app.db.models import ProductObservation, TrackedProduct
+from app.db.session import SessionLocal, engine
+from app.services.ai_engine import AIEngine
+from app.services.observations import Scrape, fan_out_many
+from app.services.scheduling import auto_interval_hours, count_auto_products
+
+PREFIX = "auto-interval-bench"
+
+SEED_SQL = [
+    f"""
+    INSERT INTO users (email)
+    SELECT '{PREFIX}-' || g || '@example.invalid'
+    FROM generate_series(1, :users) g
+    """,
+    f"""
+    INSERT INTO product_observations (
+        fingerprint, marketplace, url, currency, next_run_at
+    )
+    SELECT '{PREFIX}:' || url, 'amazon', url, 'AED', now() - interval '1 minute'
+    FROM (
+        SELECT 'http://www.amazon.ae/{PREFIX}-' || g || '/dp/AI'
+               || lpad(g::text, 8, '0') AS url
+        FROM generate_series(1, :observations) g
+    ) seeded
+    """,
+    f"""
+    INSERT INTO tracked_products (
+        user_id, marketplace, url, title, currency, is_active, update_interval,
+        interval_mode, next_run_at, last_scraped_at, observation_id
+    )
+    SELECT u.id, o.marketplace, o.url, 'Auto interval bench product', 'AED',
+           true, (ARRAY[6, 12, 24, 48])[1 + (u.id + o.id) % 4],
+           CASE WHEN (u.id + o.id) % 5 = 0 THEN 'manual' ELSE 'auto' END,
+           now() - interval '1 minute', now() - interval '1 hour', o.id
+    FROM product_observations o
+    CROSS JOIN users u
+    WHERE o.fingerprint LIKE '{PREFIX}:%' AND u.email LIKE '{PREFIX}-%'
+    """,
+    # A month of history per product; id % 4 sets how much the price moves,
+    # from flat to a change on most snapshots.
+    f"""
+    INSERT INTO price_snapshots (
+        tracked_product_id, price, currency, source, fetched_at
+    )
+    SELECT p.id, 100 + (p.id % 4) * floor(random() * 3), 'AED', 'bench',
+           now() - interval '1 hour' - (g || ' hours')::interval * 23
+    FROM tracked_products p
+    CROSS JOIN generate_series(0, 29) g
+    WHERE p.url LIKE 'http://www.amazon.ae/{PREFIX}-%'
+    """,
+    "ANALYZE tracked_products",
+    "ANALYZE price_snapshots",
+]
+
+CLEANUP_SQL = [
+    f"DELETE FROM users WHERE email LIKE '{PREFIX}-%'",
+    f"DELETE FROM product_observations WHERE fingerprint LIKE '{PREFIX}:%'",
+]
+
+
+def run_sql(statements: list[str], params: dict | None = None):
+    with engine.begin() as conn:
+        for sql in statements:
+            conn.execute(text(sql), params or {})
+
+
+def bench_products(db):
+    return db.execute(
+        select(
+            TrackedProduct.id,
+            TrackedProduct.user_id,
+            TrackedProduct.interval_mode,
+            TrackedProduct.update_interval,
+            TrackedProduct.last_scraped_at,
+            TrackedProduct.next_run_at,
+        ).where(TrackedProduct.url.like(f"http://www.amazon.ae/{PREFIX}-%"))
+    ).all()
+
+
+def expected_hours(db, ai_engine, product, current_hours) -> int:
+    ai = ai_engine.compute_for_product(db, product.id)
+    return auto_interval_hours(
+        current_hours,
+        ai.snapshot_count,
+        ai.change_count,
+        ai.volatility,
+        count_auto_products(db, product.user_id),
+    )
+
+
+def run(seed: int):
+    rng = random.Random(seed)
+    db = SessionLocal()
+    try:
+        before = {row.id: row.update_interval for row in bench_products(db)}
+        observations = (
+            db.execute(
+                select(ProductObservation).where(
+                    ProductObservation.fingerprint.like(f"{PREFIX}:%")
+                )
+            )
+            .scalars()
+            .all()
+        )
+        scrapes = [
+            Scrape(
+                observation,
+                price=100 + rng.choice([0, 0, 1, 2]),
+                currency="AED",
+                availability="in_stock",
+                source="bench",
+            )
+            for observation in observations
+        ]
+
+        token = query_stats.begin()
+        start = time.perf_counter()
+        try:
+            fan_out_many(db, scrapes)
+            elapsed = time.perf_counter() - start
+        finally:
+            stats = query_stats.end(token)
+
+        ai_engine = AIEngine()
+        mismatches, spread = [], Counter()
+        for product in bench_products(db):
+            current = before[product.id]
+            if product.interval_mode == "auto":
+                want = expected_hours(db, ai_engine, product, current)
+            else:
+                want = current
+            spread[(product.interval_mode, product.update_interval)] += 1
+            due = product.last_scraped_at + timedelta(hours=want)
+            if product.update_interval != want or product.next_run_at != due:
+                mismatches.append((product.id, current, want, product.update_interval))
+        return len(before), mismatches, spread, elapsed, stats
+    finally:
+        db.rollback()
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--observations", type=int, default=50)
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    run_sql(SEED_SQL, {"observations": args.observations, "users": args.users})
+    try:
+        products, mismatches, spread, elapsed, stats = run(args.seed)
+    finally:
+        if not args.keep:
+            run_sql(CLEANUP_SQL)
+
+    print(
+        f"{products} subscribers of {args.observations} observations fanned out "
+        f"in {elapsed * 1000:.1f} ms, {stats.count} statements"
+    )
+    print(f"{'mode':7} {'hours':>5} {'products':>8}")
+    for (mode, hours), count in sorted(spread.items()):
+        print(f"{mode:7} {hours:5d} {count:8d}")
+    print(f"{len(mismatches)} mismatches against the route rule")
+    for product_id, current, want, got in mismatches[:20]:
+        print(f"  product {product_id}: from {current}h want {want}h got {got}h")
+
+
+if __name__ == "__main__":
+    main()
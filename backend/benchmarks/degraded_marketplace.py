@@ -0,0 +1,122 @@
+"""How long a degraded marketplace holds up a batch of fetches.
+
+A local stub answers every product request with a 503 (or, with
+--captcha, a 200 robot-check page). The batch is fetched through the Amazon
+adapter once with the circuit breaker effectively disabled (every product
+pays the full retry schedule) and once with the configured breaker:
+
+    python -m benchmarks.degraded_marketplace --fetches 200 --concurrency 10
+    python -m benchmarks.degraded_marketplace --captcha --healthy-after 5
+
+--healthy-after N makes the stub recover after N seconds, to watch the
+half-open probe close the circuit again. Needs openssl on PATH.
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.marketplaces.amazon import AmazonAdapter
+from app.services import circuit_breaker
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpen
+from benchmarks.stub_server import StubServer
+
+CAPTCHA = (
+    b"<html><head><title>Robot Check</title></head><body>"
+    b"<form action='/errors/validateCaptcha'>Type the characters</form>"
+    b"</body></html>"
+)
+PAGE = (
+    b"<html><body><span id='productTitle'>Stub product</span>"
+    b"<span class='a-price'><span class='a-offscreen'>$19.99</span></span>"
+    b"</body></html>"
+)
+
+
+class DegradedServer(StubServer):
+    def __init__(self, captcha: bool, healthy_after: float | None, **kwargs):
+        super().__init__(PAGE, **kwargs)
+        self.captcha = captcha
+        self.healthy_at = (
+            time.monotonic() + healthy_after if healthy_after is not None else None
+        )
+
+    async def respond(self, method: str, target: str, headers: dict) -> tuple:
+        if self.healthy_at is not None and time.monotonic() >= self.healthy_at:
+            return await super().respond(method, target, headers)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.captcha:
+            return 200, {"Content-Type": self.content_type}, CAPTCHA
+        return 503, {"Content-Type": "text/plain", "Retry-After": "30"}, b"busy"
+
+
+async def run(args, breaker: CircuitBreaker, gated: bool) -> dict:
+    circuit_breaker._breakers["amazon"] = breaker
+    semaphore = asyncio.Semaphore(args.concurrency)
+    async with DegradedServer(
+        args.captcha, args.healthy_after, latency=args.latency
+    ) as server:
+        adapter = AmazonAdapter(verify=server.client_context, proxy="", parser="fast")
+        counts = {"ok": 0, "failed": 0, "rejected": 0}
+
+        async def one(i: int):
+            if args.spacing:
+                await asyncio.sleep(i * args.spacing)
+            try:
+                async with breaker.slot() if gated else semaphore:
+                    await adapter.fetch(f"{server.url}/dp/B0{i:08d}")
+                counts["ok"] += 1
+            except CircuitOpen:
+                counts["rejected"] += 1
+            except Exception:
+                counts["failed"] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.fetches)))
+        elapsed = time.perf_counter() - start
+        await adapter.aclose()
+        return {
+            **counts,
+            "elapsed": elapsed,
+            "requests": server.requests,
+            "state": breaker.state,
+            "limit": breaker.limit,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fetches", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--captcha", action="store_true")
+    parser.add_argument("--healthy-after", type=float, default=None)
+    parser.add_argument(
+        "--spacing", type=float, default=0.0, help="seconds between fetch starts"
+    )
+    args = parser.parse_args()
+
+    # "no breaker" never trips and uses a fixed semaphore, i.e. the old
+    # per-product retries at constant concurrency.
+    modes = {
+        "no breaker": (CircuitBreaker("amazon", min_requests=10**9), False),
+        "breaker": (
+            CircuitBreaker("amazon", max_concurrency=args.concurrency),
+            True,
+        ),
+    }
+    print(
+        f"{'mode':11} {'seconds':>8} {'requests':>9} {'ok':>5} {'failed':>7} "
+        f"{'rejected':>9} {'state':>10} {'limit':>6}"
+    )
+    for name, (breaker, gated) in modes.items():
+        r = asyncio.run(run(args, breaker, gated))
+        print(
+            f"{name:11} {r['elapsed']:8.1f} {r['requests']:9d} {r['ok']:5d} "
+            f"{r['failed']:7d} {r['rejected']:9d} {r['state']:>10} {r['limit']:6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
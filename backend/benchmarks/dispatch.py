@@ -0,0 +1,109 @@
+"""URL -> marketplace dispatch cost as the number of marketplaces grows.
+
+"linear" is the old shape: walk a list of adapters asking each can_handle
+(a substring test) and then run both product id regexes. "registry" is
+pick_adapter plus canonicalize_url over app.marketplaces.registry. Both are
+padded with --extra synthetic marketplaces to show how the per-URL cost
+scales with the registry size:
+
+    python -m benchmarks.dispatch --urls 20000 --extra 0 --extra 50 --extra 500
+"""
+
+import argparse
+import random
+import re
+import time
+
+from app.marketplaces import registry
+from app.marketplaces.registry import AMAZON_ASIN_PATTERN, AMAZON_DOMAINS, Marketplace
+from app.services.canonicalize import canonicalize_url
+from app.services.monitor import pick_adapter
+
+NOON_LOCALES = ("uae-en", "saudi-en", "egypt-en")
+SYNTHETIC_PATTERN = re.compile(r"/item/([A-Z0-9]+)", re.IGNORECASE)
+
+
+def sample_urls(n: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    domains = list(AMAZON_DOMAINS)
+    urls = []
+    for i in range(n):
+        if i % 3 == 0:
+            locale = rng.choice(NOON_LOCALES)
+            urls.append(f"https://www.noon.com/{locale}/item-{i}/N{i:08d}V/p/?o=1")
+        else:
+            domain = rng.choice(domains)
+            urls.append(f"https://www.{domain}/item-{i}/dp/B{i:09d}?th=1")
+    return urls
+
+
+class SubstringAdapter:
+    def __init__(self, needle: str):
+        self.needle = needle
+
+    def can_handle(self, url: str) -> bool:
+        return self.needle in url
+
+
+def legacy_canonicalize(url: str) -> str:
+    base_url = url.split("?")[0].split("#")[0]
+    for prefix, pattern in (
+        ("AMZN", AMAZON_ASIN_PATTERN),
+        ("NOON", registry.NOON_SKU_PATTERN),
+    ):
+        match = pattern.search(base_url)
+        if match:
+            return f"{prefix}-{match.group(1).upper()}"
+    return base_url.lower().rstrip("/")
+
+
+def run_linear(urls: list[str], extra: int) -> float:
+    # Synthetic shops go first, as a registry grown over time would have them
+    # ahead of at least some real traffic.
+    adapters = [SubstringAdapter(f"shop{i}.") for i in range(extra)]
+    adapters += [SubstringAdapter("amazon."), SubstringAdapter("noon.com")]
+    start = time.perf_counter()
+    for url in urls:
+        next(a for a in adapters if a.can_handle(url))
+        legacy_canonicalize(url)
+    return time.perf_counter() - start
+
+
+def run_registry(urls: list[str], extra: int) -> float:
+    added = {
+        f"shop{i}.com": Marketplace(
+            f"shop{i}", f"shop{i}.com", "USD", SYNTHETIC_PATTERN, f"S{i}"
+        )
+        for i in range(extra)
+    }
+    registry.MARKETPLACES.update(added)
+    registry.lookup_host.cache_clear()
+    try:
+        canonicalize = canonicalize_url.__wrapped__  # no lru_cache hits
+        start = time.perf_counter()
+        for url in urls:
+            pick_adapter(url)
+            canonicalize(url)
+        return time.perf_counter() - start
+    finally:
+        for domain in added:
+            del registry.MARKETPLACES[domain]
+        registry.lookup_host.cache_clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--urls", type=int, default=20000)
+    parser.add_argument("--extra", type=int, action="append", default=None)
+    args = parser.parse_args()
+    urls = sample_urls(args.urls)
+
+    print(f"{'extra':>6} {'linear us/url':>14} {'registry us/url':>16}")
+    for extra in args.extra or [0, 50, 500]:
+        linear = run_linear(urls, extra) / len(urls) * 1e6
+        mapped = run_registry(urls, extra) / len(urls) * 1e6
+        print(f"{extra:6d} {linear:14.2f} {mapped:16.2f}")
+
+
+if __name__ == "__main__":
+    main()
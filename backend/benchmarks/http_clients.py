@@ -0,0 +1,101 @@
+"""Per-fetch vs pooled marketplace HTTP clients against a local HTTPS stub.
+
+"per-fetch" reproduces the old adapters (a new httpx.AsyncClient, so a new
+TCP + TLS handshake, for every product); "pooled" goes through the adapter's
+long-lived client:
+
+    python -m benchmarks.http_clients --fetches 2000 --concurrency 20
+    python -m benchmarks.http_clients --latency 0.05 --mode pooled
+
+Needs openssl on PATH for the throwaway certificate.
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from app.marketplaces.amazon import AmazonAdapter
+from app.marketplaces.base import DEFAULT_USER_AGENT
+from benchmarks.load_test import percentile
+from benchmarks.stub_server import StubServer
+
+PAGE = (
+    b"<html><body><span id='productTitle'>Stub product</span>"
+    + b"<span class='a-price'><span class='a-offscreen'>$19.99</span></span>"
+    + b"<div>" + b"x" * 200_000 + b"</div></body></html>"
+)
+
+
+def per_fetch_getter(verify):
+    async def get(url):
+        async with httpx.AsyncClient(
+            headers={"User-Agent": DEFAULT_USER_AGENT},
+            timeout=10,
+            follow_redirects=True,
+            verify=verify,
+        ) as client:
+            r = await client.get(url)
+            r.raise_for_status()
+            return r
+
+    return get, None
+
+
+def pooled_getter(verify):
+    adapter = AmazonAdapter(verify=verify, proxy="")
+    return adapter.get, adapter.aclose
+
+
+async def run_mode(mode: str, args) -> dict:
+    async with StubServer(PAGE, latency=args.latency) as server:
+        getter, close = (per_fetch_getter if mode == "per-fetch" else pooled_getter)(
+            server.client_context
+        )
+        sem = asyncio.Semaphore(args.concurrency)
+        latencies: list[float] = []
+
+        async def one(i):
+            async with sem:
+                start = time.perf_counter()
+                await getter(f"{server.url}/dp/B0STUB{i:05d}")
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.fetches)))
+        elapsed = time.perf_counter() - started
+        if close is not None:
+            await close()
+
+        return {
+            "mode": mode,
+            "fetches_per_sec": args.fetches / elapsed,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "connections": server.connections,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fetches", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument(
+        "--mode", choices=["per-fetch", "pooled", "both"], default="both"
+    )
+    args = parser.parse_args()
+
+    modes = ["per-fetch", "pooled"] if args.mode == "both" else [args.mode]
+    print(f"{'mode':10} {'fetches/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'conns':>6}")
+    for mode in modes:
+        r = asyncio.run(run_mode(mode, args))
+        print(
+            f"{r['mode']:10} {r['fetches_per_sec']:10.1f} {r['p50_ms']:8.2f} "
+            f"{r['p99_ms']:8.2f} {r['connections']:6d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Closed-loop HTTP load generator for the hot API endpoints.
+
+Run it against a live server on the old and new code to compare throughput:
+
+    python -m benchmarks.load_test --base-url http://localhost:8000 \\
+        --token "$JWT" --concurrency 500 --duration 30
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+SCENARIOS = {
+    "pending-scrape": ("GET", "/api/v1/products/pending-scrape", None),
+    "dashboard": ("GET", "/dashboard/products", None),
+    "alerts": ("GET", "/api/v1/alerts/pending", None),
+    "track": (
+        "POST",
+        "/api/v1/track/browser",
+        {
+            "url": "https://www.amazon.com/dp/B0LOADTEST",
+            "marketplace": "amazon",
+            "title": "Load test product",
+            "price_raw": "$19.99",
+            "availability": "in_stock",
+        },
+    ),
+}
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def client_loop(client, method, path, body, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            r = await client.request(method, path, json=body)
+            if r.status_code >= 400:
+                errors.append(r.status_code)
+            else:
+                latencies.append(time.perf_counter() - start)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+
+
+async def run(args) -> dict:
+    method, path, body = SCENARIOS[args.scenario]
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    limits = httpx.Limits(
+        max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+    )
+    latencies: list[float] = []
+    errors: list = []
+
+    async with httpx.AsyncClient(
+        base_url=args.base_url, headers=headers, limits=limits, timeout=60
+    ) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(
+                client_loop(client, method, path, body, deadline, latencies, errors)
+                for _ in range(args.concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+    return {
+        "scenario": args.scenario,
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 2),
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", default=None)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="pending-scrape")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30.0)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
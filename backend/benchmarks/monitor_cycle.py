@@ -0,0 +1,214 @@
+"""End-to-end monitor cycle over synthetic products against a stub marketplace.
+
+Seeds --products due observations (each with one tracked product, spread
+over --users bench users) whose URLs are http://www.amazon.ae/... and
+http://www.noon.com/uae-en/..., points the adapters' proxy at a local
+StubMarketplace replaying the corpus (or a recorder directory) and runs one
+real run_monitor_cycle: claim, fetch, parse, fan-out and commit against the
+configured database. Reports throughput, p50/p99 per pipeline stage, DB
+statements and time, and what the stub served:
+
+    python -m benchmarks.monitor_cycle --products 10000 --latency 0.08
+    python -m benchmarks.monitor_cycle --error-rate 0.02 --throttle-rps 200
+    python -m benchmarks.monitor_cycle --no-streaming --pad-kb 1200
+    python -m benchmarks.monitor_cycle --persist-batch 1   # per-product commits
+
+Needs a scratch database at the latest migration; it refuses to run while
+non-bench observations are due (--force overrides) and deletes what it
+seeded afterwards unless --keep. Marketplace rate limits are lifted unless
+--rate-limits is given, so the stub's throttling is what pushes back.
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db import query_stats
+from app.db.session import SessionLocal, engine
+from app.marketplaces.page_cache import page_cache
+from app.services import monitor, rate_limit
+from app.services.monitor import run_monitor_cycle
+from app.services.pipeline import STAGES
+from benchmarks.parsers import CORPUS
+from benchmarks.stub_marketplace import (
+    StubMarketplace,
+    load_pages,
+    load_recordings,
+)
+
+PREFIX = "monitor-bench"
+
+SEED_SQL = [
+    f"""
+    INSERT INTO users (email)
+    SELECT '{PREFIX}-' || g || '@example.invalid'
+    FROM generate_series(1, :users) g
+    """,
+    f"""
+    INSERT INTO product_observations (
+        fingerprint, marketplace, url, currency, next_run_at
+    )
+    SELECT '{PREFIX}:' || url, marketplace, url, 'AED', now() - interval '1 minute'
+    FROM (
+        SELECT
+            CASE WHEN g % 100 < :noon_pct THEN 'noon' ELSE 'amazon' END AS marketplace,
+            CASE WHEN g % 100 < :noon_pct
+                THEN 'http://www.noon.com/uae-en/bench-' || g || '/N'
+                     || lpad(g::text, 8, '0') || 'V/p/'
+                ELSE 'http://www.amazon.ae/bench-' || g || '/dp/MB'
+                     || lpad(g::text, 8, '0')
+            END AS url
+        FROM generate_series(1, :products) g
+    ) seeded
+    """,
+    f"""
+    INSERT INTO tracked_products (
+        user_id, marketplace, url, title, currency, is_active, update_interval,
+        next_run_at, last_availability, observation_id
+    )
+    SELECT u.id, o.marketplace, o.url, 'Monitor bench product', 'AED', true, 24,
+           now() - interval '1 minute', 'in_stock', o.id
+    FROM product_observations o
+    JOIN users u
+      ON u.email = '{PREFIX}-' || (1 + o.id % :users) || '@example.invalid'
+    WHERE o.fingerprint LIKE '{PREFIX}:%'
+    """,
+    "ANALYZE product_observations",
+    "ANALYZE tracked_products",
+]
+
+CLEANUP_SQL = [
+    f"""
+    DELETE FROM price_events WHERE product_id IN (
+        SELECT p.id FROM tracked_products p
+        JOIN users u ON u.id = p.user_id
+        WHERE u.email LIKE '{PREFIX}-%'
+    )
+    """,
+    f"DELETE FROM users WHERE email LIKE '{PREFIX}-%'",
+    f"DELETE FROM product_observations WHERE fingerprint LIKE '{PREFIX}:%'",
+]
+
+OTHER_DUE_SQL = f"""
+    SELECT count(*) FROM product_observations
+    WHERE next_run_at <= now() AND fingerprint NOT LIKE '{PREFIX}:%'
+"""
+
+
+def run_sql(statements: list[str], params: dict | None = None):
+    with engine.begin() as conn:
+        for sql in statements:
+            conn.execute(text(sql), params or {})
+
+
+def other_due() -> int:
+    with engine.connect() as conn:
+        return conn.execute(text(OTHER_DUE_SQL)).scalar()
+
+
+async def run(args) -> tuple:
+    server = StubMarketplace(
+        load_pages(args.corpus, args.pad_kb),
+        recordings=load_recordings(args.recordings) if args.recordings else None,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        captcha_rate=args.captcha_rate,
+        throttle_rps=args.throttle_rps,
+    )
+    async with server:
+        for adapter in monitor.adapters:
+            await adapter.aclose()
+            adapter.proxy = server.url
+
+        token = query_stats.begin()
+        start = time.perf_counter()
+        try:
+            stats = await run_monitor_cycle(SessionLocal)
+        finally:
+            db = query_stats.end(token)
+        elapsed = time.perf_counter() - start
+    return stats, db, elapsed, server
+
+
+def report(args, stats, db, elapsed, server):
+    print(
+        f"{stats.claimed} claimed, {stats.persisted} persisted, "
+        f"{stats.failed} failed ({stats.rejected} refused by a circuit) "
+        f"in {elapsed:.1f}s"
+    )
+    print(f"fetches/s {stats.fetched / elapsed:8.1f}")
+    print(f"items/s   {stats.persisted / elapsed:8.1f}")
+    print()
+    print(f"{'stage':8} {'items':>7} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for stage in STAGES:
+        timings = stats.timings[stage]
+        mean = sum(timings) / len(timings) * 1000 if timings else 0.0
+        print(
+            f"{stage:8} {len(timings):7d} {mean:8.2f} "
+            f"{stats.stage_ms(stage, 50):8.2f} {stats.stage_ms(stage, 99):8.2f}"
+        )
+    print()
+    per_1k = 1000 / max(stats.persisted, 1)
+    print(
+        f"db: {db.count} statements, {db.total_seconds * 1000:.0f} ms total, "
+        f"{db.total_seconds * 1000 * per_1k:.0f} ms and "
+        f"{db.count * per_1k:.0f} statements per 1k products "
+        f"(persist batch {settings.MONITOR_PERSIST_BATCH})"
+    )
+    print(f"stub: {dict(sorted(server.statuses.items()))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--noon-share", type=float, default=0.3)
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--recordings", default=None)
+    parser.add_argument("--pad-kb", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--captcha-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rps", type=float, default=0.0)
+    parser.add_argument("--rate-limits", default="")
+    parser.add_argument(
+        "--persist-batch", type=int, default=settings.MONITOR_PERSIST_BATCH
+    )
+    parser.add_argument(
+        "--streaming", action=argparse.BooleanOptionalAction, default=None
+    )
+    parser.add_argument("--keep", action="store_true")
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    if not args.force and other_due():
+        parser.error("non-bench observations are due; use a scratch database")
+
+    settings.MARKETPLACE_RATE_LIMITS = args.rate_limits
+    settings.MONITOR_PERSIST_BATCH = args.persist_batch
+    rate_limit._buckets.clear()
+    if args.streaming is not None:
+        settings.STREAMING_FETCH = args.streaming
+    # A throwaway corpus shouldn't end up in the monitor's persisted cache.
+    page_cache.path = None
+
+    params = {
+        "users": args.users,
+        "products": args.products,
+        "noon_pct": int(args.noon_share * 100),
+    }
+    run_sql(SEED_SQL, params)
+    try:
+        report(args, *asyncio.run(run(args)))
+    finally:
+        if not args.keep:
+            run_sql(CLEANUP_SQL)
+
+
+if __name__ == "__main__":
+    main()
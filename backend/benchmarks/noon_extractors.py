@@ -0,0 +1,108 @@
+"""Noon extraction: DOM engines vs the embedded page-state ("json") engine.
+
+Runs every noon engine over benchmarks/corpus/noon and checks title and
+price against expected.json next to the pages. Most live noon pages render
+the price client-side, so the DOM engines find nothing there; the
+next-data-* fixtures reproduce that shell, ld-json.html carries only
+schema.org markup and legacy-dom.html is an old server-rendered page:
+
+    python -m benchmarks.noon_extractors --pad-kb 800 --state-kb 400
+
+--pad-kb adds filler markup to the page head as in benchmarks.parsers;
+--state-kb grows the __NEXT_DATA__ blob, which on real pages carries the
+whole hydration cache and is what json.loads pays for.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+
+from app.marketplaces.extractors import EXTRACTORS, extract
+from app.services.pricing import parse_price_to_decimal
+from benchmarks.load_test import percentile
+from benchmarks.parsers import CORPUS, load_corpus
+
+STATE_ANCHOR = '"gssp":true'
+
+
+def hydration_cache(kb: int) -> str:
+    rng = random.Random(kb)
+    entries = {}
+    size = 0
+    while size < kb * 1024:
+        n = rng.randint(1, 10**6)
+        entry = {
+            "sku": f"N{n:08d}V",
+            "name": f"Catalog item {n}",
+            "offers": [{"price": n % 997, "sale_price": None}],
+            "tags": ["deal", "express"] if n % 3 else [],
+        }
+        entries[f"ROOT_QUERY.product({n})"] = entry
+        size += len(json.dumps(entry)) + 30
+    return json.dumps(entries, separators=(",", ":"))
+
+
+def load_pages(corpus: str, pad_kb: int, state_kb: int) -> list[tuple[str, str]]:
+    cache = hydration_cache(state_kb) if state_kb else None
+    pages = []
+    for name, html in load_corpus(corpus, pad_kb).get("noon", []):
+        if cache is not None:
+            html = html.replace(STATE_ANCHOR, f'{STATE_ANCHOR},"apolloState":{cache}')
+        pages.append((name, html))
+    return pages
+
+
+def correct(fields: dict, expected: dict) -> tuple[bool, bool]:
+    title_ok = (fields.get("title") or None) == expected["title"]
+    want = expected["price"]
+    got = parse_price_to_decimal(fields.get("price_raw"))
+    price_ok = got == (parse_price_to_decimal(want) if want else None)
+    return title_ok, price_ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--pad-kb", type=int, default=800)
+    parser.add_argument("--state-kb", type=int, default=400)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(os.path.join(args.corpus, "noon", "expected.json")) as f:
+        expected = json.load(f)
+    pages = load_pages(args.corpus, args.pad_kb, args.state_kb)
+    avg_kb = statistics.fmean(len(html) for _, html in pages) / 1024
+    print(f"{len(pages)} noon pages, avg {avg_kb:.0f} KB")
+    print(
+        f"{'engine':8} {'mean ms':>8} {'p99 ms':>8} {'title':>6} {'price':>6}  misses"
+    )
+
+    for engine in sorted(e for m, e in EXTRACTORS if m == "noon"):
+        timings = []
+        for _ in range(args.rounds):
+            for _, html in pages:
+                start = time.perf_counter()
+                extract("noon", engine, html)
+                timings.append(time.perf_counter() - start)
+
+        titles = prices = 0
+        misses = []
+        for name, html in pages:
+            title_ok, price_ok = correct(extract("noon", engine, html), expected[name])
+            titles += title_ok
+            prices += price_ok
+            if not (title_ok and price_ok):
+                misses.append(name)
+        print(
+            f"{engine:8} {statistics.fmean(timings) * 1000:8.2f} "
+            f"{percentile(timings, 99) * 1000:8.2f} "
+            f"{titles:3d}/{len(pages):<2d} {prices:3d}/{len(pages):<2d}  "
+            f"{', '.join(misses) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Compare page extraction engines over an offline corpus of product pages.
+
+The corpus is a directory with one sub-directory per marketplace holding
+saved .html pages (benchmarks/corpus by default). Small fixture pages carry
+a <!--PAD--> marker where --pad-kb of filler markup is inserted, to bring
+them to real product-page size; real saved pages are used as-is:
+
+    python -m benchmarks.parsers --pad-kb 1500 --rounds 5
+    python -m benchmarks.parsers --corpus ~/saved-pages --pool-workers 4
+
+The second table runs the same parses concurrently on the event loop
+(inline), in a thread and in a process pool, and reports the worst event
+loop stall seen by a 1 ms ticker while they run.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.marketplaces.extractors import EXTRACTORS, extract
+from benchmarks.load_test import percentile
+
+CORPUS = os.path.join(os.path.dirname(__file__), "corpus")
+
+
+def filler(kb: int) -> str:
+    # Roughly what dominates a real Amazon page: inline JSON config and
+    # deeply nested widget markup, none of which we need.
+    rng = random.Random(kb)
+    chunks = []
+    size = 0
+    while size < kb * 1024:
+        n = rng.randint(1, 10**6)
+        chunk = (
+            f'<script type="a-state" data-a-state=\'{{"key":"w{n}"}}\'>'
+            f'{{"asin":"B0{n:08d}","price":"{n % 997}.99","items":[{n},{n + 1}]}}'
+            "</script>"
+            f'<div class="a-section widget-{n}"><span class="a-size-base">'
+            f"Item {n}</span><a href=\"/dp/B0{n:08d}\">link</a></div>\n"
+        )
+        chunks.append(chunk)
+        size += len(chunk)
+    return "".join(chunks)
+
+
+def load_corpus(path: str, pad_kb: int) -> dict[str, list[tuple[str, str]]]:
+    pad = filler(pad_kb) if pad_kb else ""
+    corpus = {}
+    for marketplace in sorted(os.listdir(path)):
+        folder = os.path.join(path, marketplace)
+        if not os.path.isdir(folder):
+            continue
+        pages = []
+        for name in sorted(os.listdir(folder)):
+            if name.endswith(".html"):
+                with open(os.path.join(folder, name), encoding="utf-8") as f:
+                    pages.append((name, f.read().replace("<!--PAD-->", pad)))
+        if pages:
+            corpus[marketplace] = pages
+    return corpus
+
+
+def normalized(fields: dict) -> tuple:
+    return tuple(
+        re.sub(r"\s+", " ", v).strip() if isinstance(v, str) else v
+        for _, v in sorted(fields.items())
+    )
+
+
+def time_engines(corpus, rounds: int):
+    print(
+        f"{'engine':14} {'pages':>5} {'avg KB':>7} {'mean ms':>8} "
+        f"{'p99 ms':>8} {'agree':>6}"
+    )
+    for marketplace, pages in corpus.items():
+        engines = [e for (m, e) in EXTRACTORS if m == marketplace]
+        reference = {
+            name: normalized(extract(marketplace, "bs4", html))
+            for name, html in pages
+        }
+        avg_kb = statistics.fmean(len(html) for _, html in pages) / 1024
+        for engine in engines:
+            timings = []
+            agree = 0
+            for _ in range(rounds):
+                for name, html in pages:
+                    start = time.perf_counter()
+                    extract(marketplace, engine, html)
+                    timings.append(time.perf_counter() - start)
+            for name, html in pages:
+                agree += normalized(extract(marketplace, engine, html)) == reference[name]
+            print(
+                f"{marketplace + '/' + engine:14} {len(pages):5d} {avg_kb:7.0f} "
+                f"{statistics.fmean(timings) * 1000:8.2f} "
+                f"{percentile(timings, 99) * 1000:8.2f} {agree:3d}/{len(pages):<2d}"
+            )
+
+
+async def measure_stall(run_all) -> tuple[float, float]:
+    worst = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal worst
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            worst = max(worst, time.perf_counter() - start - 0.001)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await run_all()
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick
+    return elapsed, worst
+
+
+async def offload(corpus, engine: str, mode: str, pool, copies: int):
+    jobs = [
+        (marketplace, html)
+        for marketplace, pages in corpus.items()
+        if (marketplace, engine) in EXTRACTORS
+        for _, html in pages
+    ] * copies
+    loop = asyncio.get_running_loop()
+
+    async def one(marketplace, html):
+        if mode == "inline":
+            await asyncio.sleep(0)
+            return extract(marketplace, engine, html)
+        if mode == "thread":
+            return await asyncio.to_thread(extract, marketplace, engine, html)
+        return await loop.run_in_executor(pool, extract, marketplace, engine, html)
+
+    async def run_all():
+        await asyncio.gather(*(one(m, h) for m, h in jobs))
+
+    elapsed, worst = await measure_stall(run_all)
+    return len(jobs), elapsed, worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--pad-kb", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--copies", type=int, default=10)
+    parser.add_argument("--pool-workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, args.pad_kb)
+    time_engines(corpus, args.rounds)
+
+    print()
+    print(f"{'engine/mode':18} {'parses':>6} {'pages/s':>8} {'max stall ms':>13}")
+    with ProcessPoolExecutor(max_workers=args.pool_workers) as pool:
+        for engine in sorted({e for _, e in EXTRACTORS}):
+            for mode in ("inline", "thread", "process"):
+                n, elapsed, worst = asyncio.run(
+                    offload(corpus, engine, mode, pool, args.copies)
+                )
+                print(
+                    f"{engine + '/' + mode:18} {n:6d} {n / elapsed:8.1f} "
+                    f"{worst * 1000:13.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Health-scored proxy pool against local stub proxies of varying quality.
+
+Each --proxy is a local StubMarketplace used as a plain-HTTP forward proxy,
+given as LATENCY[:CAPTCHA_RATE] (seconds, fraction of robot-check pages),
+or "dead" for a port nothing listens on. The same batch of Amazon fetches
+runs through the adapters once with proxies picked uniformly at random
+(no scoring, no cool-down) and once through the health-scored pool:
+
+    python -m benchmarks.proxy_pool --fetches 400 --concurrency 16
+    python -m benchmarks.proxy_pool --proxy 0.02 --proxy 0.4 --proxy 0.02:0.5
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from app.marketplaces import base
+from app.marketplaces.amazon import AmazonAdapter
+from app.marketplaces.page_cache import page_cache
+from app.marketplaces.proxy_pool import ProxyPool
+from app.services import circuit_breaker
+from app.services.circuit_breaker import CircuitBreaker
+from benchmarks.parsers import CORPUS
+from benchmarks.stub_marketplace import StubMarketplace, load_pages
+
+DEAD_PROXY = "http://127.0.0.1:9"
+DEFAULT_PROXIES = ["0.03", "0.03", "0.4", "0.03:0.6", "dead"]
+
+
+class UniformPool(ProxyPool):
+    """Round-the-houses baseline: any proxy under its cap, health ignored."""
+
+    def _pick(self):
+        free = [p for p in self.proxies if p.in_flight < self.max_concurrency]
+        return random.choice(free) if free else None
+
+    def record(self, proxy, elapsed, error=None):
+        pass
+
+
+def parse_proxy(spec: str) -> tuple[float, float] | None:
+    if spec == "dead":
+        return None
+    latency, _, captcha = spec.partition(":")
+    return float(latency), float(captcha or 0)
+
+
+async def run(args, pool_cls) -> dict:
+    pages = load_pages(args.corpus, args.pad_kb)
+    stubs = [
+        StubMarketplace(pages, latency=spec[0], captcha_rate=spec[1], etags=False)
+        for spec in map(parse_proxy, args.proxy)
+        if spec is not None
+    ]
+    for stub in stubs:
+        await stub.start()
+    urls, stub_iter = [], iter(stubs)
+    for spec in args.proxy:
+        urls.append(DEAD_PROXY if spec == "dead" else next(stub_iter).url)
+
+    # Only the proxies are under test; a captcha-heavy exit mustn't open the
+    # marketplace's circuit for everyone.
+    circuit_breaker._breakers["amazon"] = CircuitBreaker(
+        "amazon", min_requests=10**9
+    )
+    base.proxy_pool = pool = pool_cls(
+        urls, max_concurrency=args.per_proxy, cooldown_seconds=args.cooldown
+    )
+    adapter = AmazonAdapter(parser="fast")
+    semaphore = asyncio.Semaphore(args.concurrency)
+    counts = {"ok": 0, "failed": 0}
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await adapter.fetch(f"http://www.amazon.ae/bench-{i}/dp/PP{i:08d}")
+                counts["ok"] += 1
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                counts["failed"] += 1
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(i) for i in range(args.fetches)))
+    finally:
+        elapsed = time.perf_counter() - start
+        await adapter.aclose()
+        for stub in stubs:
+            await stub.close()
+
+    latencies.sort()
+    served = {stub.url: stub.requests for stub in stubs}
+    return {
+        **counts,
+        "elapsed": elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+        "proxies": [
+            {**row, "served": served.get(url, 0)}
+            for url, row in zip(urls, pool.snapshot())
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--proxy", action="append", default=None)
+    parser.add_argument("--fetches", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--per-proxy", type=int, default=8)
+    parser.add_argument("--cooldown", type=float, default=5.0)
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--pad-kb", type=int, default=200)
+    args = parser.parse_args()
+    args.proxy = args.proxy or DEFAULT_PROXIES
+    page_cache.path = None
+
+    for name, pool_cls in (("uniform", UniformPool), ("scored", ProxyPool)):
+        r = asyncio.run(run(args, pool_cls))
+        print(
+            f"{name}: {r['ok']} ok, {r['failed']} failed in {r['elapsed']:.1f}s, "
+            f"p50 {r['p50_ms']:.0f} ms, p99 {r['p99_ms']:.0f} ms"
+        )
+        print(f"  {'proxy':22} {'served':>7} {'state':>8} {'score':>7} {'ms':>7}")
+        for row in r["proxies"]:
+            print(
+                f"  {row['proxy']:22} {row['served']:7d} {row['state']:>8} "
+                f"{row['score']:7.2f} {row['latency_ms']:7.1f}"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main()
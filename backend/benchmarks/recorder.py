@@ -0,0 +1,120 @@
+"""Record live product pages into a fixture corpus the benchmarks can replay.
+
+Fetches each URL once through the matching marketplace adapter's client (no
+retries, so a 503 or a captcha page is recorded as served) and writes the
+body under <out>/<marketplace>/ plus an entry in <out>/index.json with the
+status and validators. The directory works as --corpus for
+benchmarks.parsers and as --recordings for benchmarks.stub_marketplace /
+benchmarks.monitor_cycle:
+
+    python -m benchmarks.recorder --out ~/qb-recordings URL [URL ...]
+    python -m benchmarks.recorder --out ~/qb-recordings --from-db 50 --delay 3
+
+Recorded pages are real marketplace HTML; keep them out of the repo.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+KEPT_HEADERS = ("content-type", "etag", "last-modified")
+SLUG = re.compile(r"[^A-Za-z0-9]+")
+
+
+def file_name(url: str) -> str:
+    parts = urlsplit(url)
+    segments = [s for s in parts.path.split("/") if s and s not in ("dp", "p")]
+    stem = SLUG.sub("-", segments[-1] if segments else parts.netloc).strip("-")
+    digest = hashlib.blake2b(url.encode(), digest_size=4).hexdigest()
+    return f"{stem[:60]}-{digest}.html"
+
+
+def urls_from_db(limit: int) -> list[str]:
+    from sqlalchemy import select
+
+    from app.db.models import ProductObservation
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        return list(
+            db.execute(
+                select(ProductObservation.url)
+                .order_by(ProductObservation.id.desc())
+                .limit(limit)
+            ).scalars()
+        )
+
+
+def load_index(out: str) -> dict[str, dict]:
+    path = os.path.join(out, "index.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return {entry["url"]: entry for entry in json.load(f)}
+
+
+async def record(urls: list[str], out: str, delay: float):
+    from app.services.monitor import close_adapters, pick_adapter
+
+    index = load_index(out)
+    try:
+        for i, url in enumerate(urls):
+            adapter = pick_adapter(url)
+            if adapter is None:
+                print(f"skip  {url} (no adapter)")
+                continue
+            if i and delay:
+                await asyncio.sleep(delay)
+            try:
+                async with adapter.route() as client:
+                    resp = await client.get(url)
+            except Exception as e:
+                print(f"error {url}: {e}")
+                continue
+
+            name = os.path.join(adapter.MARKETPLACE, file_name(url))
+            os.makedirs(os.path.join(out, adapter.MARKETPLACE), exist_ok=True)
+            with open(os.path.join(out, name), "wb") as f:
+                f.write(resp.content)
+            index[url] = {
+                "url": url,
+                "marketplace": adapter.MARKETPLACE,
+                "file": name,
+                "status": resp.status_code,
+                "headers": {
+                    k: v for k, v in resp.headers.items() if k.lower() in KEPT_HEADERS
+                },
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+            }
+            print(f"{resp.status_code:5d} {len(resp.content) // 1024:6d} KB  {name}")
+    finally:
+        await close_adapters()
+        with open(os.path.join(out, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(list(index.values()), f, indent=2)
+            f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("urls", nargs="*")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--from-db", type=int, default=0, metavar="N")
+    parser.add_argument("--delay", type=float, default=2.0)
+    args = parser.parse_args()
+
+    urls = list(args.urls)
+    if args.from_db:
+        urls += urls_from_db(args.from_db)
+    if not urls:
+        parser.error("give URLs or --from-db N")
+    os.makedirs(args.out, exist_ok=True)
+    asyncio.run(record(urls, args.out, args.delay))
+
+
+if __name__ == "__main__":
+    main()
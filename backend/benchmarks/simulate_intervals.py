@@ -0,0 +1,138 @@
+"""Replay historical price snapshots under different scrape-interval policies.
+
+Each product's snapshot history is treated as the true price timeline (a step
+function). Every policy then "scrapes" that timeline on its own schedule, and
+we count scrapes and price changes caught per scrape:
+
+    python -m benchmarks.simulate_intervals --days 60
+    python -m benchmarks.simulate_intervals --csv history.csv --fixed 1 6 24
+
+The CSV form expects tracked_product_id,fetched_at,price rows. The ground
+truth is only as fine-grained as the recorded history, so changes between two
+recorded snapshots are invisible to every policy alike.
+"""
+
+import argparse
+import bisect
+import csv
+import statistics
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from app.services.scheduling import auto_interval_hours
+
+WINDOW = timedelta(days=30)
+
+
+def load_csv(path: str) -> dict[int, list[tuple[datetime, float]]]:
+    series = defaultdict(list)
+    with open(path) as f:
+        for row in csv.DictReader(f):
+            if row["price"] in ("", None):
+                continue
+            ts = datetime.fromisoformat(row["fetched_at"])
+            series[int(row["tracked_product_id"])].append((ts, float(row["price"])))
+    return {pid: sorted(points) for pid, points in series.items()}
+
+
+def load_db(days: int) -> dict[int, list[tuple[datetime, float]]]:
+    from sqlalchemy import select
+
+    from app.db.models import PriceSnapshot
+    from app.db.session import SessionLocal
+
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    series = defaultdict(list)
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(
+                PriceSnapshot.tracked_product_id,
+                PriceSnapshot.fetched_at,
+                PriceSnapshot.price,
+            )
+            .where(PriceSnapshot.fetched_at >= since, PriceSnapshot.price.isnot(None))
+            .order_by(PriceSnapshot.tracked_product_id, PriceSnapshot.fetched_at)
+        )
+        for pid, ts, price in rows:
+            series[pid].append((ts, float(price)))
+    return series
+
+
+def price_at(times: list[datetime], prices: list[float], t: datetime) -> float:
+    idx = bisect.bisect_right(times, t) - 1
+    return prices[max(idx, 0)]
+
+
+def simulate(points, next_interval) -> tuple[int, int]:
+    times = [t for t, _ in points]
+    prices = [p for _, p in points]
+    t, end = times[0], times[-1]
+    observed: list[tuple[datetime, float]] = []
+    scrapes = caught = 0
+    hours = 24
+
+    while t <= end:
+        price = price_at(times, prices, t)
+        scrapes += 1
+        if observed and observed[-1][1] != price:
+            caught += 1
+        observed.append((t, price))
+        hours = next_interval(observed, hours)
+        t += timedelta(hours=hours)
+
+    return scrapes, caught
+
+
+def fixed_policy(hours: int):
+    return lambda observed, current: hours
+
+
+def auto_policy(auto_products: int):
+    def next_interval(observed, current):
+        cutoff = observed[-1][0] - WINDOW
+        window = [p for t, p in observed if t >= cutoff]
+        changes = sum(1 for a, b in zip(window, window[1:]) if a != b)
+        mean = statistics.fmean(window)
+        vol = statistics.stdev(window) / mean if len(window) > 1 and mean else None
+        return auto_interval_hours(current, len(window), changes, vol, auto_products)
+
+    return next_interval
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", help="read history from CSV instead of the DB")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--fixed", type=int, nargs="*", default=[1, 6, 12, 24])
+    parser.add_argument(
+        "--auto-products",
+        type=int,
+        default=1,
+        help="auto-mode products per user, for the budget share",
+    )
+    args = parser.parse_args()
+
+    series = load_csv(args.csv) if args.csv else load_db(args.days)
+    series = {pid: pts for pid, pts in series.items() if len(pts) >= 2}
+    true_changes = sum(
+        sum(1 for a, b in zip(pts, pts[1:]) if a[1] != b[1]) for pts in series.values()
+    )
+
+    policies = {f"fixed-{h}h": fixed_policy(h) for h in args.fixed}
+    policies["auto"] = auto_policy(args.auto_products)
+
+    print(f"products={len(series)} recorded_changes={true_changes}")
+    print(f"{'policy':10} {'scrapes':>9} {'caught':>8} {'caught/scrape':>14} {'coverage':>9}")
+    for name, policy in policies.items():
+        scrapes = caught = 0
+        for points in series.values():
+            s, c = simulate(points, policy)
+            scrapes += s
+            caught += c
+        per_scrape = caught / scrapes if scrapes else 0.0
+        coverage = caught / true_changes if true_changes else 0.0
+        print(f"{name:10} {scrapes:9d} {caught:8d} {per_scrape:14.3f} {coverage:9.1%}")
+
+
+if __name__ == "__main__":
+    main()
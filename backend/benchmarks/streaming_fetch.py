@@ -0,0 +1,183 @@
+"""Full-page fetch + parse vs early-terminating streaming fetch.
+
+Serves the benchmark corpus from a local stub server that trickles each
+page out at --mbps, with --pad-kb of filler ahead of the product block (the
+inline scripts at the top of a real page) and --tail-kb after it (reviews,
+recommendations, footer). "full" downloads the whole page and runs the fast
+extractor on it; "stream" scans chunks as they arrive and hangs up once
+title and price are found:
+
+    python -m benchmarks.streaming_fetch --fetches 200 --concurrency 10
+    python -m benchmarks.streaming_fetch --pad-kb 300 --tail-kb 1200 --mbps 20
+
+Pages missing a field (amazon/unavailable.html has no price) read on to the
+end, or until FETCH_BYTE_BUDGET ("budget" early closes) on larger pages.
+Needs openssl on PATH for the throwaway certificate.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core.config import settings
+from app.marketplaces.amazon import AmazonAdapter
+from app.marketplaces.base import FETCH_BYTES, FETCH_EARLY_CLOSE
+from app.marketplaces.noon import NoonAdapter
+from benchmarks.load_test import percentile
+from benchmarks.parsers import CORPUS, filler, load_corpus, normalized
+from benchmarks.stub_server import StubServer
+
+ADAPTERS = {"amazon": AmazonAdapter, "noon": NoonAdapter}
+
+
+class CorpusServer(StubServer):
+    def __init__(self, pages: dict[str, bytes], **kwargs):
+        super().__init__(b"", **kwargs)
+        self.pages = pages
+
+    async def respond(self, method: str, target: str, headers: dict) -> tuple:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        body = self.pages.get(target)
+        if body is None:
+            return 404, {"Content-Type": "text/plain"}, b"not found"
+        return 200, {"Content-Type": self.content_type}, body
+
+
+def build_pages(corpus_dir: str, pad_kb: int, tail_kb: int) -> dict[str, str]:
+    tail = filler(tail_kb) if tail_kb else ""
+    pages = {}
+    for marketplace, items in load_corpus(corpus_dir, pad_kb).items():
+        if marketplace not in ADAPTERS:
+            continue
+        for name, html in items:
+            pages[f"/{marketplace}/{name}"] = html.replace(
+                "</body>", tail + "</body>", 1
+            )
+    return pages
+
+
+async def run_mode(server, adapters, paths, mode, fetches, concurrency):
+    timings = []
+    results = {}
+    slots = asyncio.Semaphore(concurrency)
+    bytes_before = {m: FETCH_BYTES.value(marketplace=m, mode=mode) for m in adapters}
+    sent_before = server.bytes_sent
+
+    async def one(i):
+        path = paths[i % len(paths)]
+        adapter = adapters[path.split("/")[1]]
+        url = server.url + path
+        async with slots:
+            start = time.perf_counter()
+            if mode == "stream":
+                _, data = await adapter.fetch_streaming(url)
+                data.pop("unchanged")
+            else:
+                resp = await adapter.get(url)
+                FETCH_BYTES.inc(
+                    resp.num_bytes_downloaded,
+                    marketplace=adapter.MARKETPLACE,
+                    mode="full",
+                )
+                data = await adapter.parse_async(url, resp.text)
+            timings.append(time.perf_counter() - start)
+        results[path] = data
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(fetches)))
+    elapsed = time.perf_counter() - start
+
+    downloaded = sum(
+        FETCH_BYTES.value(marketplace=m, mode=mode) - bytes_before[m]
+        for m in adapters
+    )
+    return {
+        "elapsed": elapsed,
+        "timings": timings,
+        "downloaded": downloaded,
+        "sent": server.bytes_sent - sent_before,
+        "results": results,
+    }
+
+
+async def main_async(args):
+    pages = build_pages(args.corpus, args.pad_kb, args.tail_kb)
+    encoded = {path: html.encode("utf-8") for path, html in pages.items()}
+    paths = sorted(encoded)
+    avg_kb = statistics.fmean(len(b) for b in encoded.values()) / 1024
+
+    async with CorpusServer(
+        encoded,
+        latency=args.latency,
+        chunk_size=args.chunk_kb * 1024,
+        bytes_per_second=args.mbps * 1024 * 1024 / 8 if args.mbps else 0.0,
+    ) as server:
+        adapters = {
+            name: cls(verify=server.client_context, proxy="", parser="fast")
+            for name, cls in ADAPTERS.items()
+        }
+        print(
+            f"{len(paths)} pages, avg {avg_kb:.0f} KB, "
+            f"budget {settings.FETCH_BYTE_BUDGET // 1024} KB"
+        )
+        print(
+            f"{'mode':7} {'fetches/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+            f"{'KB/fetch':>9} {'sent KB/fetch':>14} {'agree':>6}"
+        )
+        reference = None
+        for mode in ("full", "stream"):
+            early = {
+                (m, r): FETCH_EARLY_CLOSE.value(marketplace=m, reason=r)
+                for m in adapters
+                for r in ("complete", "budget")
+            }
+            run = await run_mode(
+                server, adapters, paths, mode, args.fetches, args.concurrency
+            )
+            got = {p: normalized(d) for p, d in run["results"].items()}
+            reference = reference or got
+            agree = sum(got[p] == reference[p] for p in paths)
+            print(
+                f"{mode:7} {args.fetches / run['elapsed']:9.1f} "
+                f"{statistics.median(run['timings']) * 1000:8.1f} "
+                f"{percentile(run['timings'], 99) * 1000:8.1f} "
+                f"{run['downloaded'] / args.fetches / 1024:9.0f} "
+                f"{run['sent'] / args.fetches / 1024:14.0f} "
+                f"{agree:3d}/{len(paths):<2d}"
+            )
+            if mode == "stream":
+                closed = {
+                    r: sum(
+                        FETCH_EARLY_CLOSE.value(marketplace=m, reason=r) - early[m, r]
+                        for m in adapters
+                    )
+                    for r in ("complete", "budget")
+                }
+                print(
+                    f"        early close: {closed['complete']:.0f} complete, "
+                    f"{closed['budget']:.0f} budget"
+                )
+        for adapter in adapters.values():
+            await adapter.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--pad-kb", type=int, default=400)
+    parser.add_argument("--tail-kb", type=int, default=1000)
+    parser.add_argument("--fetches", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--chunk-kb", type=int, default=16)
+    parser.add_argument(
+        "--mbps", type=float, default=50.0, help="bandwidth per connection, 0 = off"
+    )
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
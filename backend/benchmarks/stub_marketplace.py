@@ -0,0 +1,217 @@
+"""Local stand-in for amazon/noon that replays saved product pages.
+
+Runs as a plain-HTTP forward proxy target: point an adapter's proxy at it
+and fetch http:// marketplace URLs, and it answers as if it were the
+marketplace (the adapters and pick_adapter see real-looking URLs). URLs in
+a recording index (benchmarks.recorder) replay exactly; any other product
+URL gets a corpus page for its marketplace, picked by a hash of the path so
+the same product always gets the same page.
+
+Faults are configurable: latency plus jitter, a random 503 rate, a captcha
+rate (a 200 robot-check page) and per-marketplace throttling that answers
+429 above a request rate. Pages carry an ETag and If-None-Match gets a 304,
+so the page cache is exercised too. Standalone, for poking at by hand:
+
+    python -m benchmarks.stub_marketplace --port 8899 --error-rate 0.02
+    curl -x http://127.0.0.1:8899 http://www.amazon.ae/dp/B000000001
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+import zlib
+from collections import Counter
+from urllib.parse import urlsplit
+
+from benchmarks.parsers import CORPUS, load_corpus
+from benchmarks.stub_server import StubServer
+
+CAPTCHA_PAGE = (
+    b"<html><head><title>Robot Check</title></head><body>"
+    b"<form method='get' action='/errors/validateCaptcha'>"
+    b"Enter the characters you see below</form></body></html>"
+)
+
+
+def marketplace_for(host: str) -> str | None:
+    if "amazon." in host:
+        return "amazon"
+    if "noon.com" in host:
+        return "noon"
+    return None
+
+
+def recording_key(url: str) -> str:
+    # Scheme-less, so an https:// recording replays for the http:// URLs the
+    # adapters send through the proxy.
+    parts = urlsplit(url)
+    query = f"?{parts.query}" if parts.query else ""
+    return parts.netloc.lower() + parts.path + query
+
+
+def load_recordings(path: str) -> dict[str, tuple[int, dict, bytes]]:
+    index_path = os.path.join(path, "index.json")
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path, encoding="utf-8") as f:
+        index = json.load(f)
+    recordings = {}
+    for entry in index:
+        with open(os.path.join(path, entry["file"]), "rb") as f:
+            body = f.read()
+        key = recording_key(entry["url"])
+        recordings[key] = (entry["status"], entry.get("headers", {}), body)
+    return recordings
+
+
+class Throttle:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class StubMarketplace(StubServer):
+    def __init__(
+        self,
+        pages: dict[str, list[bytes]],
+        *,
+        recordings: dict[str, tuple[int, dict, bytes]] | None = None,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        captcha_rate: float = 0.0,
+        throttle_rps: float = 0.0,
+        throttle_burst: float = 0.0,
+        etags: bool = True,
+        seed: int = 0,
+        **kwargs,
+    ):
+        kwargs.setdefault("tls", False)
+        super().__init__(b"", **kwargs)
+        self.pages = pages
+        self.recordings = recordings or {}
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.captcha_rate = captcha_rate
+        self.etags = etags
+        self.rng = random.Random(seed)
+        self.throttles = {
+            name: Throttle(throttle_rps, throttle_burst or throttle_rps)
+            for name in pages
+            if throttle_rps > 0
+        }
+        self.statuses: Counter = Counter()
+        self._etags = {id(body): self._etag(body) for p in pages.values() for body in p}
+
+    @staticmethod
+    def _etag(body: bytes) -> str:
+        return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+    def page_for(self, marketplace: str, path: str) -> bytes:
+        pages = self.pages[marketplace]
+        return pages[zlib.crc32(path.encode()) % len(pages)]
+
+    async def respond(self, method: str, target: str, headers: dict) -> tuple:
+        status, extra, body = await self._respond(target, headers)
+        self.statuses[status] += 1
+        return status, extra, body
+
+    async def _respond(self, target: str, headers: dict) -> tuple:
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+
+        parts = urlsplit(target)
+        host = parts.netloc or headers.get("host", "")
+        marketplace = marketplace_for(host)
+        if marketplace is None or marketplace not in self.pages:
+            return 404, {"Content-Type": "text/plain"}, b"unknown marketplace"
+
+        throttle = self.throttles.get(marketplace)
+        if throttle is not None and not throttle.allow():
+            return 429, {"Content-Type": "text/plain", "Retry-After": "1"}, b"slow down"
+        roll = self.rng.random()
+        if roll < self.error_rate:
+            return 503, {"Content-Type": "text/plain"}, b"service unavailable"
+        if roll < self.error_rate + self.captcha_rate:
+            return 200, {"Content-Type": self.content_type}, CAPTCHA_PAGE
+
+        url = target if parts.netloc else f"//{host}{target}"
+        recorded = self.recordings.get(recording_key(url))
+        if recorded is not None:
+            status, recorded_headers, body = recorded
+            extra = {"Content-Type": self.content_type, **recorded_headers}
+            return status, extra, body
+
+        body = self.page_for(marketplace, parts.path)
+        extra = {"Content-Type": self.content_type}
+        if self.etags:
+            etag = self._etags[id(body)]
+            if headers.get("if-none-match") == etag:
+                return 304, {"ETag": etag}, b""
+            extra["ETag"] = etag
+        return 200, extra, body
+
+
+def load_pages(corpus: str, pad_kb: int) -> dict[str, list[bytes]]:
+    return {
+        marketplace: [html.encode("utf-8") for _, html in pages]
+        for marketplace, pages in load_corpus(corpus, pad_kb).items()
+    }
+
+
+async def serve(args):
+    server = StubMarketplace(
+        load_pages(args.corpus, args.pad_kb),
+        recordings=load_recordings(args.recordings) if args.recordings else None,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        captcha_rate=args.captcha_rate,
+        throttle_rps=args.throttle_rps,
+        port=args.port,
+    )
+    await server.start()
+    print(f"stub marketplace on {server.url} (use it as an HTTP proxy)")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(dict(server.statuses), flush=True)
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--recordings", default=None)
+    parser.add_argument("--pad-kb", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--captcha-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rps", type=float, default=0.0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Minimal local HTTP(S)/1.1 server for the marketplace benchmarks.
+
+Serves one canned page to every request with keep-alive, optional TLS
+(self-signed via openssl) and an artificial per-request latency. Bodies can
+be written in chunks paced to a bandwidth, like a real marketplace trickling
+out a large page. It counts accepted connections so benchmarks can show
+connection reuse, and body bytes written so they can show early hang-ups.
+"""
+
+import asyncio
+import os
+import ssl
+import subprocess
+import tempfile
+
+
+def make_self_signed(directory: str) -> tuple[str, str]:
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-keyout",
+            key,
+            "-out",
+            cert,
+            "-days",
+            "1",
+            "-subj",
+            "/CN=localhost",
+            "-addext",
+            "subjectAltName=DNS:localhost,IP:127.0.0.1",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+class StubServer:
+    def __init__(
+        self,
+        body: bytes,
+        *,
+        latency: float = 0.0,
+        tls: bool = True,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        content_type: str = "text/html; charset=utf-8",
+        chunk_size: int = 0,
+        bytes_per_second: float = 0.0,
+    ):
+        self.body = body
+        self.latency = latency
+        self.tls = tls
+        self.host = host
+        self.content_type = content_type
+        self.chunk_size = chunk_size
+        self.bytes_per_second = bytes_per_second
+        self.connections = 0
+        self.requests = 0
+        self.bytes_sent = 0
+        self.port = port
+        self.client_context: ssl.SSLContext | None = None
+        self._server = None
+        self._tmp = None
+        self._handlers: set[asyncio.Task] = set()
+
+    @property
+    def url(self) -> str:
+        scheme = "https" if self.tls else "http"
+        return f"{scheme}://{self.host}:{self.port}"
+
+    async def start(self):
+        server_context = None
+        if self.tls:
+            self._tmp = tempfile.TemporaryDirectory()
+            cert, key = make_self_signed(self._tmp.name)
+            server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            server_context.load_cert_chain(cert, key)
+            server_context.set_alpn_protocols(["http/1.1"])
+            self.client_context = ssl.create_default_context(cafile=cert)
+
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, ssl=server_context
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            for task in self._handlers:
+                task.cancel()
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+            await self._server.wait_closed()
+        if self._tmp is not None:
+            self._tmp.cleanup()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def respond(self, method: str, target: str, headers: dict) -> tuple:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return 200, {"Content-Type": self.content_type}, self.body
+
+    async def _write_body(self, writer, body: bytes):
+        step = self.chunk_size or len(body) or 1
+        for offset in range(0, len(body), step):
+            chunk = body[offset : offset + step]
+            writer.write(chunk)
+            await writer.drain()
+            self.bytes_sent += len(chunk)
+            if self.bytes_per_second:
+                await asyncio.sleep(len(chunk) / self.bytes_per_second)
+        if not body:
+            await writer.drain()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                method, target, _ = lines[0].split(" ", 2)
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length:
+                    await reader.readexactly(length)
+
+                self.requests += 1
+                status, extra, body = await self.respond(method, target, headers)
+                out = [f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}"]
+                out += [f"{k}: {v}" for k, v in extra.items()]
+                out.append(f"Content-Length: {len(body)}")
+                close = headers.get("connection", "").lower() == "close"
+                out.append("Connection: close" if close else "Connection: keep-alive")
+                writer.write(("\r\n".join(out) + "\r\n\r\n").encode("latin-1"))
+                await self._write_body(writer, body)
+                if close:
+                    break
+        except (ConnectionError, ssl.SSLError, asyncio.CancelledError):
+            pass
+        finally:
+            self._handlers.discard(task)
+            writer.close()
@@ -736,15 +736,18 @@ chrome.alarms.onAlarm.addListener(async (alarm) => {
 
     processScrapeQueue();
   } else if (alarm.name === "qb_poll_alerts") {
-    if (await checkActualConnectivity()) {
+    if (!eventStreamConnected && (await checkActualConnectivity())) {
       await pollBackendAlerts();
     }
   } else if (alarm.name === "quickbasket-sync-alarms") {
-    if (await checkActualConnectivity()) {
+    if (!eventStreamConnected && (await checkActualConnectivity())) {
       await syncAllProductAlarms();
     }
   } else if (alarm.name === "connectivity-check") {
-    await checkActualConnectivity();
+    if (eventStreamConnected) return;
+    if (await checkActualConnectivity()) {
+      connectEventStream();
+    }
   }
 });
 
@@ -1178,6 +1181,8 @@ function handleRestoredConnection() {
       // Silently ignore overdue check errors
     });
   }
+
+  connectEventStream();
 }
 
 async function apiFetchWrapper(url, options) {
@@ -1260,7 +1265,11 @@ async function fetchJson(url, options = {}) {
 }
 
 async function checkOverdueProducts() {
-  if (scrapeQueue.length > 0) {
+  // Only claim what there are free slots for: the lease keeps everyone else
+  // off a claimed product until it expires, so an unscraped claim stalls it.
+  const capacity =
+    CONFIG.MAX_CONCURRENT_SCRAPES - activeScrapes - scrapeQueue.length;
+  if (capacity <= 0) {
     return;
   }
   try {
@@ -1275,9 +1284,11 @@ async function checkOverdueProducts() {
       return;
     }
 
-    const response = await fetch(`${API_BASE}/api/v1/products/pending-scrape`, {
-      method: "GET",
+    // Lease due products so other browsers and the backend monitor skip them.
+    const response = await fetch(`${API_BASE}/api/v1/products/claim-scrape`, {
+      method: "POST",
       headers: headers,
+      body: JSON.stringify({ limit: capacity }),
     });
 
     if (!response.ok) {
@@ -1292,10 +1303,7 @@ async function checkOverdueProducts() {
 
     for (const product of products) {
       const pId = typeof product === "object" ? product.id : product;
-      if (
-        !scrapeQueue.includes(pId) &&
-        activeScrapes < CONFIG.MAX_CONCURRENT_SCRAPES
-      ) {
+      if (!scrapeQueue.includes(pId)) {
         scrapeQueue.push(pId);
       }
     }
@@ -1306,6 +1314,96 @@ async function checkOverdueProducts() {
   } catch (error) {}
 }
 
+// Server-sent events replace most polling: while the stream is open the
+// backend pushes due products, triggered alerts and schedule changes, and the
+// alerts / alarm-sync alarms skip their round trips.
+let eventStreamConnected = false;
+let eventStreamConnecting = false;
+let eventStreamRetryMs = 5000;
+
+function handleServerEvent(type, payload) {
+  const data = payload.data || {};
+
+  if (type === "schedule.changed") {
+    if (data.active === false) {
+      chrome.alarms.clear(`scrape-product-${data.product_id}`);
+    } else {
+      scheduleProductAlarm(data.product_id, data.next_run_at);
+    }
+    apiCache.delete(`${API_BASE}/dashboard/products`);
+  } else if (type === "product.due") {
+    checkOverdueProducts().catch(() => {});
+  } else if (type === "alert.triggered") {
+    pollBackendAlerts();
+  }
+}
+
+async function connectEventStream() {
+  if (eventStreamConnected || eventStreamConnecting) return;
+
+  const token = await getStoredToken();
+  if (!token) return;
+
+  eventStreamConnecting = true;
+  try {
+    const response = await fetch(`${API_BASE}/api/v1/events/stream`, {
+      headers: {
+        Authorization: `Bearer ${token}`,
+        Accept: "text/event-stream",
+      },
+      cache: "no-store",
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Event stream failed: ${response.status}`);
+    }
+
+    eventStreamConnected = true;
+    eventStreamConnecting = false;
+    console.log("[QB] Event stream connected");
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+        const chunk = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        let type = "message";
+        let data = "";
+        for (const line of chunk.split("\n")) {
+          if (line.startsWith("event:")) type = line.slice(6).trim();
+          else if (line.startsWith("data:")) data += line.slice(5).trim();
+          else if (line.startsWith("retry:"))
+            eventStreamRetryMs = parseInt(line.slice(6), 10) || eventStreamRetryMs;
+        }
+        if (data) {
+          try {
+            handleServerEvent(type, JSON.parse(data));
+          } catch (e) {
+            // Ignore malformed events
+          }
+        }
+      }
+    }
+  } catch (error) {
+    // Fall back to polling until the stream is back
+  } finally {
+    eventStreamConnected = false;
+    eventStreamConnecting = false;
+  }
+
+  setTimeout(() => {
+    if (isOnline) connectEventStream();
+  }, eventStreamRetryMs);
+}
+
 chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
   console.log("[QB] Action:", request.action);
 
@@ -1388,6 +1486,7 @@ chrome.runtime.onInstalled.addListener(async (details) => {
   });
 
   setupAlertsPolling();
+  connectEventStream();
 
   console.log("[QB] Initialization complete");
 });
@@ -1407,6 +1506,7 @@ chrome.runtime.onStartup.addListener(async () => {
   if (navigator.onLine) {
     console.log("[QB] Checking for overdue products after startup...");
     await checkOverdueProducts();
+    connectEventStream();
   } else {
     console.log("[QB] Starting offline - will check when connection restored");
   }
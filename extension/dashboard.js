@@ -354,6 +354,7 @@
           nextRun: p.next_run_at || null,
           change24h: safeFloat(p.change_24h),
           update_interval: p.update_interval || 24,
+          interval_mode: p.interval_mode || "manual",
           last_availability: p.last_availability || "in_stock",
         });
         if (p.image_url) setCachedImage(p.id, p.image_url);
@@ -440,18 +441,22 @@
       }
     }
 
-    const intervalOptions = [1, 6, 12, 24]
-      .map((hours) => {
-        const isCurrentInterval = interval === hours;
-        const isTooShort = timeRemainingHours > 0 && timeRemainingHours < hours;
-        const disabled = !isCurrentInterval && isTooShort ? "disabled" : "";
-        const label = hours === 1 ? "1h" : `${hours}h`;
-
-        return `<option value="${hours}" ${
-          interval == hours ? "selected" : ""
-        } ${disabled}>${label}</option>`;
-      })
-      .join("");
+    const isAuto = product.interval_mode === "auto";
+    const intervalOptions =
+      [1, 6, 12, 24]
+        .map((hours) => {
+          const isCurrentInterval = interval === hours;
+          const isTooShort =
+            timeRemainingHours > 0 && timeRemainingHours < hours;
+          const disabled = !isCurrentInterval && isTooShort ? "disabled" : "";
+          const label = hours === 1 ? "1h" : `${hours}h`;
+
+          return `<option value="${hours}" ${
+            !isAuto && interval == hours ? "selected" : ""
+          } ${disabled}>${label}</option>`;
+        })
+        .join("") +
+      `<option value="auto" ${isAuto ? "selected" : ""}>Auto</option>`;
 
     return `
       <div class="product-card" data-id="${escapeHtml(
@@ -704,7 +709,11 @@
 
       const response = await apiFetch(API.PRODUCT_INTERVAL(productId), {
         method: "PATCH",
-        body: JSON.stringify({ update_interval: parseInt(hours) }),
+        body: JSON.stringify(
+          hours === "auto"
+            ? { mode: "auto" }
+            : { update_interval: parseInt(hours) }
+        ),
       });
 
       cache.delete(API.DASHBOARD_PRODUCTS);
@@ -712,7 +721,9 @@
 
       const product = state.products.find((p) => p.id === productId);
       if (product) {
-        product.update_interval = parseInt(hours);
+        product.interval_mode = hours === "auto" ? "auto" : "manual";
+        product.update_interval =
+          response.new_interval || product.update_interval;
 
         if (response.next_run_at) {
           product.nextRun = response.next_run_at;